@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from napari.components import ViewerModel
+from qtpy.QtWidgets import QApplication
+
+from napari_micromanager._core_link import CoreViewerLink
+from napari_micromanager._latency import LatencyMonitor
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+    import numpy as np
+    from pymmcore_plus.experimental.unicore import UniMMCore
+    from useq import MDASequence
+
+
+@dataclass
+class MDARun:
+    """Throughput, memory and latency of one synthetic MDA through the handler."""
+
+    frames: int
+    seconds: float
+    peak_mb: float
+    latency_ms: dict[str, dict[float, float]]
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.seconds
+
+    def extra_info(self) -> dict[str, Any]:
+        info: dict[str, Any] = {
+            "frames": self.frames,
+            "fps": round(self.fps, 1),
+            "peak_mb": round(self.peak_mb, 1),
+        }
+        for stage in ("queue", "write", "total"):
+            for q, ms in self.latency_ms[stage].items():
+                info[f"{stage}_p{q:g}_ms"] = round(ms, 2)
+        return info
+
+
+def _run_mda(
+    link: CoreViewerLink,
+    sequence: MDASequence,
+    frames: Callable[[int], np.ndarray],
+    trace_memory: bool = False,
+) -> MDARun:
+    """Feed all the events of `sequence` to the handler as fast as it takes them.
+
+    The MDA signals are emitted from the main thread, as the runner would deliver
+    them, with pre-made frames: the time is that of the handler (queueing,
+    writing and displaying), not of the camera. Qt events are processed after
+    each frame, and until all of them are written, so the viewer is updated as
+    in a real acquisition.
+    """
+    app = QApplication.instance() or QApplication([])
+    events = list(sequence)
+    images = [frames(i) for i in range(min(len(events), 8))]
+    handler = link._mda_handler
+    handler.latency = link.latency = LatencyMonitor(window=len(events))
+    signals = link._mmc.mda.events
+
+    if trace_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    signals.sequenceStarted.emit(sequence, {})
+    for i, event in enumerate(events):
+        signals.frameReady.emit(images[i % len(images)], event, {})
+        app.processEvents()
+    # let the viewer follow the writers until the last frame is written
+    while handler.stats.frames + handler.stats.dropped < len(events):
+        app.processEvents()
+        time.sleep(0.001)
+    signals.sequenceFinished.emit(sequence)
+    seconds = time.perf_counter() - t0
+    peak = 0
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return MDARun(
+        frames=len(events),
+        seconds=seconds,
+        peak_mb=peak / 2**20,
+        latency_ms=handler.latency.percentiles((50, 99)),
+    )
+
+
+@pytest.fixture
+def run_mda() -> Callable[..., MDARun]:
+    """Return the function running synthetic MDAs (see `_run_mda`)."""
+    return _run_mda
+
+
+@pytest.fixture
+def mda_link(
+    qapp: Any, synthetic_core: Callable[..., UniMMCore]
+) -> Iterator[Callable[..., CoreViewerLink]]:
+    """Return a factory of viewer links to headless viewers, cleaned up after."""
+    links: list[CoreViewerLink] = []
+
+    def _make(shape: tuple[int, ...], dtype: str = "uint16") -> CoreViewerLink:
+        link = CoreViewerLink(ViewerModel(), synthetic_core(shape, dtype))
+        links.append(link)
+        return link
+
+    yield _make
+    for link in links:
+        link.cleanup(owns=True)
@@ -0,0 +1,33 @@
+"""Per-frame lookup of the layer and index of MDA events.
+
+Compares `_SequenceLookup`, computed once per sequence, with `_id_idx_layer`,
+computed for every event, on a sequence with many positions.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+from useq import MDASequence
+
+from napari_micromanager._mda_handler import _id_idx_layer, _SequenceLookup
+from napari_micromanager._util import NMM_METADATA_KEY
+
+SEQUENCE = MDASequence(
+    stage_positions=[(i, i, 0) for i in range(1000)],
+    channels=["DAPI", "FITC"],
+    metadata={NMM_METADATA_KEY: {"split_channels": True}},
+)
+
+
+@pytest.mark.parametrize("cached", [True, False], ids=["cached", "uncached"])
+def test_sequence_lookup(benchmark: Any, cached: bool) -> None:
+    events = list(SEQUENCE)
+    lookup = _SequenceLookup(SEQUENCE) if cached else _id_idx_layer
+
+    def _lookup_all() -> None:
+        for event in events:
+            lookup(event)
+
+    benchmark(_lookup_all)
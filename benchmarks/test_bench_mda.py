@@ -0,0 +1,100 @@
+"""Throughput of synthetic MDAs through the napari MDA handler.
+
+Run with ``uv run --group bench pytest benchmarks``. Besides the timings, each
+case records the sustained frames per second, the peak memory allocated during
+the MDA and percentiles of the queue, write and frameReady-to-screen latencies
+in its ``extra_info`` (see ``--benchmark-json``).
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pytest
+from useq import GridRowsColumns, MDASequence, Position
+
+from napari_micromanager._util import NMM_METADATA_KEY
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from napari_micromanager._core_link import CoreViewerLink
+
+GRID = MDASequence(grid_plan=GridRowsColumns(rows=2, columns=2, fov_width=512))
+
+# name: (camera shape, dtype, sequence)
+CASES: dict[str, tuple[tuple[int, ...], str, MDASequence]] = {
+    "time_lapse": (
+        (512, 512),
+        "uint16",
+        MDASequence(time_plan={"interval": 0, "loops": 300}),
+    ),
+    "split_channels": (
+        (512, 512),
+        "uint16",
+        MDASequence(
+            channels=["DAPI", "FITC", "Cy5"],
+            time_plan={"interval": 0, "loops": 100},
+            metadata={NMM_METADATA_KEY: {"split_channels": True}},
+        ),
+    ),
+    "grid": (
+        (512, 512),
+        "uint16",
+        MDASequence(
+            stage_positions=[
+                Position(x=0, y=0, sequence=GRID),
+                Position(x=5000, y=0, sequence=GRID),
+                Position(x=0, y=5000, sequence=GRID),
+            ],
+            channels=["DAPI", "FITC"],
+            time_plan={"interval": 0, "loops": 10},
+        ),
+    ),
+    "rgb": (
+        (512, 512, 3),
+        "uint8",
+        MDASequence(time_plan={"interval": 0, "loops": 200}),
+    ),
+    "large_sensor": (
+        (2048, 2048),
+        "uint16",
+        MDASequence(time_plan={"interval": 0, "loops": 30}),
+    ),
+}
+
+# handler storage backends: temporary zarr on disk, or in memory
+STORAGES = {"zarr": 0, "memory": 2**34}
+
+
+def _frames(shape: tuple[int, ...], dtype: str) -> Callable[[int], np.ndarray]:
+    rng = np.random.default_rng(0)
+    return lambda _: rng.integers(0, 1000 if dtype == "uint16" else 255, shape, dtype)
+
+
+@pytest.mark.parametrize("storage", list(STORAGES))
+@pytest.mark.parametrize("case", list(CASES))
+def test_mda_throughput(
+    benchmark: Any,
+    mda_link: Callable[..., CoreViewerLink],
+    run_mda: Callable[..., Any],
+    case: str,
+    storage: str,
+) -> None:
+    shape, dtype, sequence = CASES[case]
+    frames = _frames(shape, dtype)
+
+    def setup() -> tuple[tuple[CoreViewerLink], dict]:
+        link = mda_link(shape, dtype)
+        link._mda_handler.memory_budget = STORAGES[storage]
+        return (link,), {}
+
+    runs = benchmark.pedantic(
+        lambda link: run_mda(link, sequence, frames), setup=setup, rounds=3
+    )
+    # one more (untimed) run to trace the memory allocated during the MDA
+    run = run_mda(setup()[0][0], sequence, frames, trace_memory=True)
+    assert run.frames == runs.frames == len(list(sequence))
+    benchmark.extra_info.update(runs.extra_info())
+    benchmark.extra_info["peak_mb"] = round(run.peak_mb, 1)
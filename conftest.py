@@ -0,0 +1,58 @@
+"""Fixtures shared by the tests and the benchmarks."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from pymmcore_plus.experimental.unicore import SimpleCameraDevice, UniMMCore
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+
+    import numpy as np
+
+
+class SyntheticCamera(SimpleCameraDevice):
+    """A camera that only reports its geometry: frames are made by the caller."""
+
+    def __init__(self, shape: tuple[int, ...], dtype: str) -> None:
+        super().__init__()
+        self._shape = shape
+        self._dtype = dtype
+        self._exposure = 1.0
+
+    def sensor_shape(self) -> tuple[int, ...]:  # type: ignore[override]
+        return self._shape
+
+    def dtype(self) -> str:
+        return self._dtype
+
+    def get_exposure(self) -> float:
+        return self._exposure
+
+    def set_exposure(self, exposure: float) -> None:
+        self._exposure = exposure
+
+    def snap(self, buffer: np.ndarray) -> Mapping:
+        buffer[:] = 0
+        return {}
+
+
+def _make_synthetic_core(shape: tuple[int, ...], dtype: str = "uint16") -> UniMMCore:
+    """A core whose camera has the given (Y, X[, RGB]) shape and dtype."""
+    core = UniMMCore()
+    core.loadPyDevice("Camera", SyntheticCamera(shape, dtype))
+    core.initializeDevice("Camera")
+    core.setCameraDevice("Camera")
+    return core
+
+
+@pytest.fixture
+def synthetic_core() -> Callable[..., UniMMCore]:
+    """Return a factory of cores without Micro-Manager adapters.
+
+    Their camera reports the frame geometry only: the MDA frames are emitted on
+    the MDA signals by the test (or benchmark), not acquired.
+    """
+    return _make_synthetic_core
@@ -24,6 +24,17 @@ def main(args: Sequence[str] | None = None) -> None:
         help="Config file to load",
         nargs="?",
     )
+    recovery = parser.add_mutually_exclusive_group()
+    recovery.add_argument(
+        "--recover",
+        action="store_true",
+        help="Reopen the MDA data of sessions that crashed while acquiring",
+    )
+    recovery.add_argument(
+        "--discard-crashed",
+        action="store_true",
+        help="Delete the MDA data of sessions that crashed while acquiring",
+    )
     parsed_args = parser.parse_args(args)
 
     import napari
@@ -32,6 +43,10 @@ def main(args: Sequence[str] | None = None) -> None:
 
     viewer = napari.Viewer()
     win = MainWindow(viewer, config=parsed_args.config)
+    if parsed_args.recover:
+        win.recover_acquisitions()
+    elif parsed_args.discard_crashed:
+        win.discard_acquisitions()
     dw = viewer.window.add_dock_widget(win, name="MicroManager", area="top")
     if hasattr(dw, "_close_btn"):
         dw._close_btn = False
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import contextlib
+import math
+import time
+from datetime import datetime
 from typing import TYPE_CHECKING
 
 import napari
 import napari.layers
+from pymmcore_plus import Keyword
 from qtpy.QtCore import QObject, Qt, QTimerEvent
 from superqt.utils import ensure_main_thread
 
+from napari_micromanager._latency import LatencyMonitor
 from napari_micromanager._mda_handler import _NapariMDAHandler
 
 if TYPE_CHECKING:
@@ -15,10 +20,50 @@ if TYPE_CHECKING:
 
     import napari.viewer
     import numpy as np
-    from pymmcore_plus import CMMCorePlus
+    from pymmcore_plus import CMMCorePlus, Metadata
     from pymmcore_plus.core.events._protocol import PSignalInstance
 
 
+# bounds of the MDA poll interval (ms)
+MIN_POLL_MS = 16
+MAX_POLL_MS = 250
+# at most this fraction of the main thread goes to applying MDA viewer updates
+POLL_BUSY_FRACTION = 0.25
+
+
+def _poll_interval_ms(frame_period: float, render_cost: float) -> int:
+    """Return the MDA poll interval for the measured frame period and render cost.
+
+    Polling faster than frames are written shows nothing new, and polling more
+    often than `render_cost / POLL_BUSY_FRACTION` saturates the main thread.
+    Both are in seconds.
+    """
+    interval = max(frame_period, render_cost / POLL_BUSY_FRACTION) * 1000
+    if not math.isfinite(interval):
+        return MAX_POLL_MS
+    return int(min(max(interval, MIN_POLL_MS), MAX_POLL_MS))
+
+
+def _received_time(md: Metadata) -> float | None:
+    """Return the (perf_counter) time the core received the image of `md`.
+
+    None if the metadata doesn't tell.
+    """
+    try:
+        received = datetime.fromisoformat(md[Keyword.Metadata_TimeInCore])
+    except (KeyError, ValueError):
+        return None
+    return time.perf_counter() - (datetime.now() - received).total_seconds()
+
+
+def _image_number(md: Metadata) -> int | None:
+    """Return the number of the image of `md` in its sequence, if known."""
+    try:
+        return int(md[Keyword.Metadata_ImageNumber])
+    except (KeyError, ValueError):
+        return None
+
+
 class CoreViewerLink(QObject):
     """QObject linking events in a napari viewer to events in a CMMCorePlus instance."""
 
@@ -34,6 +79,18 @@ class CoreViewerLink(QObject):
         self._mda_handler = _NapariMDAHandler(self._mmc, viewer)
         self._live_timer_id: int | None = None
         self._mda_poll_timer_id: int | None = None
+        self._mda_poll_ms = 50
+        # between sequenceStarted and sequenceFinished, set on the main thread
+        self._mda_running = False
+        # moving averages of the time between written frames and of the time to
+        # apply the viewer updates of a poll (s)
+        self._frame_period = math.inf
+        self._render_cost = 0.0
+        self._last_poll: tuple[float, int] = (0.0, 0)
+        # number of the last live image shown, to count the ones never shown
+        self._last_live_image: int | None = None
+        # opt-in latency instrumentation, see `enable_latency_monitor`
+        self.latency: LatencyMonitor | None = None
 
         # Add all core connections to this list.  This makes it easy to disconnect
         # from core when this widget is closed.
@@ -80,25 +137,92 @@ class CoreViewerLink(QObject):
         # Clean up temporary files we opened.
         self._mda_handler._cleanup()
 
+    def enable_latency_monitor(
+        self, monitor: LatencyMonitor | None = None
+    ) -> LatencyMonitor:
+        """Start measuring how long frames take to reach the screen.
+
+        Parameters
+        ----------
+        monitor : LatencyMonitor | None
+            The monitor to report to, by default a new one.
+
+        Returns
+        -------
+        LatencyMonitor
+            The monitor, holding rolling percentiles of each latency stage.
+        """
+        self.latency = self._mda_handler.latency = monitor or LatencyMonitor()
+        return self.latency
+
+    def disable_latency_monitor(self) -> None:
+        """Stop measuring frame latencies."""
+        self.latency = self._mda_handler.latency = None
+
     def timerEvent(self, a0: QTimerEvent | None) -> None:
         if a0 is not None and a0.timerId() == self._mda_poll_timer_id:
             self._poll_mda_updates()
         else:
             self._update_viewer()
 
+    # the MDA signals come from the runner thread, but the poll timer is only
+    # touched from the main thread, where it is also adapted
+    @ensure_main_thread  # type: ignore [untyped-decorator]
     def _start_mda_poll(self, *_: object) -> None:
+        self._mda_running = True
         if self._mda_poll_timer_id is None:
-            self._mda_poll_timer_id = self.startTimer(50, Qt.TimerType.PreciseTimer)
+            self._frame_period, self._render_cost = math.inf, 0.0
+            self._mda_poll_ms = 50
+            self._last_poll = (time.perf_counter(), 0)
+            self._mda_poll_timer_id = self.startTimer(
+                self._mda_poll_ms, Qt.TimerType.PreciseTimer
+            )
 
+    @ensure_main_thread  # type: ignore [untyped-decorator]
     def _stop_mda_poll(self, *_: object) -> None:
+        self._mda_running = False
         if self._mda_poll_timer_id is not None:
             self.killTimer(self._mda_poll_timer_id)
             self._mda_poll_timer_id = None
 
     def _poll_mda_updates(self) -> None:
         handler = self._mda_handler
-        while handler._viewer_updates:
-            handler._update_viewer_dims(handler._viewer_updates.popleft())
+        t0 = time.perf_counter()
+        if updates := handler._display.take():
+            # one re-slice for all the layers, at the newest index
+            handler._apply_viewer_updates(updates)
+        handler._refresh_mosaics()
+        now = time.perf_counter()
+        if updates:
+            self._render_cost = 0.8 * self._render_cost + 0.2 * (now - t0)
+            if self.latency is not None:
+                self.latency.frame_displayed(now)
+        self._adapt_mda_poll(now, handler.stats.frames)
+
+    def _adapt_mda_poll(self, now: float, frames: int) -> None:
+        """Restart the poll timer if the frame rate or render cost changed."""
+        last_time, last_frames = self._last_poll
+        if frames > last_frames:
+            period = (now - last_time) / (frames - last_frames)
+            if math.isinf(self._frame_period):
+                self._frame_period = period
+            else:
+                self._frame_period = 0.8 * self._frame_period + 0.2 * period
+            self._last_poll = (now, frames)
+        if not self._mda_running or self._mda_poll_timer_id is None:
+            # the MDA finished during this poll
+            return
+        if math.isinf(self._frame_period):
+            # keep the initial interval until the frame rate is measured
+            return
+        interval = _poll_interval_ms(self._frame_period, self._render_cost)
+        # ignore small changes, restarting the timer is not free either
+        if abs(interval - self._mda_poll_ms) > 0.2 * self._mda_poll_ms:
+            self._mda_poll_ms = interval
+            self.killTimer(self._mda_poll_timer_id)
+            self._mda_poll_timer_id = self.startTimer(
+                interval, Qt.TimerType.PreciseTimer
+            )
 
     def _image_snapped(self) -> None:
         # Two layers gate the preview update during MDA:
@@ -111,9 +235,11 @@ class CoreViewerLink(QObject):
         #   sequenceFinished but a trailing imageSnapped slot is still
         #   pending.
         if not (self._mmc.mda.is_running() or self._mda_handler._mda_running):
-            self._update_viewer(self._mmc.getImage())
+            # timestamped here, in the snapping thread, not in the main thread
+            self._update_viewer(self._mmc.getImage(), time.perf_counter())
 
     def _start_live(self) -> None:
+        self._last_live_image = None
         interval = int(self._mmc.getExposure())
         self._live_timer_id = self.startTimer(interval, Qt.TimerType.PreciseTimer)
 
@@ -128,13 +254,26 @@ class CoreViewerLink(QObject):
             self._mmc.startContinuousSequenceAcquisition()
 
     @ensure_main_thread  # type: ignore [untyped-decorator]
-    def _update_viewer(self, data: np.ndarray | None = None) -> None:
-        """Update viewer with the latest image from the circular buffer."""
+    def _update_viewer(
+        self, data: np.ndarray | None = None, t_received: float | None = None
+    ) -> None:
+        """Update viewer with the latest image from the circular buffer.
+
+        `t_received` is the (perf_counter) time `data` was received, for the
+        latency monitor.
+        """
         if data is None:
             if self._mmc.getRemainingImageCount() == 0:
                 return
             try:
-                data = self._mmc.getLastImage()
+                if self.latency is None:
+                    data = self._mmc.getLastImage()
+                else:
+                    data, md = self._mmc.getLastImageAndMD(fix=False)
+                    if not self._count_live_image(md):
+                        # already shown
+                        return
+                    t_received = _received_time(md)
             except (RuntimeError, IndexError):
                 # circular buffer empty
                 return
@@ -145,6 +284,8 @@ class CoreViewerLink(QObject):
             preview_layer = self.viewer.add_image(data, name="preview")
 
         preview_layer.metadata["mode"] = "preview"
+        if t_received is not None and self.latency is not None:
+            self.latency.record("live", time.perf_counter() - t_received)
 
         if (pix_size := self._mmc.getPixelSizeUm()) != 0:
             preview_layer.scale = (pix_size, pix_size)
@@ -154,3 +295,20 @@ class CoreViewerLink(QObject):
 
         if self._live_timer_id is None:
             self.viewer.reset_view()
+
+    def _count_live_image(self, md: Metadata) -> bool:
+        """Count the live images replaced before being shown, up to the one of `md`.
+
+        Return False if that one was already shown.
+        """
+        if (number := _image_number(md)) is None:
+            return True
+        last, self._last_live_image = self._last_live_image, number
+        if last is None or number < last:
+            # first image of a sequence
+            return True
+        if number == last:
+            return False
+        if self.latency is not None and number > last + 1:
+            self.latency.record_skipped("live", number - last - 1)
+        return True
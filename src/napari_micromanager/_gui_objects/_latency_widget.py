@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+from qtpy.QtCore import QTimer
+from qtpy.QtWidgets import (
+    QHeaderView,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from napari_micromanager._latency import LATENCY_STAGES
+
+if TYPE_CHECKING:
+    from napari_micromanager._latency import LatencyMonitor
+
+PERCENTILES = (50, 90, 99)
+
+
+class LatencyWidget(QWidget):
+    """A Widget to display the rolling latency percentiles of a LatencyMonitor."""
+
+    def __init__(
+        self,
+        monitor: LatencyMonitor,
+        *,
+        interval: int = 500,
+        parent: QWidget | None = None,
+    ) -> None:
+        super().__init__(parent=parent)
+        self.monitor = monitor
+
+        self._table = QTableWidget(len(LATENCY_STAGES), 1 + len(PERCENTILES))
+        self._table.setHorizontalHeaderLabels(
+            ["n"] + [f"p{q} (ms)" for q in PERCENTILES]
+        )
+        self._table.setVerticalHeaderLabels(list(LATENCY_STAGES))
+        if header := self._table.horizontalHeader():
+            header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+
+        reset = QPushButton("Reset")
+        reset.clicked.connect(self._reset)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self._table)
+        layout.addWidget(reset)
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start(interval)
+
+    def refresh(self) -> None:
+        """Show the current percentiles of the monitor."""
+        percentiles = self.monitor.percentiles(PERCENTILES)
+        counts = self.monitor.counts()
+        for row, stage in enumerate(LATENCY_STAGES):
+            values = percentiles[stage]
+            cells = [str(counts[stage])] + [
+                "-" if math.isnan(values[q]) else f"{values[q]:.1f}"
+                for q in PERCENTILES
+            ]
+            for col, text in enumerate(cells):
+                self._table.setItem(row, col, QTableWidgetItem(text))
+
+    def _reset(self) -> None:
+        self.monitor.reset()
+        self.refresh()
@@ -5,16 +5,28 @@ from typing import TYPE_CHECKING, cast
 from pymmcore_widgets.mda import MDAWidget
 from qtpy.QtWidgets import (
     QCheckBox,
+    QComboBox,
+    QHBoxLayout,
+    QLabel,
+    QMessageBox,
+    QSpinBox,
     QVBoxLayout,
     QWidget,
 )
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
     from pymmcore_plus import CMMCorePlus
     from useq import MDASequence
 
+    from napari_micromanager._mda_handler import _NapariMDAHandler
 
-from napari_micromanager._util import NMM_METADATA_KEY
+from napari_micromanager._util import (
+    COMPRESSION_CODECS,
+    COMPRESSION_LEVELS,
+    NMM_METADATA_KEY,
+)
 
 
 class MultiDWidget(MDAWidget):
@@ -25,6 +37,18 @@ class MultiDWidget(MDAWidget):
     ) -> None:
         # add split channel checkbox
         self.checkBox_split_channels = QCheckBox(text="Split channels in viewer")
+        # compression of the zarr arrays backing the viewer layers
+        self.compression_combo = QComboBox()
+        self.compression_combo.addItems(COMPRESSION_CODECS)
+        self.compression_combo.setToolTip(
+            "Codec used to compress the data shown in the viewer.\n"
+            "'lz4' is fastest, 'zstd' and 'blosc' (bit-shuffle) compress more."
+        )
+        self.compression_level = QSpinBox()
+        self.compression_level.setToolTip("Compression level.")
+        # the handler the MDA will be written by, to check that it has the room
+        # and speed for it before starting (see `prepare_mda`)
+        self.mda_handler: _NapariMDAHandler | None = None
         super().__init__(parent=parent, mmcore=mmcore)
 
         # setContentsMargins
@@ -36,12 +60,70 @@ class MultiDWidget(MDAWidget):
         ch_layout.setContentsMargins(10, 10, 10, 10)
         ch_layout.addWidget(self.checkBox_split_channels)
 
+        self.compression_combo.currentTextChanged.connect(self._on_codec_changed)
+        self._on_codec_changed(self.compression_combo.currentText())
+
+        self._storage_wdg = QWidget()
+        storage_layout = QHBoxLayout(self._storage_wdg)
+        storage_layout.setContentsMargins(10, 0, 10, 0)
+        storage_layout.addWidget(QLabel("Viewer compression:"))
+        storage_layout.addWidget(self.compression_combo)
+        storage_layout.addWidget(QLabel("Level:"))
+        storage_layout.addWidget(self.compression_level)
+        storage_layout.addStretch()
+        layout = cast("QVBoxLayout", self.layout())
+        layout.insertWidget(layout.indexOf(self.control_btns), self._storage_wdg)
+
+    def _on_codec_changed(self, codec: str) -> None:
+        """Update the range and default of the level spinbox for `codec`."""
+        default, max_level = COMPRESSION_LEVELS.get(codec, (0, 0))
+        self.compression_level.setRange(0, max_level)
+        self.compression_level.setValue(default)
+        self.compression_level.setEnabled(codec in COMPRESSION_LEVELS)
+
+    def prepare_mda(self) -> bool | str | Path | None:
+        """Prepare the MDA, cancelling it if its data won't fit or keep up."""
+        save_path = super().prepare_mda()
+        if save_path is False or not self._check_storage():
+            return False
+        return save_path
+
+    def _check_storage(self) -> bool:
+        """Return whether to start the MDA given its pre-flight storage estimate.
+
+        Refuses an uncompressed MDA that does not fit on disk, and asks for
+        confirmation if it may not fit or if the disk is slower than the camera.
+        """
+        if self.mda_handler is None:
+            return True
+        estimates = self.mda_handler.preflight(self.value())
+        if not (problems := [p for e in estimates for p in e.problems()]):
+            return True
+        if any(not e.fits and not e.compressed for e in estimates):
+            QMessageBox.critical(self, "Not enough disk space", "\n\n".join(problems))
+            return False
+        answer = QMessageBox.warning(
+            self,
+            "MDA storage",
+            "\n\n".join([*problems, "Start the acquisition anyway?"]),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No,
+        )
+        return bool(answer == QMessageBox.StandardButton.Yes)
+
     def value(self) -> MDASequence:
         """Return the current value of the widget."""
         # Overriding the value method to add the metadata necessary for the handler.
         sequence = super().value()
         split = self.checkBox_split_channels.isChecked() and len(sequence.channels) > 1
-        sequence.metadata[NMM_METADATA_KEY] = {"split_channels": split}
+        codec = self.compression_combo.currentText()
+        sequence.metadata[NMM_METADATA_KEY] = {
+            "split_channels": split,
+            "compression": codec,
+        }
+        if codec in COMPRESSION_LEVELS:
+            level = self.compression_level.value()
+            sequence.metadata[NMM_METADATA_KEY]["compression_level"] = level
         return sequence  # type: ignore[no-any-return]
 
     def setValue(self, value: MDASequence) -> None:
@@ -51,4 +133,9 @@ class MultiDWidget(MDAWidget):
             self.checkBox_split_channels.setChecked(
                 nmm_meta.get("split_channels", False)
             )
+            self.compression_combo.setCurrentText(
+                nmm_meta.get("compression", "default")
+            )
+            if (level := nmm_meta.get("compression_level")) is not None:
+                self.compression_level.setValue(level)
         super().setValue(value)
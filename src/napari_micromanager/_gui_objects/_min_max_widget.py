@@ -6,6 +6,8 @@ from typing import TYPE_CHECKING
 from qtpy.QtGui import QColor
 from qtpy.QtWidgets import QLabel, QScrollArea, QWidget
 
+from napari_micromanager._util import NMM_METADATA_KEY
+
 if TYPE_CHECKING:
     from collections.abc import Iterable
 
@@ -29,9 +31,23 @@ class MinMax(QScrollArea):
         for layer in layers:
             col = col if (col := layer.colormap.name) in QCOLORS else "gray"
             try:
-                minmax = tuple(layer._calc_data_range(mode="slice"))
+                minmax = _plane_stats_range(layer) or tuple(
+                    layer._calc_data_range(mode="slice")
+                )
                 min_max_txt += f' <font color="{col}">{minmax}</font>'
             except Exception:
                 warnings.warn("cannot update minmax. napari api changed?", stacklevel=2)
 
         self._label.setText(min_max_txt)
+
+
+def _plane_stats_range(layer: Image) -> tuple[float, float] | None:
+    """(min, max) of the current slice from the stats recorded during the MDA.
+
+    Returns None if the layer has no stats, or none of the slice planes was written.
+    """
+    stats = layer.metadata.get(NMM_METADATA_KEY, {}).get("plane_stats")
+    if stats is None:
+        return None
+    rng: tuple[float, float] | None = stats.range_at(layer._data_slice.point)
+    return rng
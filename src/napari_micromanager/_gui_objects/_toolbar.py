@@ -215,6 +215,11 @@ class MicroManagerToolbar(QMainWindow):
                 ) from e
             wdg = wdg_cls(parent=self, mmcore=self._mmc)
 
+            if isinstance(wdg, MultiDWidget) and (
+                link := getattr(self, "_core_link", None)
+            ):
+                wdg.mda_handler = link._mda_handler
+
             if isinstance(wdg, PropertyBrowser):
                 wdg.setSizePolicy(
                     QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding
@@ -0,0 +1,136 @@
+"""Opt-in latency instrumentation of frames on their way to the screen."""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+# stages of a frame, each measured in seconds:
+# - "queue": MDA frameReady -> a writer starts writing it
+# - "write": writing it to the layer storage (including pyramid levels)
+# - "display": written -> shown in the viewer
+# - "total": MDA frameReady -> shown in the viewer
+# - "live": live mode (or snap), received by the core -> shown in the preview layer
+LATENCY_STAGES = ("queue", "write", "display", "total", "live")
+
+
+class RollingPercentiles:
+    """The last `window` values of a measure, and their percentiles.
+
+    Parameters
+    ----------
+    window : int
+        Number of values kept (by default 1024).
+    """
+
+    def __init__(self, window: int = 1024) -> None:
+        self._values = np.zeros(window)
+        self._n = 0
+
+    def __len__(self) -> int:
+        return min(self._n, len(self._values))
+
+    def add(self, value: float) -> None:
+        """Add a value, replacing the oldest one once the window is full."""
+        self._values[self._n % len(self._values)] = value
+        self._n += 1
+
+    def percentiles(self, q: Sequence[float]) -> np.ndarray:
+        """Return the `q` percentiles (NaN while empty)."""
+        if not len(self):
+            return np.full(len(q), np.nan)
+        result: np.ndarray = np.percentile(self._values[: len(self)], q)
+        return result
+
+
+class LatencyMonitor:
+    """Rolling percentiles of the time frames spend in each of `LATENCY_STAGES`.
+
+    The handler and the viewer link report to it from their threads when it is
+    enabled (see `CoreViewerLink.enable_latency_monitor`).
+
+    Parameters
+    ----------
+    window : int
+        Number of frames kept for the percentiles of each stage.
+    """
+
+    def __init__(self, window: int = 1024) -> None:
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all the measures."""
+        with self._lock:
+            self._stages = {s: RollingPercentiles(self.window) for s in LATENCY_STAGES}
+            # (frameReady, written) times of the frames written, not shown yet
+            self._written: deque[tuple[float, float]] = deque(maxlen=self.window)
+            self._skipped = dict.fromkeys(LATENCY_STAGES, 0)
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Add the time (s) a frame spent in `stage`."""
+        with self._lock:
+            self._stages[stage].add(seconds)
+
+    def record_skipped(self, stage: str, n_frames: int) -> None:
+        """Count frames that went through `stage` without being measured.
+
+        E.g. live frames replaced in the circular buffer before being shown.
+        """
+        with self._lock:
+            self._skipped[stage] += n_frames
+
+    def frame_written(self, t_ready: float, t_written: float) -> None:
+        """Note the (perf_counter) times a frame was ready and was written."""
+        with self._lock:
+            if len(self._written) == self._written.maxlen:
+                # the oldest is dropped without being measured
+                self._skipped["display"] += 1
+                self._skipped["total"] += 1
+            self._written.append((t_ready, t_written))
+
+    def frame_displayed(self, now: float) -> None:
+        """Record the display latency of the frames written since the last display.
+
+        All of them are in the layers the viewer updates `now`, even if only the
+        newest is at the current dims step.
+        """
+        with self._lock:
+            for t_ready, t_written in self._written:
+                self._stages["display"].add(now - t_written)
+                self._stages["total"].add(now - t_ready)
+            self._written.clear()
+
+    def percentiles(
+        self, q: Sequence[float] = (50, 90, 99)
+    ) -> dict[str, dict[float, float]]:
+        """Return the `q` percentiles of each stage, in milliseconds.
+
+        Examples
+        --------
+        >>> monitor.percentiles()["total"][99]  # 99th percentile, frameReady->screen
+        """
+        with self._lock:
+            return {
+                stage: dict(
+                    zip(q, (values.percentiles(q) * 1000).tolist(), strict=False)
+                )
+                for stage, values in self._stages.items()
+            }
+
+    def counts(self) -> dict[str, int]:
+        """Number of frames (up to `window`) behind the percentiles of each stage."""
+        with self._lock:
+            return {stage: len(values) for stage, values in self._stages.items()}
+
+    def skipped(self) -> dict[str, int]:
+        """Number of frames of each stage left out of the percentiles."""
+        with self._lock:
+            return dict(self._skipped)
@@ -0,0 +1,181 @@
+"""Per-frame metadata and intensity statistics of MDA layers."""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+
+    from useq import MDAEvent
+
+# metadata columns, after one int32 column per layer axis holding the frame index
+FRAME_FIELDS: list[tuple[str, str]] = [
+    ("runner_time_ms", "f8"),
+    ("exposure_ms", "f4"),
+    ("x_um", "f8"),
+    ("y_um", "f8"),
+    ("z_um", "f8"),
+    ("pixel_size_um", "f4"),
+    ("hardware_triggered", "?"),
+    ("write_latency_ms", "f4"),
+]
+
+
+class FrameTable:
+    """Metadata of the frames written to a layer, one structured NumPy row each.
+
+    Rows are appended by the writer threads as frames are written, so they are
+    in write order. Use `data` (or `where`) to query them with vectorized
+    operations, e.g. all frames at position 3 sorted by time::
+
+        table.where(p=3, sort="runner_time_ms")
+
+    Parameters
+    ----------
+    axes : Sequence[str]
+        Labels of the layer axes (without Y and X): each gets an int32 column
+        with the index of the frame along that axis.
+    capacity : int
+        Number of rows to preallocate (the table grows as needed).
+    """
+
+    def __init__(self, axes: Sequence[str], capacity: int = 0) -> None:
+        self.axes = tuple(axes)
+        self.dtype = np.dtype([(ax, "i4") for ax in self.axes] + FRAME_FIELDS)
+        self._rows = np.zeros(max(capacity, 1), dtype=self.dtype)
+        self._n = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def data(self) -> np.ndarray:
+        """The filled rows (a view: do not keep it across appends)."""
+        return self._rows[: self._n]
+
+    def append(
+        self,
+        index: Sequence[int],
+        event: MDAEvent,
+        meta: Mapping[str, Any] | None,
+        latency: float = math.nan,
+    ) -> None:
+        """Add the row of the frame written at `index` of the layer."""
+        meta = meta or {}
+        pos = meta.get("position") or {}
+        row = (
+            *index,
+            meta.get("runner_time_ms", math.nan),
+            meta.get("exposure_ms", event.exposure or math.nan),
+            _or_nan(pos.get("x", event.x_pos)),
+            _or_nan(pos.get("y", event.y_pos)),
+            _or_nan(pos.get("z", event.z_pos)),
+            meta.get("pixel_size_um", math.nan),
+            bool(meta.get("hardware_triggered", False)),
+            latency * 1000,
+        )
+        with self._lock:
+            if self._n == len(self._rows):
+                self._rows = np.resize(self._rows, 2 * len(self._rows))
+            self._rows[self._n] = row
+            self._n += 1
+
+    def where(self, sort: str | None = None, **values: int | float) -> np.ndarray:
+        """Return the rows whose columns equal `values`, optionally sorted by `sort`.
+
+        Examples
+        --------
+        >>> table.where(p=3, sort="runner_time_ms")  # position 3, by time
+        """
+        data = self.data
+        mask = np.ones(len(data), dtype=bool)
+        for column, value in values.items():
+            mask &= data[column] == value
+        rows = data[mask]
+        if sort is not None:
+            rows = rows[np.argsort(rows[sort], kind="stable")]
+        return rows
+
+
+def _or_nan(value: float | None) -> float:
+    return math.nan if value is None else value
+
+
+class PlaneStats:
+    """Min, max and a coarse histogram of each plane of a layer, taken at write time.
+
+    Slices of the layer can then be summarized without reading their data back.
+    Each plane is recorded by a single writer thread, so no locking is needed.
+
+    Parameters
+    ----------
+    shape : Sequence[int]
+        Shape of the layer without the Y, X (and RGB) axes.
+    bit_depth : int
+        Bit depth of the camera: the histogram spans `[0, 2**bit_depth)`.
+    n_bins : int
+        Number of histogram bins, a power of 2 (by default 64).
+    """
+
+    def __init__(self, shape: Sequence[int], bit_depth: int, n_bins: int = 64) -> None:
+        self.shape = tuple(shape)
+        self.n_bins = n_bins
+        self._shift = max(bit_depth - int(math.log2(n_bins)), 0)
+        self.written = np.zeros(self.shape, dtype=bool)
+        self.mins = np.zeros(self.shape, dtype="f8")
+        self.maxs = np.zeros(self.shape, dtype="f8")
+        self.histograms = np.zeros((*self.shape, n_bins), dtype="u4")
+
+    @property
+    def bin_edges(self) -> np.ndarray:
+        """The `n_bins + 1` edges of the histogram bins."""
+        return np.arange(self.n_bins + 1) << self._shift
+
+    def record(self, index: tuple[int, ...], image: np.ndarray) -> None:
+        """Record the statistics of the plane written at `index`."""
+        flat = image.ravel()
+        if flat.dtype.kind in "ui":
+            bins = np.minimum(flat >> self._shift, self.n_bins - 1)
+            counts = np.bincount(bins, minlength=self.n_bins)
+        else:
+            counts, _ = np.histogram(flat, self.n_bins, (0, self.bin_edges[-1]))
+        self.mins[index] = flat.min()
+        self.maxs[index] = flat.max()
+        self.histograms[index] = counts
+        self.written[index] = True
+
+    def _key(self, point: Sequence[float] | None) -> tuple[int | slice, ...]:
+        """Index of the planes at a layer data point (NaN for displayed axes)."""
+        if point is None:
+            return (slice(None),) * len(self.shape)
+        key: list[int | slice] = []
+        for p, n in zip(point[: len(self.shape)], self.shape, strict=False):
+            key.append(slice(None) if math.isnan(p) else min(max(round(p), 0), n - 1))
+        return tuple(key)
+
+    def range_at(
+        self, point: Sequence[float] | None = None
+    ) -> tuple[float, float] | None:
+        """(min, max) of the planes shown at `point`, or None if none was written.
+
+        `point` is a layer data point (e.g. `layer._data_slice.point`), NaN along
+        the displayed axes. By default, the range of all the planes.
+        """
+        key = self._key(point)
+        written = self.written[key]
+        if not written.any():
+            return None
+        lo, hi = self.mins[key][written].min(), self.maxs[key][written].max()
+        return float(lo), float(hi)
+
+    def histogram_at(self, point: Sequence[float] | None = None) -> np.ndarray:
+        """Histogram of the planes shown at `point` (see `range_at`)."""
+        key = self._key(point)
+        counts: np.ndarray = self.histograms[key].reshape(-1, self.n_bins).sum(axis=0)
+        return counts
@@ -1,44 +1,118 @@
 from __future__ import annotations
 
 import contextlib
+import logging
+import math
+import os
 import tempfile
 import threading
 import time
+import warnings
 from collections import deque
-from typing import TYPE_CHECKING, cast
+from dataclasses import dataclass
+from functools import partial
+from itertools import product
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Generic, NamedTuple, TypeVar, cast
+from uuid import UUID
 
 import napari
+import numpy as np
 import zarr
 from superqt.utils import ensure_main_thread
 
+from napari_micromanager._mda_frames import FrameTable, PlaneStats
+from napari_micromanager._mda_mosaic import (
+    MosaicCanvas,
+    _tile_positions,
+    repaint_region,
+)
+from napari_micromanager._mda_storage import (
+    _ZARR_V3,
+    ChannelStorage,
+    GrowableStorage,
+    LayerStorage,
+    MemoryStorage,
+    OMEZarrImagesStorage,
+    OMEZarrStorage,
+    RaggedStorage,
+    RecoveredStorage,
+    TempZarrStorage,
+    _compression_kwargs,
+    _dir_size,
+    _find_journals,
+    _recoverable,
+    _scratch_dirs_from_env,
+    split_channels,
+)
+from napari_micromanager._preflight import StorageEstimate
+from napari_micromanager._reaper import (
+    make_scratch_dir,
+    reap,
+    reap_orphans,
+    scratch_prefix,
+)
 from napari_micromanager._util import (
+    COMPRESSION_CODECS,
     NMM_METADATA_KEY,
     PYMMCW_METADATA_KEY,
+    ensure_unique,
     get_full_sequence_axes,
 )
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
-    from uuid import UUID
+    from collections.abc import Callable, Hashable, Mapping, Sequence
+    from typing import TypeAlias
 
     import napari.viewer
-    import numpy as np
     from napari.layers import Image
     from pymmcore_plus import CMMCorePlus
     from pymmcore_plus.core.events._protocol import PSignalInstance
     from typing_extensions import TypedDict
     from useq import MDAEvent, MDASequence
 
+    from napari_micromanager._latency import LatencyMonitor
+
     class LayerMeta(TypedDict, total=False):
         """Metadata that we add to layer.metadata."""
 
         useq_sequence: MDASequence
         uid: UUID
         ch_id: str
+        camera: str
+        frames: FrameTable
+        plane_stats: PlaneStats
+
+    # an image, or a reference to it once spilled to disk
+    _Frame: TypeAlias = "np.ndarray | _SpilledFrame"
+    # (array id, index in the array, layer name, image, frameReady timestamp, event,
+    #  frame metadata)
+    _WriteItem = tuple[
+        str, tuple[int, ...], str, _Frame, float, MDAEvent, Mapping[str, Any] | None
+    ]
 
 
 DEFAULT_NAME = "Exp"
 
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# what to do with new frames when the frames waiting to be written reach the limit:
+# - "pause": pause the MDA until the writers catch up
+# - "spill": write the raw frames to an append-only file until then
+# - "drop": drop frames that are only shown in the viewer (never persisted ones)
+QUEUE_POLICIES = ("pause", "spill", "drop")
+# bytes of incomplete shards held in memory before they are written early (and
+# shown), when `max_queued_bytes` does not set a lower limit
+MAX_SHARD_BUFFER_BYTES = 2**30
+
+
+# axis along which the frames of a generator without `event.index` are stacked
+UNINDEXED_AXIS = "n"
+# the standard useq axes come first in the layers of generator MDAs
+_GENERATOR_AXIS_ORDER = "tpgcz"
+
 
 def _get_file_name_from_metadata(sequence: MDASequence) -> str:
     """Get the file name from the MDASequence metadata."""
@@ -46,6 +120,373 @@ def _get_file_name_from_metadata(sequence: MDASequence) -> str:
     return cast("str", meta.get("save_name", DEFAULT_NAME))
 
 
+def _get_compression_from_metadata(sequence: MDASequence) -> tuple[str, int | None]:
+    """Get the (codec, level) requested in the MDASequence metadata."""
+    meta = cast("dict", sequence.metadata.get(NMM_METADATA_KEY, {}))
+    codec = str(meta.get("compression", "default")).lower()
+    if codec not in COMPRESSION_CODECS:
+        warnings.warn(
+            f"Unknown compression {codec!r}, using zarr's default. "
+            f"Must be one of {COMPRESSION_CODECS}.",
+            stacklevel=2,
+        )
+        codec = "default"
+    return codec, meta.get("compression_level")
+
+
+@dataclass
+class CodecStats:
+    """Time spent writing compressed chunks and compression achieved, per layer."""
+
+    codec: str
+    path: str = ""
+    frames: int = 0
+    write_time: float = 0.0
+    raw_bytes: int = 0
+
+    @property
+    def stored_bytes(self) -> int:
+        """Bytes currently stored for the layer (walks the store directory)."""
+        return _dir_size(self.path) if self.path else 0
+
+    @property
+    def mean_write_time(self) -> float:
+        """Mean time (s) to encode and store one frame."""
+        return self.write_time / self.frames if self.frames else 0.0
+
+    @property
+    def ratio(self) -> float:
+        """Compression ratio (raw bytes / stored bytes)."""
+        stored = self.stored_bytes
+        return self.raw_bytes / stored if stored else 0.0
+
+
+@dataclass
+class FrameStats:
+    """Queue depth and latency statistics for the frames of one MDA."""
+
+    frames: int = 0
+    max_queue_depth: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    # high-water marks of the frames (and bytes) waiting to be written
+    max_frames_in_flight: int = 0
+    max_bytes_in_flight: int = 0
+    spilled: int = 0
+    dropped: int = 0
+    pauses: int = 0
+
+    @property
+    def mean_latency(self) -> float:
+        """Mean time (s) between `frameReady` and the frame being written."""
+        return self.total_latency / self.frames if self.frames else 0.0
+
+    def record(self, latency: float) -> None:
+        """Record the latency (s) of one processed frame."""
+        self.frames += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+
+class _FrameQueue(Generic[_T]):
+    """Blocking queue of frames waiting to be processed by a worker thread.
+
+    `get` blocks on a condition variable until an item arrives, so the worker
+    wakes up as soon as a frame is queued. Once `close` has been called and the
+    queue is drained, `get` returns `None`: this is the shutdown sentinel that
+    tells the worker to exit.
+
+    Items are returned in the order they were added.
+    """
+
+    def __init__(self) -> None:
+        self._items: deque[_T] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item: _T) -> None:
+        """Add an item and wake up the worker."""
+        with self._cond:
+            self._items.append(item)
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify()
+
+    def get(self) -> _T | None:
+        """Block until an item is available, or return None once closed."""
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self) -> None:
+        """Mark the queue closed: `get` returns None once it is drained."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def clear(self) -> None:
+        """Discard all pending items."""
+        with self._cond:
+            self._items.clear()
+
+
+class _DisplayChannel:
+    """Latest-frame-wins viewer updates, published by the writers.
+
+    Only the most recent update of each layer is kept until the main thread
+    `take`s them, so a slow viewer never holds back (or reorders) the writers.
+    """
+
+    def __init__(self) -> None:
+        self._updates: dict[str, tuple[int, ...] | None] = {}
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self._updates)
+
+    def publish(self, layer_name: str, step: tuple[int, ...] | None) -> None:
+        """Record that a frame of `layer_name` was written (at `step`, if newest)."""
+        with self._lock:
+            if step is not None or layer_name not in self._updates:
+                self._updates[layer_name] = step
+
+    def take(self) -> list[tuple[str, tuple[int, ...] | None]]:
+        """Return and forget the pending updates."""
+        with self._lock:
+            updates, self._updates = self._updates, {}
+        return list(updates.items())
+
+    def clear(self) -> None:
+        """Discard the pending updates."""
+        with self._lock:
+            self._updates.clear()
+
+
+class _FrameBudget:
+    """Frames (and bytes) in flight between `frameReady` and being written.
+
+    Frames held in the buffers of multi-plane chunks (see `add_buffered`) count
+    until their chunk is written.
+
+    Parameters
+    ----------
+    max_frames : int
+        Maximum number of frames in flight, 0 for no limit.
+    max_bytes : int
+        Maximum number of bytes in flight, 0 for no limit. A single frame is
+        always accepted, even if it is larger than this.
+    max_buffered_bytes : int
+        Maximum number of bytes held in chunk buffers (see `buffers_full`), 0
+        for no limit other than half of `max_bytes`.
+    """
+
+    def __init__(
+        self, max_frames: int = 0, max_bytes: int = 0, max_buffered_bytes: int = 0
+    ) -> None:
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.max_buffered_bytes = max_buffered_bytes
+        self.frames = 0
+        self.nbytes = 0
+        # the part of them held in chunk buffers
+        self.buffered_frames = 0
+        self.buffered_bytes = 0
+        # high-water marks
+        self.peak_frames = 0
+        self.peak_bytes = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def _fits(self, nbytes: int) -> bool:
+        if self.max_frames and self.frames >= self.max_frames:
+            return False
+        return (
+            not self.max_bytes
+            or not self.frames
+            or (self.nbytes + nbytes <= self.max_bytes)
+        )
+
+    def acquire(self, nbytes: int, block: bool = False, force: bool = False) -> bool:
+        """Count a new frame in flight, return False if it does not fit.
+
+        With `block`, wait until it fits (or the budget is closed). With `force`,
+        count it even if it does not fit.
+        """
+        with self._cond:
+            if block:
+                while not self._fits(nbytes) and not self._closed:
+                    self._cond.wait()
+            elif not force and not self._fits(nbytes):
+                return False
+            self.frames += 1
+            self.nbytes += nbytes
+            self.peak_frames = max(self.peak_frames, self.frames)
+            self.peak_bytes = max(self.peak_bytes, self.nbytes)
+            return True
+
+    def release(self, nbytes: int) -> None:
+        """Stop counting a frame that has been written (or discarded)."""
+        with self._cond:
+            self.frames -= 1
+            self.nbytes -= nbytes
+            self._cond.notify_all()
+
+    def add_buffered(self, frames: int, nbytes: int) -> None:
+        """Count (or, if negative, stop counting) frames held in chunk buffers.
+
+        `nbytes` is the size of the buffers, allocated for whole chunks.
+        """
+        with self._cond:
+            self.frames += frames
+            self.nbytes += nbytes
+            self.buffered_frames += frames
+            self.buffered_bytes += nbytes
+            self.peak_frames = max(self.peak_frames, self.frames)
+            self.peak_bytes = max(self.peak_bytes, self.nbytes)
+            self._cond.notify_all()
+
+    def buffers_full(self) -> bool:
+        """Whether chunk buffers hold half of the limits (or more).
+
+        They must then be written (even if incomplete): the other half is left
+        to the frames waiting to be written, so that it drains below the low
+        water mark.
+        """
+        return bool(
+            (self.max_frames and 2 * self.buffered_frames >= self.max_frames)
+            or (self.max_bytes and 2 * self.buffered_bytes >= self.max_bytes)
+            or (
+                self.max_buffered_bytes
+                and self.buffered_bytes >= self.max_buffered_bytes
+            )
+        )
+
+    def below_low_water(self) -> bool:
+        """Whether the frames in flight dropped below half of the limits."""
+        return (not self.max_frames or self.frames <= self.max_frames // 2) and (
+            not self.max_bytes or self.nbytes <= self.max_bytes // 2
+        )
+
+    def close(self) -> None:
+        """Wake up (and stop blocking) all threads waiting in `acquire`."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class _SpilledFrame(NamedTuple):
+    """A frame stored in a `_SpillFile`."""
+
+    path: str
+    offset: int
+    shape: tuple[int, ...]
+    dtype: str
+
+    def load(self) -> np.ndarray:
+        """Read the frame back from the spill file."""
+        count = math.prod(self.shape)
+        data = np.fromfile(self.path, self.dtype, count=count, offset=self.offset)
+        return data.reshape(self.shape)
+
+
+class _SpillFile:
+    """Append-only file holding raw frames that did not fit in memory.
+
+    Parameters
+    ----------
+    directory : str | Path | None
+        Directory of the file, by default the system temporary directory.
+    """
+
+    def __init__(self, directory: str | Path | None = None) -> None:
+        fd, self.path = tempfile.mkstemp(
+            prefix=f"{scratch_prefix()}spill-", suffix=".raw", dir=directory
+        )
+        self._file = os.fdopen(fd, "wb")
+
+    def append(self, image: np.ndarray) -> _SpilledFrame:
+        """Write `image` at the end of the file and return where it is."""
+        offset = self._file.tell()
+        self._file.write(np.ascontiguousarray(image).tobytes())
+        self._file.flush()
+        return _SpilledFrame(self.path, offset, image.shape, image.dtype.str)
+
+    def close(self) -> None:
+        """Close the file, and delete it in the background."""
+        self._file.close()
+        reap(self.path)
+
+
+class _WriterPool(Generic[_T]):
+    """A fixed set of writer threads, each draining its own FIFO `_FrameQueue`.
+
+    Items are assigned to a writer by hashing a shard key, so every item that
+    shares a key (e.g. writes to the same zarr chunk) is handled by the same
+    thread, in the order it was submitted.
+
+    The writers can be split into groups (e.g. one per camera) that never
+    share a thread, so that a slow group does not hold back the others.
+
+    Parameters
+    ----------
+    n_writers : int
+        The number of writer threads (at least one per group).
+    write : Callable[[_T], None]
+        Called in a writer thread for each submitted item.
+    n_groups : int
+        The number of groups of writers (by default 1).
+    """
+
+    def __init__(
+        self, n_writers: int, write: Callable[[_T], None], n_groups: int = 1
+    ) -> None:
+        self._write = write
+        per_group = max(n_writers // n_groups, 1)
+        self._groups: list[list[_FrameQueue[_T]]] = [
+            [_FrameQueue() for _ in range(per_group)] for _ in range(n_groups)
+        ]
+        self._queues = [q for group in self._groups for q in group]
+        self._threads = [
+            threading.Thread(target=self._run, args=(q,), daemon=True)
+            for q in self._queues
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._queues)
+
+    def submit(self, key: Hashable, item: _T, group: int = 0) -> None:
+        """Queue `item` on the writer of `group` that owns `key`."""
+        queues = self._groups[group]
+        queues[hash(key) % len(queues)].put(item)
+
+    def clear(self) -> None:
+        """Discard all items that have not been written yet."""
+        for q in self._queues:
+            q.clear()
+
+    def join(self) -> None:
+        """Wait for all queued items to be written and stop the threads."""
+        for q in self._queues:
+            q.close()
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self, queue: _FrameQueue[_T]) -> None:
+        while (item := queue.get()) is not None:
+            try:
+                self._write(item)
+            except Exception:
+                logger.exception("Failed to write MDA frame")
+
+
 class _NapariMDAHandler:
     """Object mediating events between an in-progress MDA and the napari viewer.
 
@@ -57,18 +498,136 @@ class _NapariMDAHandler:
         The Micro-Manager core instance.
     viewer : napari.viewer.Viewer
         The napari viewer instance.
+    n_writers : int | None
+        Number of threads writing frames to zarr. By default, one per CPU (max 4).
+    ome_zarr_dir : str | Path | None
+        If given, each MDA is written directly to a new OME-Zarr hierarchy in this
+        directory (kept after the viewer closes) instead of temporary directories:
+        a group per layer, holding an OME-NGFF image (T, C, Z, Y, X) per stage
+        position and grid tile (see `OMEZarrImagesStorage`).
+    memory_budget : int
+        MDAs whose layers need at most this many bytes in total are kept in
+        preallocated in-memory arrays instead of zarr. By default 0 (never).
+    max_queued_frames : int
+        Maximum number of frames waiting to be written before `queue_policy`
+        applies. By default 0 (no limit).
+    max_queued_bytes : int
+        Maximum number of bytes waiting to be written before `queue_policy`
+        applies. By default 0 (no limit).
+    queue_policy : str
+        What to do with new frames when a limit is reached, one of
+        `QUEUE_POLICIES`: "pause" (default) pauses the MDA until the writers catch
+        up, "spill" writes the frames to an append-only file until then, and "drop"
+        drops frames that are only displayed (frames written to `ome_zarr_dir`
+        wait for room instead).
+    pyramid_levels : int
+        Number of downsampled (2x, 4x, 8x...) levels written along with each frame,
+        shown as a multiscale layer, so that zoomed-out browsing of large frames
+        only reads small levels. By default 0 (full resolution only).
+    mosaic_downsample : int
+        If not 0, multi-position MDAs also get a mosaic layer (one per channel) in
+        which each frame is placed at its stage position as it arrives,
+        downsampled by this factor. By default 0 (no mosaic).
+    scratch_dirs : Sequence[str | Path] | None
+        Directories of the temporary layer arrays (and spill files), e.g. on a
+        tmpfs or NVMe volume. With several, the layers are striped across them so
+        that they are written to different disks in parallel. By default, those
+        listed in the `NAPARI_MICROMANAGER_SCRATCH` environment variable
+        (separated by `os.pathsep`), else the system temporary directory.
+    chunk_depth : Mapping[str, int] | None
+        Number of planes per chunk along some axes, e.g. `{"z": 16}` to store
+        z-stacks in chunks of 16 planes: fewer, larger files that compress
+        better. The planes of a chunk are kept in memory until it is complete
+        (or the MDA ends), then written at once. They count against
+        `max_queued_frames` and `max_queued_bytes`: once they take half of
+        those, the incomplete chunks are written early. By default, one plane
+        per chunk.
+    shard_depth : Mapping[str, int] | None
+        Number of planes per shard along some axes (zarr v3 only), e.g.
+        `{"t": 10, "z": 50}`: the chunks of a shard share one file, so that long
+        acquisitions do not produce millions of files, while single frames are
+        still read on their own. Like chunks, shards are kept in memory (and not
+        displayed) until they are complete, within the limits of chunks (see
+        `chunk_depth`) and at most `MAX_SHARD_BUFFER_BYTES`: incomplete shards
+        are then written early, and the rest of their frames one by one,
+        each rewriting its shard file, which costs disk bandwidth. Pick shards
+        that fill in seconds or minutes (e.g. along Z or P), rather than along
+        T for long intervals. By default, no sharding.
     """
 
-    def __init__(self, mmcore: CMMCorePlus, viewer: napari.viewer.Viewer) -> None:
+    def __init__(
+        self,
+        mmcore: CMMCorePlus,
+        viewer: napari.viewer.Viewer,
+        n_writers: int | None = None,
+        ome_zarr_dir: str | Path | None = None,
+        memory_budget: int = 0,
+        max_queued_frames: int = 0,
+        max_queued_bytes: int = 0,
+        queue_policy: str = "pause",
+        pyramid_levels: int = 0,
+        mosaic_downsample: int = 0,
+        scratch_dirs: Sequence[str | Path] | None = None,
+        chunk_depth: Mapping[str, int] | None = None,
+        shard_depth: Mapping[str, int] | None = None,
+    ) -> None:
         self._mmc = mmcore
         self.viewer = viewer
         self._mda_running: bool = False
-
-        # mapping of id -> (zarr.Array, temporary directory) for each layer created
-        self._tmp_arrays: dict[str, tuple[zarr.Array, tempfile.TemporaryDirectory]] = {}
-        self._deck: deque[tuple[np.ndarray, MDAEvent]] = deque()
-        # processed frame results for the main-thread timer to pick up
-        self._viewer_updates: deque[tuple[str | None, tuple[int, ...] | None]] = deque()
+        self.n_writers = n_writers or min(4, os.cpu_count() or 1)
+        self.ome_zarr_dir = ome_zarr_dir
+        self.memory_budget = memory_budget
+        self.max_queued_frames = max_queued_frames
+        self.max_queued_bytes = max_queued_bytes
+        self.queue_policy = queue_policy
+        self.pyramid_levels = pyramid_levels
+        self.mosaic_downsample = mosaic_downsample
+        self.scratch_dirs = (
+            _scratch_dirs_from_env() if scratch_dirs is None else scratch_dirs
+        )
+        # number of arrays created, to stripe the next one across scratch_dirs
+        self._n_arrays = 0
+        self.chunk_depth = chunk_depth or {}
+        self.shard_depth = shard_depth or {}
+        # opt-in latency instrumentation (see CoreViewerLink.enable_latency_monitor)
+        self.latency: LatencyMonitor | None = None
+
+        # mapping of id -> storage (array and its resources) for each layer created
+        self._tmp_arrays: dict[str, LayerStorage] = {}
+        self._deck: _FrameQueue[
+            tuple[_Frame, MDAEvent, Mapping[str, Any] | None, float]
+        ] = _FrameQueue()
+        # thread routing frames from _deck to the writers
+        self._worker: threading.Thread | None = None
+        self._writers: _WriterPool[_WriteItem] | None = None
+        # guards stats and _largest_idx, which are updated by all writers
+        self._lock = threading.Lock()
+        # frames between frameReady and being written, and where to spill them
+        self._budget = _FrameBudget()
+        self._spill: _SpillFile | None = None
+        self._paused_by_budget = False
+        self._persistent = False
+        # queue depth / latency of the most recent MDA
+        self.stats = FrameStats()
+        # encoding time and compression ratio of each layer of the most recent MDA
+        self.codec_stats: dict[str, CodecStats] = {}
+        # event -> (id, index, layer name) tables of the running sequence, by uid
+        self._lookups: dict[UUID, _SequenceLookup] = {}
+        # latest written frame of each layer, for the main-thread timer to pick up
+        self._display = _DisplayChannel()
+        # id -> metadata of the frames written to each layer of the current MDA
+        self._frame_tables: dict[str, FrameTable] = {}
+        # id -> min/max/histogram of the planes written to each layer
+        self._plane_stats: dict[str, PlaneStats] = {}
+        # (camera, channel config) -> (mosaic canvas, layer name), with "" for
+        # a single camera / no channels
+        self._mosaics: dict[tuple[str, str], tuple[MosaicCanvas, str]] = {}
+        # physical cameras of a Multi Camera device (empty for a single camera),
+        # and the group of writers of each of their arrays, by id
+        self._cameras: list[str] = []
+        self._write_groups: dict[str, int] = {}
+        # layers of the running GeneratorMDASequence, created as frames arrive
+        self._growing: _GrowingLookup | None = None
 
         # Add all core connections to this list.  This makes it easy to disconnect
         # from core when this widget is closed.
@@ -80,31 +639,221 @@ class _NapariMDAHandler:
         for signal, slot in self._connections:
             signal.connect(slot)
 
+    @property
+    def n_writers(self) -> int:
+        """Number of threads writing frames to zarr (applies from the next MDA)."""
+        return self._n_writers
+
+    @n_writers.setter
+    def n_writers(self, value: int) -> None:
+        if value < 1:
+            raise ValueError("n_writers must be at least 1.")
+        self._n_writers = int(value)
+
+    @property
+    def queue_policy(self) -> str:
+        """What to do with new frames when too many are waiting to be written."""
+        return self._queue_policy
+
+    @queue_policy.setter
+    def queue_policy(self, value: str) -> None:
+        if value not in QUEUE_POLICIES:
+            raise ValueError(f"queue_policy must be one of {QUEUE_POLICIES}.")
+        self._queue_policy = value
+
+    @property
+    def chunk_depth(self) -> dict[str, int]:
+        """Planes per chunk along some axes, e.g. "z" (applies from the next MDA)."""
+        return dict(self._chunk_depth)
+
+    @chunk_depth.setter
+    def chunk_depth(self, value: Mapping[str, int]) -> None:
+        if any(depth < 1 for depth in value.values()):
+            raise ValueError("chunk_depth values must be at least 1.")
+        self._chunk_depth = {axis: int(depth) for axis, depth in value.items()}
+
+    @property
+    def shard_depth(self) -> dict[str, int]:
+        """Planes per shard along some axes, e.g. "t" (applies from the next MDA)."""
+        return dict(self._shard_depth)
+
+    @shard_depth.setter
+    def shard_depth(self, value: Mapping[str, int]) -> None:
+        if any(depth < 1 for depth in value.values()):
+            raise ValueError("shard_depth values must be at least 1.")
+        if value and not _ZARR_V3:
+            warnings.warn(
+                "Sharding requires zarr v3, storing one file per chunk.", stacklevel=2
+            )
+        self._shard_depth = {axis: int(depth) for axis, depth in value.items()}
+
+    @property
+    def scratch_dirs(self) -> list[Path]:
+        """Directories the temporary layer arrays are striped across."""
+        return list(self._scratch_dirs)
+
+    @scratch_dirs.setter
+    def scratch_dirs(self, value: Sequence[str | Path]) -> None:
+        dirs = [Path(d) for d in value]
+        for d in dirs:
+            if not d.is_dir():
+                raise ValueError(f"Scratch directory {str(d)!r} does not exist.")
+        self._scratch_dirs = dirs
+
+    def _scratch_dir(self, index: int) -> str:
+        """Directory of the temporary array of the `index`-th layer of an MDA."""
+        if not self._scratch_dirs:
+            return tempfile.gettempdir()
+        return str(self._scratch_dirs[index % len(self._scratch_dirs)])
+
     def _cleanup(self) -> None:
-        self._mda_running = False  # stops the worker thread loop
+        self._mda_running = False
         for signal, slot in self._connections:
             with contextlib.suppress(Exception):
                 signal.disconnect(slot)
+        # drop pending frames and stop the workers before closing their stores
+        self._deck.clear()
+        if self._writers is not None:
+            self._writers.clear()
+        self._budget.close()
+        self._stop_worker()
+        for storage in self._tmp_arrays.values():
+            storage.flush()
         # Clean up temporary files we opened.
-        for z, v in self._tmp_arrays.values():
-            z.store.close()
-            with contextlib.suppress(NotADirectoryError):
-                v.cleanup()
+        for storage in self._tmp_arrays.values():
+            storage.close()
         self._tmp_arrays.clear()
         self._deck.clear()
-        self._viewer_updates.clear()
+        self._display.clear()
+        self._lookups.clear()
+        self._mosaics.clear()
+        self._frame_tables.clear()
+        self._plane_stats.clear()
+        self._write_groups.clear()
+        self._growing = None
+
+    def _frame_shape(self) -> list[int]:
+        """(Y, X) or (Y, X, RGB) shape of the camera frames."""
+        yx_shape = [self._mmc.getImageHeight(), self._mmc.getImageWidth()]
+        if self._mmc.getNumberOfComponents() >= 3:
+            yx_shape = [*yx_shape, 3]
+        return yx_shape
+
+    def _camera_names(self) -> list[str]:
+        """Physical cameras of a Multi Camera device, or [] for a single camera.
+
+        The Multi Camera device requires its cameras to have the same frame
+        shape, so `_frame_shape` applies to each of them.
+        """
+        n_cameras = self._mmc.getNumberOfCameraChannels()
+        if n_cameras < 2:
+            return []
+        return [self._mmc.getPhysicalCameraDevice(i) for i in range(n_cameras)]
+
+    def _storage_size(self, n_frames: int, yx_shape: list[int]) -> tuple[int, int]:
+        """Return the number of pyramid levels and the bytes taken by `n_frames`."""
+        bytes_per_frame = math.prod(yx_shape) * self._mmc.getBytesPerPixel()
+        # stop downsampling before the frames shrink below one pixel
+        n_levels = 1 + max(
+            0, min(self.pyramid_levels, min(yx_shape[:2]).bit_length() - 1)
+        )
+        # each level takes a quarter of the bytes of the previous one
+        n_bytes = n_frames * bytes_per_frame * sum(4**-k for k in range(n_levels))
+        return n_levels, int(n_bytes)
+
+    def preflight(self, sequence: MDASequence) -> list[StorageEstimate]:
+        """Estimate whether the storage of `sequence` has room and speed enough.
+
+        The size of the layers is computed as in `_on_mda_started`, and compared
+        to the free space and write bandwidth (probed in the background, see
+        `StorageEstimate.measure`) of the directory they
+        would be written to. Returns one estimate per directory (with the
+        layers striped to it), or a single one without directory if the layers
+        are kept in memory.
+        """
+        axis_labels, layers_to_create = _determine_sequence_layers(sequence)
+        pos_shapes = _position_shapes(sequence, axis_labels[:-2])
+        yx_shape = self._frame_shape()
+        # each camera of a Multi Camera device gets layers of its own
+        n_cameras = len(self._camera_names()) or 1
+        n_frames = _count_frames(layers_to_create, pos_shapes) * n_cameras
+        duration = sequence.estimate_duration().total_duration
+        if not duration:
+            # no exposure in the sequence: frames are taken at the core exposure
+            duration = n_frames * self._mmc.getExposure() / 1000
+        codec, _ = _get_compression_from_metadata(sequence)
+        compressed = codec != "none"
+
+        _, n_bytes = self._storage_size(n_frames, yx_shape)
+        if self.ome_zarr_dir is None and n_bytes <= self.memory_budget:
+            return [StorageEstimate(n_frames, n_bytes, duration, None)]
+
+        # directory -> (frames, bytes) of the layers written to it
+        shares: dict[str, tuple[int, int]] = {}
+        split = any("ch_id" in kwargs for *_, kwargs in layers_to_create)
+        # the layers of split channels share a single array
+        n_camera_arrays = 1 if split else len(layers_to_create)
+        for cam in range(n_cameras):
+            for i, layer in enumerate(layers_to_create):
+                n_array = self._n_arrays + cam * n_camera_arrays + (0 if split else i)
+                directory = str(self.ome_zarr_dir or self._scratch_dir(n_array))
+                frames = _count_frames([layer], pos_shapes)
+                total_frames, total_bytes = shares.get(directory, (0, 0))
+                shares[directory] = (
+                    total_frames + frames,
+                    total_bytes + self._storage_size(frames, yx_shape)[1],
+                )
+        return [
+            StorageEstimate.measure(frames, size, duration, directory, compressed)
+            for directory, (frames, size) in shares.items()
+        ]
 
     @ensure_main_thread  # type: ignore [untyped-decorator]
     def _on_mda_started(self, sequence: MDASequence) -> None:
         """Create temp folder and block gui when mda starts."""
         from pymmcore_plus.mda._runner import GeneratorMDASequence
 
-        # Generator sequences have unknown shape — we can't pre-create layers.
-        # Just mark the MDA as running so _image_snapped skips preview updates.
+        yx_shape = self._frame_shape()
+
+        codec, level = _get_compression_from_metadata(sequence)
+        zarr_kwargs = _compression_kwargs(codec, level)
+        self.codec_stats = {}
+        self._frame_tables = {}
+        self._plane_stats = {}
+        self._mosaics = {}
+        self._write_groups = {}
+        # get filename from MDASequence metadata
+        fname = _get_file_name_from_metadata(sequence)
+
+        root: Path | None = None
+        if self.ome_zarr_dir is not None:
+            # a new OME-Zarr hierarchy with one image group per layer
+            root = ensure_unique(Path(self.ome_zarr_dir, f"{fname}.zarr"), ".zarr")
+            zarr.open_group(str(root), mode="w-")
+
+        # Generator sequences have unknown shape: their layers are created, and
+        # grown, as frames arrive along new axes / beyond the end of the arrays
         if isinstance(sequence, GeneratorMDASequence):
-            self._mda_running = True
-            self._deck = deque()
+            self._growing = _GrowingLookup(
+                sequence,
+                partial(
+                    self._create_growable_storage,
+                    sequence,
+                    fname,
+                    root,
+                    yx_shape,
+                    zarr_kwargs,
+                    codec,
+                ),
+            )
+            self._lookups = {}
+            # (the frames of a Multi Camera device have a "cam" index, so their
+            # cameras are stacked along a "cam" axis of the layers)
+            self._cameras = []
+            self._start_frame_workers(persistent=root is not None)
             return
+        self._growing = None
+        self._cameras = self._camera_names()
 
         # pause acquisition until zarr layer(s) are added
         self._mmc.mda.set_paused(True)
@@ -113,38 +862,155 @@ class _NapariMDAHandler:
         # (based on the sequence mode, and whether we're splitting C/P, etc.)
         axis_labels, layers_to_create = _determine_sequence_layers(sequence)
 
-        yx_shape = [self._mmc.getImageHeight(), self._mmc.getImageWidth()]
-        if self._mmc.getNumberOfComponents() >= 3:
-            yx_shape = [*yx_shape, 3]
-
-        # now create a zarr array in a temporary directory for each layer
-        for id_, shape, kwargs in layers_to_create:
-            tmp = tempfile.TemporaryDirectory()
-            dtype = f"u{self._mmc.getBytesPerPixel()}"
-            # create the zarr array and add it to the viewer
-            z = zarr.open(
-                str(tmp.name),
-                shape=shape + yx_shape,
-                dtype=dtype,
-                chunks=tuple([1] * len(shape) + yx_shape),  # VERY IMPORTANT FOR SPEED!
+        dtype = f"u{self._mmc.getBytesPerPixel()}"
+        # positions whose sub-sequences differ in size get arrays of their own shape
+        pos_shapes = _position_shapes(sequence, axis_labels[:-2])
+        n_frames = _count_frames(layers_to_create, pos_shapes) * (
+            len(self._cameras) or 1
+        )
+        n_levels, n_bytes = self._storage_size(n_frames, yx_shape)
+        in_memory = root is None and n_bytes <= self.memory_budget
+
+        def new_chunks(axes: list[str]) -> list[int]:
+            # VERY IMPORTANT FOR SPEED! (whole frames, and few planes per chunk)
+            return [self._chunk_depth.get(ax, 1) for ax in axes] + yx_shape
+
+        def new_shards(axes: list[str]) -> list[int] | None:
+            # shards of whole chunks (see _open_levels), in one file each
+            if not (self._shard_depth and _ZARR_V3):
+                return None
+            depths = [self._shard_depth.get(ax, 1) for ax in axes] + yx_shape
+            return [max(d, c) for d, c in zip(depths, new_chunks(axes), strict=True)]
+
+        def new_storage(
+            shape: list[int], axes: list[str], directory: str | None = None
+        ) -> LayerStorage:
+            chunks, shards = new_chunks(axes), new_shards(axes)
+            frame_ndim = len(yx_shape)
+            if in_memory:
+                return MemoryStorage(shape, dtype, chunks, n_levels)
+            return TempZarrStorage(
+                shape,
+                dtype,
+                chunks,
+                zarr_kwargs,
+                n_levels,
+                directory,
+                frame_ndim,
+                shards,
             )
-            # get filename from MDASequence metadata
-            fname = _get_file_name_from_metadata(sequence)
-            self._create_empty_image_layer(z, f"{fname}_{id_}", sequence, kwargs)
 
-            # store the zarr array and temporary directory for later cleanup
-            self._tmp_arrays[id_] = (z, tmp)
+        def layer_storage(id_: str, shape: list[int], axes: list[str]) -> LayerStorage:
+            # arrays are striped across the scratch directories
+            scratch = self._scratch_dir(self._n_arrays)
+            self._n_arrays += 1
+            full_shape = shape + yx_shape
+            part_shapes = _position_shapes(sequence, axes)
+            if root is not None:
+                # OME-NGFF images, one per position (and grid tile...)
+                return OMEZarrImagesStorage(
+                    root / id_,
+                    axes,
+                    full_shape,
+                    dtype,
+                    new_chunks(axes),
+                    zarr_kwargs,
+                    n_levels,
+                    new_shards(axes),
+                    part_shapes,
+                )
+            if part_shapes is None:
+                return new_storage(full_shape, axes, scratch)
+            # one temporary array per position
+            tmp = None if in_memory else make_scratch_dir(scratch)
+            p_axis = axes.index("p")
+            part_axes = axes[:p_axis] + axes[p_axis + 1 :]
+            parts = [
+                new_storage(pos_shape + yx_shape, part_axes, tmp)
+                for pos_shape in part_shapes
+            ]
+            path = str(tmp or "")
+            # frames of a chunk (or shard) of a position go to the same writer
+            chunks = new_shards(axes) or new_chunks(axes)
+            return RaggedStorage(parts, p_axis, full_shape, chunks, path, tmp)
+
+        unit = "micrometer" if self._mmc.getPixelSizeUm() else None
+        # each camera of a Multi Camera device gets its own arrays and layers,
+        # with ids prefixed by its name, and its own writers
+        for k, camera in enumerate(self._cameras or [""]):
+            cam = f"{camera}_" if camera else ""
+            # in split channels mode, the layer of each channel is a view of a single
+            # array with a channel axis: splitting does not multiply files and stores
+            channels: list[ChannelStorage] | None = None
+            if any("ch_id" in kwargs for *_, kwargs in layers_to_create):
+                c_axes = list(get_full_sequence_axes(sequence))
+                c_axis = c_axes.index("c")
+                shape = layers_to_create[0][1]
+                c_shape = [*shape[:c_axis], len(layers_to_create), *shape[c_axis:]]
+                shared = layer_storage(f"{cam}{sequence.uid}", c_shape, c_axes)
+                channels = split_channels(shared, c_axis, len(layers_to_create))
+                shared_stats = CodecStats("memory" if in_memory else codec, shared.path)
+
+            # now create the storage (e.g. a zarr array in a temporary directory) for
+            # each layer
+            for i, (layer_id, shape, layer_kwargs) in enumerate(layers_to_create):
+                id_, kwargs = f"{cam}{layer_id}", layer_kwargs.copy()
+                if camera:
+                    kwargs["camera"] = camera
+                self._write_groups[id_] = k
+                storage: LayerStorage
+                if channels is not None:
+                    storage = channels[i]
+                    self.codec_stats[id_] = shared_stats
+                else:
+                    storage = layer_storage(id_, shape, axis_labels[:-2])
+                    self.codec_stats[id_] = CodecStats(
+                        "memory" if in_memory else codec, storage.path
+                    )
+                n_layer_frames = _count_frames([(id_, shape, kwargs)], pos_shapes)
+                table = FrameTable(axis_labels[:-2], capacity=n_layer_frames)
+                self._frame_tables[id_] = kwargs["frames"] = table
+                stats = PlaneStats(shape, self._mmc.getImageBitDepth())
+                self._plane_stats[id_] = kwargs["plane_stats"] = stats
+
+                # add the array to the viewer
+                name = f"{fname}_{id_}"
+                data = storage.levels if n_levels > 1 else storage.array
+                layer = self._create_empty_image_layer(data, name, sequence, kwargs)
+                axes, scale = list(axis_labels), list(layer.scale)
+                if layer.rgb:
+                    axes, scale = [*axes, "rgb"], [*scale, 1.0]
+                if channels is None:
+                    self._describe_storage(
+                        storage, sequence, name, id_, axes, scale, unit, shape, kwargs
+                    )
+                elif i == 0:
+                    # the shared array, with the channel axis
+                    self._describe_storage(
+                        shared,
+                        sequence,
+                        f"{fname}_{cam}{sequence.uid}",
+                        f"{cam}{sequence.uid}",
+                        [*axes[:c_axis], "c", *axes[c_axis:]],
+                        [*scale[:c_axis], 1.0, *scale[c_axis:]],
+                        unit,
+                        c_shape,
+                        {},
+                    )
+
+                # store the storage for later cleanup
+                self._tmp_arrays[id_] = storage
+                storage.track_buffered(self._on_buffered)
+
+        if self.mosaic_downsample:
+            self._create_mosaic_layers(sequence, fname, yx_shape, dtype)
 
         # set axis_labels after adding the images to ensure that the dims exist
         self.viewer.dims.axis_labels = axis_labels
 
-        # init index will always be less than any event index
-        self._largest_idx: tuple[int, ...] = (-1,)
-
-        self._deck = deque()
-        self._viewer_updates = deque()
-        self._mda_running = True
-        threading.Thread(target=self._frame_worker, daemon=True).start()
+        # route frames of this sequence without re-inspecting it for each frame
+        self._lookups = {sequence.uid: _SequenceLookup(sequence, self._cameras)}
+        self._start_frame_workers(persistent=root is not None)
 
         # Set the viewer slider on the first layer frame
         self._reset_viewer_dims()
@@ -152,23 +1018,241 @@ class _NapariMDAHandler:
         # resume acquisition after zarr layer(s) is(are) added
         self._mmc.mda.set_paused(False)
 
+    def _describe_storage(
+        self,
+        storage: LayerStorage,
+        sequence: MDASequence,
+        name: str,
+        id_: str,
+        axes: list[str],
+        scale: list[float],
+        unit: str | None,
+        shape: list[int],
+        layer_meta: LayerMeta,
+    ) -> None:
+        """Store the layer metadata with `storage`, and start its crash journal."""
+        storage.write_metadata(name, axes, scale, unit)
+        # journal the frames of temporary arrays, to recover them after a crash
+        storage.start_journal(
+            {
+                "name": name,
+                "id": id_,
+                "sequence": sequence.model_dump_json(),
+                "uid": str(sequence.uid),
+                "ch_id": layer_meta.get("ch_id", ""),
+                "axes": axes,
+                "scale": scale,
+                "unit": unit,
+                "shape": shape,
+            }
+        )
+
+    def _start_frame_workers(self, persistent: bool) -> None:
+        """Reset the frame queues and statistics, and start the writer threads."""
+        # init index will always be less than any event index
+        self._largest_idx: tuple[int, ...] = (-1,)
+        self._deck = _FrameQueue()
+        self._display = _DisplayChannel()
+        self.stats = FrameStats()
+        # whole shards are buffered: bound them even without a queue limit
+        sharded = bool(self._shard_depth and _ZARR_V3)
+        self._budget = _FrameBudget(
+            self.max_queued_frames,
+            self.max_queued_bytes,
+            MAX_SHARD_BUFFER_BYTES if sharded else 0,
+        )
+        self._paused_by_budget = False
+        self._persistent = persistent
+        self._mda_running = True
+        self._writers = _WriterPool(
+            self.n_writers, self._process_frame, len(self._cameras) or 1
+        )
+        self._worker = threading.Thread(target=self._frame_worker, daemon=True)
+        self._worker.start()
+
+    def _create_growable_storage(
+        self,
+        sequence: MDASequence,
+        fname: str,
+        root: Path | None,
+        yx_shape: list[int],
+        zarr_kwargs: dict[str, Any],
+        codec: str,
+        axes: tuple[str, ...],
+    ) -> tuple[str, str]:
+        """Frame worker: create the storage of a generator MDA layer with `axes`.
+
+        Returns the id and name of the layer, which is added to the viewer by
+        `_sync_growing_layer` when its first frame is shown.
+        """
+        id_ = "_".join([*axes, str(sequence.uid)])
+        n = len(axes)
+        shape, chunks = [1] * n + yx_shape, [1] * n + yx_shape
+        dtype = f"u{self._mmc.getBytesPerPixel()}"
+        n_levels = self._storage_size(1, yx_shape)[0]
+        inner: LayerStorage
+        if root is not None:
+            inner = OMEZarrStorage(
+                root / id_, shape, dtype, chunks, zarr_kwargs, n_levels
+            )
+        else:
+            scratch = self._scratch_dir(self._n_arrays)
+            self._n_arrays += 1
+            inner = TempZarrStorage(
+                shape, dtype, chunks, zarr_kwargs, n_levels, scratch
+            )
+        storage = GrowableStorage(inner, n)
+
+        name = f"{fname}_{id_}"
+        axis_labels = [*axes, "y", "x", "rgb"][: len(shape)]
+        pix_size = self._mmc.getPixelSizeUm()
+        scale = [1.0] * n + [pix_size or 1.0] * 2 + [1.0] * (len(yx_shape) - 2)
+        unit = "micrometer" if pix_size else None
+        self._describe_storage(
+            storage, sequence, name, id_, axis_labels, scale, unit, [1] * n, {}
+        )
+        self.codec_stats[id_] = CodecStats(codec, storage.path)
+        self._frame_tables[id_] = FrameTable(axes)
+        self._tmp_arrays[id_] = storage
+        storage.track_buffered(self._on_buffered)
+        return id_, name
+
+    @ensure_main_thread  # type: ignore [untyped-decorator]
+    def _sync_growing_layers(self) -> None:
+        """Add or resize the layers of the generator MDA, e.g. once trimmed."""
+        if self._growing is not None:
+            for layer_name in list(self._growing.layers):
+                self._sync_growing_layer(layer_name)
+                self.viewer.layers[layer_name].visible = True
+
+    def _sync_growing_layer(self, layer_name: str) -> None:
+        """Add the layer of a generator MDA, or show the frames it grew by."""
+        growing = cast("_GrowingLookup", self._growing)
+        id_, axes = growing.layers[layer_name]
+        storage = self._tmp_arrays[id_]
+        shape = storage.array.shape
+        data = storage.levels if len(storage.levels) > 1 else storage.array
+        if layer_name not in self.viewer.layers:
+            layer_meta: LayerMeta = {"frames": self._frame_tables[id_]}
+            layer = self._create_empty_image_layer(
+                data, layer_name, growing.sequence, layer_meta
+            )
+            if self.viewer.dims.ndim == layer.ndim:
+                self.viewer.dims.axis_labels = [*axes, "y", "x"]
+        elif growing.shown.get(layer_name) != shape:
+            # same arrays, but their shape changed
+            self.viewer.layers[layer_name].data = data
+        growing.shown[layer_name] = shape
+
     def _frame_worker(self) -> None:
-        """Background thread: process frames from _deck into zarr."""
-        while self._mda_running:
-            if self._deck:
-                result = self._process_frame(*self._deck.pop())
-                if result != (None, None):
-                    self._viewer_updates.append(result)
-            else:
-                time.sleep(0.1)
+        """Background thread: route frames from _deck to the zarr writers.
+
+        Frames are routed in the order they were acquired, so the oldest frames
+        are written (and freed) first.
+        """
+        deck, writers = self._deck, cast("_WriterPool[_WriteItem]", self._writers)
+        while (item := deck.get()) is not None:
+            image, event, meta, t0 = item
+            try:
+                # get info about the layer we need to update
+                if self._growing is not None:
+                    # GeneratorMDASequence: make room for the frame first
+                    _id, im_idx, layer_name = self._growing(event)
+                    cast("GrowableStorage", self._tmp_arrays[_id]).grow(im_idx)
+                else:
+                    seq = cast("MDASequence", event.sequence)
+                    lookup = self._lookups.get(seq.uid)
+                    _id, im_idx, layer_name = (
+                        lookup(event, meta) if lookup else _id_idx_layer(event)
+                    )
+            except Exception:
+                # drop the frame, but keep routing the others
+                logger.exception("Failed to route MDA frame")
+                self._frame_done(image)
+                continue
+            if _id not in self._tmp_arrays:
+                self._frame_done(image)
+                continue  # not part of the running sequence
+            # frames landing in the same chunk (of the same stored array, even
+            # if shown as several layers) always go to the same writer, so
+            # writes to a chunk never race and keep their order.
+            # (and the arrays of each camera have writers of their own)
+            writers.submit(
+                self._tmp_arrays[_id].write_key(im_idx),
+                (_id, im_idx, layer_name, image, t0, event, meta),
+                self._write_groups.get(_id, 0),
+            )
 
-    def _on_mda_frame(self, image: np.ndarray, event: MDAEvent) -> None:
+    def _stop_worker(self) -> None:
+        """Close the frame queue and wait for the workers to write what is left."""
+        self._deck.close()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        if self._writers is not None:
+            self._writers.join()
+            self._writers = None
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        stats = self.stats
+        stats.max_queue_depth = self._deck.max_depth
+        stats.max_frames_in_flight = self._budget.peak_frames
+        stats.max_bytes_in_flight = self._budget.peak_bytes
+
+    def _on_mda_frame(
+        self,
+        image: np.ndarray,
+        event: MDAEvent,
+        meta: Mapping[str, Any] | None = None,
+    ) -> None:
         """Called on the `frameReady` event from the core."""
-        # Generator-based events have no sequence; show them in the preview layer.
-        if event.sequence is None:
+        # events without a sequence outside of a generator MDA: just show them
+        if event.sequence is None and self._growing is None:
             self._update_preview(image)
             return
-        self._deck.append((image, event))
+
+        t0 = time.perf_counter()
+        frame: _Frame = image
+        if not self._budget.acquire(image.nbytes):
+            policy = self._queue_policy
+            if policy == "spill":
+                if self._spill is None:
+                    self._spill = _SpillFile(self._scratch_dir(0))
+                frame = self._spill.append(image)
+                self.stats.spilled += 1
+            elif policy == "drop" and not self._persistent:
+                self.stats.dropped += 1
+                return
+            elif policy == "drop":
+                # persisted frames are never dropped: wait for the writers
+                self._budget.acquire(image.nbytes, block=True)
+            else:
+                self._budget.acquire(image.nbytes, force=True)
+                if not self._paused_by_budget:
+                    self._paused_by_budget = True
+                    self.stats.pauses += 1
+                    self._mmc.mda.set_paused(True)
+        self._deck.put((frame, event, meta, t0))
+
+    def _frame_done(self, frame: _Frame) -> None:
+        """Stop counting a frame in flight, resuming the MDA if we paused it."""
+        if isinstance(frame, _SpilledFrame):
+            return  # spilled frames were not counted
+        self._budget.release(frame.nbytes)
+        self._resume_if_below_budget()
+
+    def _on_buffered(self, frames: int, nbytes: int) -> None:
+        """Count the frames held in chunk buffers in flight, until written."""
+        self._budget.add_buffered(frames, nbytes)
+        if frames < 0:
+            self._resume_if_below_budget()
+
+    def _resume_if_below_budget(self) -> None:
+        """Resume the MDA if we paused it and the frames in flight drained."""
+        if self._paused_by_budget and self._budget.below_low_water():
+            self._paused_by_budget = False
+            self._mmc.mda.set_paused(False)
 
     @ensure_main_thread  # type: ignore [untyped-decorator]
     def _update_preview(self, data: np.ndarray) -> None:
@@ -178,23 +1262,94 @@ class _NapariMDAHandler:
         except KeyError:
             self.viewer.add_image(data, name="preview")
 
-    def _process_frame(
-        self, image: np.ndarray, event: MDAEvent
-    ) -> tuple[str | None, tuple[int, ...] | None]:
-        # get info about the layer we need to update
-        _id, im_idx, layer_name = _id_idx_layer(event)
-
-        # update the zarr array backing the layer
-        if _id not in self._tmp_arrays:
-            return None, None  # GeneratorMDASequence: no zarr pre-allocated
-        self._tmp_arrays[_id][0][im_idx] = image
+    def _process_frame(self, item: _WriteItem) -> None:
+        """Writer thread: write one frame to zarr and queue a viewer update."""
+        _id, im_idx, layer_name, frame, t0, event, meta = item
+        try:
+            image = frame.load() if isinstance(frame, _SpilledFrame) else frame
+
+            # update the array backing the layer
+            t_write = time.perf_counter()
+            # (frames of multi-plane chunks are written once their chunk is complete)
+            written = self._tmp_arrays[_id].write(im_idx, image)
+            t_done = time.perf_counter()
+        finally:
+            # (buffered frames stay counted in flight, see _on_buffered; failed
+            # frames are not, or the MDA would wait for them forever)
+            self._frame_done(frame)
+        if not written and self._budget.buffers_full():
+            # write the incomplete chunks rather than hold more than the budget
+            self._flush_storages(final=False)
+        if (latency := self.latency) is not None:
+            latency.record("queue", t_write - t0)
+            latency.record("write", t_done - t_write)
+            latency.frame_written(t0, t_done)
+        self._frame_tables[_id].append(im_idx, event, meta, t_done - t0)
+        # (the layers of generator MDAs have no fixed shape to keep stats for)
+        if (plane_stats := self._plane_stats.get(_id)) is not None:
+            plane_stats.record(im_idx, image)
+
+        step: tuple[int, ...] | None = None
+        with self._lock:
+            self.stats.record(t_done - t0)
+            codec_stats = self.codec_stats[_id]
+            codec_stats.frames += 1
+            codec_stats.write_time += t_done - t_write
+            codec_stats.raw_bytes += image.nbytes
+            # move the viewer step to the most recently added image
+            if written and im_idx > self._largest_idx:
+                self._largest_idx = step = im_idx
+        self._display.publish(layer_name, step)
+
+        if self._mosaics and event.x_pos is not None and event.y_pos is not None:
+            camera = (meta or {}).get("camera_device", "") if self._cameras else ""
+            key = (camera, event.channel.config if event.channel else "")
+            if key in self._mosaics:
+                self._mosaics[key][0].paste(image, event.x_pos, event.y_pos)
+
+    def _create_mosaic_layers(
+        self, sequence: MDASequence, fname: str, tile_shape: list[int], dtype: str
+    ) -> None:
+        """Add a mosaic layer for each camera and channel of a multi-position MDA."""
+        positions = _tile_positions(sequence)
+        if len(positions) < 2:
+            return
+        pixel_size = self._mmc.getPixelSizeUm() or 1.0
+        channels = [ch.config for ch in sequence.channels] or [""]
+        for camera, config in product(self._cameras or [""], dict.fromkeys(channels)):
+            canvas = MosaicCanvas(
+                positions, tile_shape, dtype, pixel_size, self.mosaic_downsample
+            )
+            parts = (fname, camera, str(sequence.uid), "mosaic", config)
+            name = "_".join(filter(None, parts))
+            self.viewer.add_image(
+                canvas.data,
+                name=name,
+                blending="additive",
+                scale=canvas.scale,
+                translate=canvas.origin,
+                metadata={NMM_METADATA_KEY: {"uid": sequence.uid, "mosaic": True}},
+            )
+            self._mosaics[(camera, config)] = (canvas, name)
 
-        # move the viewer step to the most recently added image
-        if im_idx > self._largest_idx:
-            self._largest_idx = im_idx
-            return layer_name, im_idx
+    @ensure_main_thread  # type: ignore [untyped-decorator]
+    def _refresh_mosaics(self, whole: bool = False) -> None:
+        """Repaint the regions of the mosaic layers that received new tiles.
 
-        return layer_name, None
+        With `whole`, or without a canvas to repaint regions of, the layers are
+        refreshed (with their thumbnails) instead.
+        """
+        for canvas, name in list(self._mosaics.values()):
+            box = canvas.take_dirty()
+            if (box is None and not whole) or name not in self.viewer.layers:
+                continue
+            layer = self.viewer.layers[name]
+            if (
+                whole
+                or box is None
+                or not repaint_region(self.viewer, layer, canvas.data, box)
+            ):
+                layer.refresh()
 
     def _update_viewer_dims(
         self, args: tuple[str | None, tuple[int, ...] | None]
@@ -205,9 +1360,15 @@ class _NapariMDAHandler:
         if layer_name is None:
             return
 
+        if self._growing is not None and layer_name in self._growing.layers:
+            self._sync_growing_layer(layer_name)
         layer: Image = self.viewer.layers[layer_name]
         if not layer.visible:
             layer.visible = True
+            # auto-adjust the contrast to the first planes, without reading them
+            stats = layer.metadata.get(NMM_METADATA_KEY, {}).get("plane_stats")
+            if stats is not None and (rng := stats.range_at()) and rng[1] > rng[0]:
+                layer.contrast_limits = rng
 
         if im_idx is None:
             return
@@ -217,25 +1378,195 @@ class _NapariMDAHandler:
             cs[a] = v
         self.viewer.dims.current_step = cs
 
+    def _apply_viewer_updates(
+        self, updates: list[tuple[str, tuple[int, ...] | None]]
+    ) -> None:
+        """Show the updated layers and move the dims to the newest index, once."""
+        newest: tuple[int, ...] | None = None
+        for layer_name, im_idx in updates:
+            self._update_viewer_dims((layer_name, None))
+            if im_idx is not None and (newest is None or im_idx > newest):
+                newest = im_idx
+        if newest is not None:
+            self._update_viewer_dims((updates[0][0], newest))
+
+    def discard_recoverable(
+        self, directories: Sequence[str | Path] | None = None
+    ) -> list[Path]:
+        """Delete (in the background) the MDA data of crashed sessions, unrecovered.
+
+        Journaled data that is neither recovered nor discarded is deleted once
+        older than `JOURNAL_MAX_AGE`. Returns the paths that are being deleted.
+
+        Parameters
+        ----------
+        directories : Sequence[str | Path] | None
+            Where to look, by default those of `recover`.
+        """
+        if directories is None:
+            directories = [*self._scratch_dirs, tempfile.gettempdir()]
+        return reap_orphans(directories, keep_journals=False)
+
+    def recoverable(
+        self, directories: Sequence[str | Path] | None = None
+    ) -> list[tuple[str, int]]:
+        """Return the name and size in bytes of each layer `recover` would add.
+
+        Parameters
+        ----------
+        directories : Sequence[str | Path] | None
+            Where to look, by default those of `recover`.
+        """
+        if directories is None:
+            directories = [*self._scratch_dirs, tempfile.gettempdir()]
+        return _recoverable(directories)
+
+    def recover(self, directories: Sequence[str | Path] | None = None) -> list[Image]:
+        """Add layers for the temporary MDA data left behind by crashed sessions.
+
+        The arrays are reopened from their journal (see `RecoveredStorage`), so
+        their chunks are not scanned, and deleted like those of an MDA when the
+        handler is closed: save the layers to keep them.
+
+        Parameters
+        ----------
+        directories : Sequence[str | Path] | None
+            Where to look, by default the scratch directories and the system
+            temporary directory.
+        """
+        from useq import MDASequence
+
+        if directories is None:
+            directories = [*self._scratch_dirs, tempfile.gettempdir()]
+        layers = []
+        for path in _find_journals(directories):
+            try:
+                storage = RecoveredStorage(path)
+            except Exception as e:
+                logger.warning("Could not recover MDA data from %s: %s", path, e)
+                continue
+            header = storage.header
+            layer_meta: LayerMeta = {
+                "useq_sequence": MDASequence.model_validate_json(header["sequence"]),
+                "uid": UUID(header["uid"]),
+                "ch_id": header["ch_id"],
+            }
+            multiscale = len(storage.levels) > 1
+            layer = self.viewer.add_image(
+                storage.levels if multiscale else storage.array,
+                name=f"{header['name']} (recovered)",
+                multiscale=multiscale,
+                blending="opaque",
+                scale=header["scale"],
+                metadata={NMM_METADATA_KEY: layer_meta},
+            )
+            self._tmp_arrays[f"recovered-{path.name}"] = storage
+            if len(storage.written):
+                # show the last frame written before the crash
+                step = list(self.viewer.dims.current_step)
+                offset = self.viewer.dims.ndim - layer.ndim
+                for i, v in enumerate(storage.written[-1]):
+                    step[offset + i] = int(v)
+                self.viewer.dims.current_step = step
+            logger.info(
+                "Recovered %d frames of %s from %s",
+                len(storage.written),
+                header["name"],
+                path,
+            )
+            layers.append(layer)
+        return layers
+
     def _reset_viewer_dims(self) -> None:
         """Reset the viewer dims to the first image."""
         self.viewer.dims.current_step = [0] * len(self.viewer.dims.current_step)
 
+    def _flush_storages(self, final: bool = True) -> None:
+        """Write the incomplete multi-plane chunks.
+
+        If `final` (once the writers are done), the frames never acquired are
+        left empty, else the rest of the frames are written as they come.
+        """
+        flushed = [storage.flush(final) for storage in self._tmp_arrays.values()]
+        if any(flushed):
+            self._refresh_layers(list(self._frame_tables.values()))
+
+    @ensure_main_thread  # type: ignore [untyped-decorator]
+    def _refresh_layers(self, tables: list[FrameTable]) -> None:
+        """Redraw the layers of the given frame tables."""
+        for layer in self.viewer.layers:
+            meta = layer.metadata.get(NMM_METADATA_KEY, {})
+            if any(meta.get("frames") is table for table in tables):
+                layer.refresh()
+
     def _on_mda_finished(self, sequence: MDASequence) -> None:
+        self._stop_worker()
+        # the last chunks may miss frames, e.g. when the MDA was canceled
+        self._flush_storages()
+        # store the frame metadata next to the data (if kept)
+        for id_, table in self._frame_tables.items():
+            self._tmp_arrays[id_].write_frames(table.data)
+        if self._mosaics:
+            # paint the last tiles, written after the viewer stopped polling
+            self._refresh_mosaics(whole=True)
+        if self._growing is not None:
+            # drop the room grown for frames that never came
+            for id_, _ in self._growing.layers.values():
+                cast("GrowableStorage", self._tmp_arrays[id_]).trim()
+            self._sync_growing_layers()
         self._mda_running = False
         self._reset_viewer_dims()
-        while self._deck:
-            self._process_frame(*self._deck.pop())
+        self._log_stats(sequence)
+
+    def _log_stats(self, sequence: MDASequence) -> None:
+        """Log queue, latency and compression statistics of the finished MDA."""
+        stats = self.stats
+        if stats.dropped:
+            logger.warning(
+                "MDA %s: %d frames were dropped from the viewer because they could "
+                "not be written fast enough.",
+                sequence.uid,
+                stats.dropped,
+            )
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        logger.debug(
+            "MDA %s: %d frames, max queue depth %d, latency mean %.1f ms / max %.1f ms",
+            sequence.uid,
+            stats.frames,
+            stats.max_queue_depth,
+            stats.mean_latency * 1000,
+            stats.max_latency * 1000,
+        )
+        logger.debug(
+            "MDA %s: at most %d frames (%d bytes) waiting to be written, "
+            "%d spilled, %d dropped, %d pauses",
+            sequence.uid,
+            stats.max_frames_in_flight,
+            stats.max_bytes_in_flight,
+            stats.spilled,
+            stats.dropped,
+            stats.pauses,
+        )
+        for id_, codec_stats in self.codec_stats.items():
+            logger.debug(
+                "layer %s (%s): %.2f ms/frame encode+write, compression ratio %.2f",
+                id_,
+                codec_stats.codec,
+                codec_stats.mean_write_time * 1000,
+                codec_stats.ratio,
+            )
 
     def _create_empty_image_layer(
-        self, arr: zarr.Array, name: str, sequence: MDASequence, layer_meta: LayerMeta
+        self, arr: Any, name: str, sequence: MDASequence, layer_meta: LayerMeta
     ) -> Image:
         """Create new napari layer for zarr array about to be acquired.
 
         Parameters
         ----------
-        arr : zarr.Array
-            The array to create a layer for.
+        arr : Any
+            The array (e.g. zarr or numpy) to create a layer for, or a list of
+            arrays (from full resolution to the smallest) for a multiscale layer.
         name : str
             The name of the layer.
         sequence : MDASequence
@@ -245,8 +1576,10 @@ class _NapariMDAHandler:
         """
         # we won't have reached this point if meta is None
         meta = sequence.metadata.get(NMM_METADATA_KEY, {})
-        is_rgb = arr.shape[-1] == 3
-        scale = [1.0] * (arr.ndim - (1 if is_rgb else 0))
+        multiscale = isinstance(arr, list)
+        base = arr[0] if multiscale else arr
+        is_rgb = base.shape[-1] == 3
+        scale = [1.0] * (base.ndim - (1 if is_rgb else 0))
 
         # add Z to layer scale
         if (pix_size := self._mmc.getPixelSizeUm()) != 0:
@@ -262,6 +1595,7 @@ class _NapariMDAHandler:
         return self.viewer.add_image(
             arr,
             name=name,
+            multiscale=multiscale,
             blending="opaque",
             visible=False,
             scale=scale,
@@ -344,6 +1678,38 @@ def _determine_sequence_layers(
     return axis_labels, _layer_info
 
 
+def _position_shapes(sequence: MDASequence, axes: list[str]) -> list[list[int]] | None:
+    """Return the shape acquired at each stage position, if they differ.
+
+    When only some positions have a sub-sequence, the layer is as large as the
+    largest position along each axis. This returns, for each position, the shape
+    (along `axes` without "p") that is really acquired there, or None if the
+    sequence has no sub-sequences or all positions fill the layer.
+    """
+    if "p" not in axes or not _has_sub_sequences(sequence):
+        return None
+    others = [ax for ax in axes if ax != "p"]
+    n_pos = max(len(sequence.stage_positions), 1)
+    shapes = [[1] * len(others) for _ in range(n_pos)]
+    for event in sequence:
+        shape = shapes[event.index.get("p", 0)]
+        for i, ax in enumerate(others):
+            shape[i] = max(shape[i], event.index.get(ax, 0) + 1)
+    if all(shape == shapes[0] for shape in shapes):
+        return None
+    return shapes
+
+
+def _count_frames(
+    layers_to_create: list[tuple[str, list[int], LayerMeta]],
+    pos_shapes: list[list[int]] | None,
+) -> int:
+    """Number of frames stored in the layers (see `_position_shapes`)."""
+    if pos_shapes is None:
+        return sum(math.prod(shape) for _, shape, _ in layers_to_create)
+    return sum(math.prod(shape) for shape in pos_shapes) * len(layers_to_create)
+
+
 def _id_idx_layer(event: MDAEvent) -> tuple[str, tuple[int, ...], str]:
     """Get the tmp_path id, index, and layer name for a given event.
 
@@ -390,3 +1756,137 @@ def _id_idx_layer(event: MDAEvent) -> tuple[str, tuple[int, ...], str]:
     layer_name = f"{prefix}_{ch_id}{seq.uid}"
 
     return _id, im_idx, layer_name
+
+
+class _SequenceLookup:
+    """Precomputed `_id_idx_layer` for all the events of a sequence.
+
+    The axis order, layer ids and layer names only depend on the sequence (and
+    on the channel in split channels mode, and on the camera with a Multi Camera
+    device), so they are computed once, when the sequence starts, instead of
+    for every frame.
+
+    Parameters
+    ----------
+    sequence : MDASequence
+        The sequence whose events will be looked up.
+    cameras : Sequence[str]
+        Physical cameras of a Multi Camera device, whose frames go to layers of
+        their own (by default none: a single camera).
+    """
+
+    def __init__(self, sequence: MDASequence, cameras: Sequence[str] = ()) -> None:
+        meta = cast("dict", sequence.metadata.get(NMM_METADATA_KEY, {}))
+        self._split = bool(meta.get("split_channels", False))
+        self._prefix = _get_file_name_from_metadata(sequence)
+        self._uid = str(sequence.uid)
+        self._layer = (self._uid, f"{self._prefix}_{self._uid}")
+        axis_order = list(get_full_sequence_axes(sequence))
+        self._axes = tuple(axis_order)
+        if self._split and "c" in axis_order:
+            axis_order.remove("c")
+        self._split_axes = tuple(axis_order)
+        # (channel index, channel config) -> (id, layer name)
+        self._channels: dict[tuple[int, str], tuple[str, str]] = {}
+        if self._split:
+            for i, ch in enumerate(sequence.channels):
+                self._channel_layer(i, ch.config)
+        self._cameras = tuple(cameras)
+        # (camera, id) -> (id, layer name) of the camera's layer
+        self._camera_layers: dict[tuple[str, str], tuple[str, str]] = {}
+
+    def _channel_layer(self, c_index: int, config: str) -> tuple[str, str]:
+        """Return (and cache) the id and layer name of a channel's layer."""
+        key = (c_index, config)
+        if key not in self._channels:
+            _id = f"{config}_{c_index:03d}_{self._uid}"
+            self._channels[key] = (_id, f"{self._prefix}_{_id}")
+        return self._channels[key]
+
+    def _camera_layer(self, camera: str, _id: str) -> tuple[str, str]:
+        """Return (and cache) the id and layer name of a camera's layer."""
+        key = (camera, _id)
+        if key not in self._camera_layers:
+            cam_id = f"{camera}_{_id}"
+            self._camera_layers[key] = (cam_id, f"{self._prefix}_{cam_id}")
+        return self._camera_layers[key]
+
+    def _camera(self, event: MDAEvent, meta: Mapping[str, Any] | None) -> str:
+        """Return the camera that took the frame of `event`."""
+        camera = (meta or {}).get("camera_device")
+        if camera in self._cameras:
+            return cast("str", camera)
+        # else, the index of the camera channel that pymmcore-plus adds
+        cam = event.index.get("cam", 0)
+        return self._cameras[cam if cam < len(self._cameras) else 0]
+
+    def __call__(
+        self, event: MDAEvent, meta: Mapping[str, Any] | None = None
+    ) -> tuple[str, tuple[int, ...], str]:
+        """Return the (id, index, layer_name) of `event`, like `_id_idx_layer`.
+
+        With several cameras, the layer is that of the camera named in the frame
+        metadata `meta`.
+        """
+        index = event.index
+        if self._split and event.channel:
+            _id, layer_name = self._channel_layer(index["c"], event.channel.config)
+            axes = self._split_axes
+        else:
+            _id, layer_name = self._layer
+            axes = self._axes
+        if self._cameras:
+            _id, layer_name = self._camera_layer(self._camera(event, meta), _id)
+        # axes missing from event.index (e.g. a position without a sub-sequence
+        # grid) are at index 0
+        return _id, tuple(index.get(k, 0) for k in axes), layer_name
+
+
+class _GrowingLookup:
+    """`_id_idx_layer` for the events of a `GeneratorMDASequence`.
+
+    The layer axes are those of `event.index` (standard useq axes first), and a
+    new layer is created the first time a set of axes is seen. Events without
+    an index are stacked along `UNINDEXED_AXIS`, in the order they arrive.
+
+    Parameters
+    ----------
+    sequence : MDASequence
+        The running generator sequence.
+    create : Callable[[tuple[str, ...]], tuple[str, str]]
+        Create the storage of a layer with the given axes, returning its id and
+        layer name.
+    """
+
+    def __init__(
+        self,
+        sequence: MDASequence,
+        create: Callable[[tuple[str, ...]], tuple[str, str]],
+    ) -> None:
+        self.sequence = sequence
+        self._create = create
+        # axes -> (id, layer name), and layer name -> (id, axes)
+        self._by_axes: dict[tuple[str, ...], tuple[str, str]] = {}
+        self.layers: dict[str, tuple[str, tuple[str, ...]]] = {}
+        # layer name -> shape of its arrays when last shown (main thread only)
+        self.shown: dict[str, tuple[int, ...]] = {}
+        self._n_unindexed = 0
+
+    def __call__(self, event: MDAEvent) -> tuple[str, tuple[int, ...], str]:
+        """Return the (id, index, layer_name) of `event`, creating its layer."""
+        index = dict(event.index)
+        if not index:
+            index = {UNINDEXED_AXIS: self._n_unindexed}
+            self._n_unindexed += 1
+        axes = tuple(sorted(index, key=_generator_axis_key))
+        if axes not in self._by_axes:
+            _id, layer_name = self._create(axes)
+            self._by_axes[axes] = (_id, layer_name)
+            self.layers[layer_name] = (_id, axes)
+        _id, layer_name = self._by_axes[axes]
+        return _id, tuple(index[k] for k in axes), layer_name
+
+
+def _generator_axis_key(axis: str) -> tuple[int, str]:
+    i = _GENERATOR_AXIS_ORDER.find(axis)
+    return (i if i >= 0 else len(_GENERATOR_AXIS_ORDER), axis)
@@ -0,0 +1,141 @@
+"""Downsampled overview canvas of the tiles of a multi-position acquisition."""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+from vispy.visuals.image import ImageVisual
+
+from napari_micromanager._mda_storage import _downsample
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from useq import MDASequence
+
+
+def _tile_positions(sequence: MDASequence) -> set[tuple[float, float]]:
+    """Return the distinct (x, y) stage positions (in µm) visited by `sequence`."""
+    return {
+        (event.x_pos, event.y_pos)
+        for event in sequence
+        if event.x_pos is not None and event.y_pos is not None
+    }
+
+
+class MosaicCanvas:
+    """A downsampled canvas on which tiles are placed at their stage coordinates.
+
+    Stage positions are taken as the center of each tile, with the stage X and Y
+    axes aligned with the image columns and rows.
+
+    Parameters
+    ----------
+    positions : Iterable[tuple[float, float]]
+        (x, y) stage positions (in µm) of all the tiles that will be pasted.
+    tile_shape : Sequence[int]
+        Shape of a tile, (Y, X) or (Y, X, RGB).
+    dtype : str
+        Data type of the tiles.
+    pixel_size : float
+        Size of a tile pixel in µm (1 if unknown).
+    downsample : int
+        Number of tile pixels (along each axis) averaged into one canvas pixel.
+    """
+
+    def __init__(
+        self,
+        positions: Iterable[tuple[float, float]],
+        tile_shape: Sequence[int],
+        dtype: str,
+        pixel_size: float,
+        downsample: int,
+    ) -> None:
+        xs, ys = zip(*positions, strict=False)
+        self.downsample = downsample
+        self._pixel_size = pixel_size
+        h, w = tile_shape[:2]
+        self._half_tile = (h * pixel_size / 2, w * pixel_size / 2)
+        # stage coordinates (µm) of the top left corner of the canvas
+        self.origin = (min(ys) - self._half_tile[0], min(xs) - self._half_tile[1])
+        shape = (
+            math.ceil(((max(ys) - min(ys)) / pixel_size + h) / downsample),
+            math.ceil(((max(xs) - min(xs)) / pixel_size + w) / downsample),
+        )
+        self.data = np.zeros((*shape, *tile_shape[2:]), dtype=dtype)
+        # bounding box of the regions painted since the last `take_dirty`
+        self._dirty: tuple[int, int, int, int] | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def scale(self) -> tuple[float, float]:
+        """Size of a canvas pixel in µm."""
+        size = self._pixel_size * self.downsample
+        return (size, size)
+
+    def paste(self, image: np.ndarray, x: float, y: float) -> tuple[slice, slice]:
+        """Paste the tile acquired at stage position (x, y), return the region."""
+        tile = _downsample(image, self.downsample) if self.downsample > 1 else image
+        size = self.scale[0]
+        top = round((y - self._half_tile[0] - self.origin[0]) / size)
+        left = round((x - self._half_tile[1] - self.origin[1]) / size)
+        # clip the tile to the canvas
+        rows = slice(max(top, 0), min(top + tile.shape[0], self.data.shape[0]))
+        cols = slice(max(left, 0), min(left + tile.shape[1], self.data.shape[1]))
+        if rows.start >= rows.stop or cols.start >= cols.stop:
+            return rows, cols
+
+        # (overlapping tiles are pasted by several writers)
+        with self._lock:
+            self.data[rows, cols] = tile[
+                rows.start - top : rows.stop - top, cols.start - left : cols.stop - left
+            ]
+            box = (rows.start, rows.stop, cols.start, cols.stop)
+            if self._dirty is not None:
+                d = self._dirty
+                box = (
+                    min(d[0], box[0]),
+                    max(d[1], box[1]),
+                    min(d[2], box[2]),
+                    max(d[3], box[3]),
+                )
+            self._dirty = box
+        return rows, cols
+
+    def take_dirty(self) -> tuple[int, int, int, int] | None:
+        """Return and reset the (y0, y1, x0, x1) box painted since the last call."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, None
+        return dirty
+
+
+def repaint_region(
+    viewer: Any, layer: Any, data: np.ndarray, box: tuple[int, int, int, int]
+) -> bool:
+    """Upload the (y0, y1, x0, x1) `box` of `data` to the texture showing `layer`.
+
+    napari can only refresh whole layers: this updates part of the texture of
+    the vispy node of `layer`. It returns False, to refresh the whole layer
+    instead, if there is no canvas (e.g. a headless viewer) or if the node does
+    not show `data` itself (e.g. a copy, or a downsampled one).
+    """
+    qt_viewer = getattr(getattr(viewer, "window", None), "_qt_viewer", None)
+    visual = getattr(qt_viewer, "layer_to_visual", {}).get(layer)
+    node = getattr(visual, "node", None)
+    shown = getattr(node, "_data", None)
+    if (
+        not isinstance(node, ImageVisual)
+        or not isinstance(shown, np.ndarray)
+        or (shown.shape, shown.strides) != (data.shape, data.strides)
+        or not np.shares_memory(shown, data)
+    ):
+        return False
+    # (until the node is drawn, its whole texture is still to be uploaded)
+    if not node._need_texture_upload:
+        y0, y1, x0, x1 = box
+        node._texture.scale_and_set_data(data[y0:y1, x0:x1], offset=(y0, x0))
+    node.update()
+    return True
@@ -0,0 +1,1448 @@
+"""Storage backends for the arrays behind MDA layers."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import warnings
+from itertools import product
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple, cast
+
+import numpy as np
+import zarr
+
+from napari_micromanager._reaper import (
+    JOURNAL_FILE,
+    find_orphans,
+    make_scratch_dir,
+    reap,
+    scratch_prefix,
+)
+from napari_micromanager._util import COMPRESSION_LEVELS
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable, Mapping, Sequence
+
+_ZARR_V3 = int(zarr.__version__.split(".")[0]) >= 3
+
+# scratch directories of the temporary layer arrays, separated by `os.pathsep`
+SCRATCH_ENV_VAR = "NAPARI_MICROMANAGER_SCRATCH"
+
+# file holding the per-frame metadata table of kept (e.g. OME-Zarr) images
+FRAMES_FILE = "frames.npy"
+# int32 index of each frame written to a journaled temporary array
+JOURNAL_INDEX_FILE = "journal.idx"
+
+# leading axes of OME-NGFF images, in this order, before Y and X
+NGFF_AXES = ("t", "c", "z")
+# OME-NGFF axis type of each axis label
+_NGFF_AXIS_TYPES = {"t": "time", "c": "channel"}
+_NGFF_AXIS_TYPES.update(dict.fromkeys("zyx", "space"))
+
+
+def _compression_kwargs(codec: str, level: int | None = None) -> dict[str, Any]:
+    """Return the `zarr.open` kwargs that compress chunks with `codec` at `level`.
+
+    "lz4" is Blosc/LZ4 without shuffle, "blosc" is Blosc/LZ4 with bit-shuffle.
+    """
+    if codec == "default":
+        return {}
+    clevel = 0
+    if codec in COMPRESSION_LEVELS:
+        default, max_level = COMPRESSION_LEVELS[codec]
+        clevel = default if level is None else max(0, min(int(level), max_level))
+
+    if _ZARR_V3:
+        from zarr.codecs import BloscCodec, BytesCodec, ZstdCodec
+
+        compressors: dict[str, list[Any]] = {
+            "none": [],
+            "lz4": [BloscCodec(cname="lz4", clevel=clevel, shuffle="noshuffle")],
+            "zstd": [ZstdCodec(level=clevel)],
+            "blosc": [BloscCodec(cname="lz4", clevel=clevel, shuffle="bitshuffle")],
+        }
+        return {"codecs": [BytesCodec(), *compressors[codec]]}
+
+    from numcodecs import Blosc, Zstd
+
+    compressor = {
+        "none": None,
+        "lz4": Blosc(cname="lz4", clevel=clevel, shuffle=Blosc.NOSHUFFLE),
+        "zstd": Zstd(level=clevel),
+        "blosc": Blosc(cname="lz4", clevel=clevel, shuffle=Blosc.BITSHUFFLE),
+    }
+    return {"compressor": compressor[codec]}
+
+
+def _sharding_kwargs(zarr_kwargs: dict[str, Any], chunks: Sequence[int]) -> dict:
+    """Return the `zarr.open` kwargs storing `chunks` in shards (zarr v3 only).
+
+    The `chunks` passed to `zarr.open` along with them are the shard shape.
+    """
+    from zarr.codecs import BytesCodec, ShardingCodec, ZstdCodec
+
+    # (zarr's default compression, without sharding)
+    codecs = zarr_kwargs.get("codecs") or [BytesCodec(), ZstdCodec()]
+    sharding = ShardingCodec(chunk_shape=tuple(chunks), codecs=codecs)
+    return {**zarr_kwargs, "codecs": [sharding]}
+
+
+def _pyramid_shapes(shape: Sequence[int], n_levels: int) -> list[tuple[int, ...]]:
+    """Shapes of `n_levels` pyramid levels, each downsampled 2x in Y and X.
+
+    The last two axes are Y and X, unless the last one is RGB (of size 3).
+    """
+    y = len(shape) - (3 if shape[-1] == 3 else 2)
+    shapes = []
+    for k in range(n_levels):
+        level = list(shape)
+        level[y : y + 2] = [n >> k for n in shape[y : y + 2]]
+        shapes.append(tuple(level))
+    return shapes
+
+
+def _downsample(image: np.ndarray, factor: int = 2) -> np.ndarray:
+    """Downsample a (Y, X) or (Y, X, RGB) frame by averaging factor x factor blocks.
+
+    Leftover rows and columns are dropped, like in `_pyramid_shapes`.
+    """
+    f = factor
+    h, w = image.shape[0] // f, image.shape[1] // f
+    blocks = image[: f * h, : f * w].reshape(h, f, w, f, *image.shape[2:])
+    mean: np.ndarray = blocks.mean(axis=(1, 3), dtype=np.float32)
+    return mean.astype(image.dtype)
+
+
+def _downsample_planes(block: np.ndarray, n_axes: int) -> np.ndarray:
+    """`_downsample` each frame of a block with `n_axes` leading (plane) axes."""
+    lead = block.shape[:n_axes]
+    planes = [_downsample(plane) for plane in block.reshape(-1, *block.shape[n_axes:])]
+    return np.stack(planes).reshape(*lead, *planes[0].shape)
+
+
+class _ChunkBuffer:
+    """Frames waiting for the rest of their multi-plane chunk, to write it at once.
+
+    Writing each plane of a chunk spanning several planes (e.g. along Z) would
+    read, decompress, update, compress and write the chunk again every time.
+    The frames of a chunk must be added from a single thread (the handler
+    routes them to the same writer), but chunks can be drained from any.
+
+    Parameters
+    ----------
+    shape : Sequence[int]
+        Shape of the array along its leading (plane) axes.
+    chunks : Sequence[int]
+        Chunk shape along the same axes.
+
+    Attributes
+    ----------
+    on_change : Callable[[int, int], None] | None
+        Called with the change in the number of frames and bytes held by the
+        buffer, e.g. to count them against a memory budget.
+    write_lock : threading.Lock
+        Held to write chunks that are not `whole` (see `_Chunk`), which may be
+        written concurrently with the rest of their frames.
+    """
+
+    def __init__(self, shape: Sequence[int], chunks: Sequence[int]) -> None:
+        self.shape = tuple(shape)
+        self.chunks = tuple(chunks)
+        self.on_change: Callable[[int, int], None] | None = None
+        self.write_lock = threading.Lock()
+        # chunk key -> (block of frames, indices of the frames in it)
+        self._pending: dict[tuple[int, ...], tuple[np.ndarray, list[tuple]]] = {}
+        # chunk key -> number of its frames written by an early `drain`
+        self._drained: dict[tuple[int, ...], int] = {}
+        self._lock = threading.Lock()
+
+    def _changed(self, frames: int, nbytes: int) -> None:
+        if self.on_change is not None:
+            self.on_change(frames, nbytes)
+
+    def add(self, index: Sequence[int], image: np.ndarray) -> _Chunk | None:
+        """Add a frame, returning its chunk once all its frames were added."""
+        key = tuple(i // c for i, c in zip(index, self.chunks, strict=True))
+        start = tuple(k * c for k, c in zip(key, self.chunks, strict=True))
+        new_block = 0
+        with self._lock:
+            if key not in self._pending:
+                size = [
+                    min(c, n - s)
+                    for c, n, s in zip(self.chunks, self.shape, start, strict=True)
+                ]
+                block = np.zeros((*size, *image.shape), dtype=image.dtype)
+                self._pending[key] = (block, [])
+                new_block = block.nbytes
+            block, indices = self._pending[key]
+            # (copied with the lock held, so that `drain` never takes a half copy)
+            block[tuple(i - s for i, s in zip(index, start, strict=True))] = image
+            indices.append(tuple(index))
+            n_written = len(indices) + self._drained.get(key, 0)
+            chunk = None
+            if n_written == np.prod(block.shape[: len(start)]):
+                del self._pending[key]
+                whole = self._drained.pop(key, 0) == 0
+                chunk = _Chunk(start, block, indices, whole)
+        self._changed(1, new_block)
+        if chunk is not None:
+            self._changed(-len(chunk.indices), -chunk.block.nbytes)
+        return chunk
+
+    def drain(self, final: bool = True) -> list[_Chunk]:
+        """Remove and return the chunks still missing frames.
+
+        Unless `final`, the rest of their frames may still be added: they are
+        returned once they are all added or drained, like the others.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if final:
+                self._drained.clear()
+            else:
+                for key, (_, indices) in pending.items():
+                    self._drained[key] = self._drained.get(key, 0) + len(indices)
+        chunks = [
+            _Chunk(
+                tuple(k * c for k, c in zip(key, self.chunks, strict=True)),
+                block,
+                indices,
+                False,
+            )
+            for key, (block, indices) in pending.items()
+        ]
+        if chunks:
+            self._changed(
+                -sum(len(c.indices) for c in chunks),
+                -sum(c.block.nbytes for c in chunks),
+            )
+        return chunks
+
+
+class _Chunk(NamedTuple):
+    """Frames of a chunk, to write with `level[start : start + block.shape]`.
+
+    Chunks that are not `whole` miss frames (those not acquired, or written
+    earlier by a `drain`): only their `indices` are written.
+    """
+
+    start: tuple[int, ...]
+    block: np.ndarray
+    indices: list[tuple]
+    whole: bool = True
+
+
+def _chunk_buffer(
+    shape: Sequence[int], chunks: Sequence[int], frame_ndim: int | None = None
+) -> _ChunkBuffer | None:
+    """A `_ChunkBuffer` if the chunks span several frames, else None.
+
+    The frames have `frame_ndim` axes, by default (Y, X), or (Y, X, RGB) if the
+    last axis has a size of 3 (like in `_pyramid_shapes`).
+    """
+    if frame_ndim is None:
+        frame_ndim = 3 if shape[-1] == 3 else 2
+    n = len(shape) - frame_ndim
+    if all(c == 1 for c in chunks[:n]):
+        return None
+    return _ChunkBuffer(shape[:n], chunks[:n])
+
+
+def _is_ngff_image(axes: Sequence[str]) -> bool:
+    """Whether `axes` are those of an OME-NGFF image: T, C, Z (if any), Y and X."""
+    *lead, y, x = axes
+    return (y, x) == ("y", "x") and lead == [ax for ax in NGFF_AXES if ax in lead]
+
+
+def _write_ngff_metadata(
+    group_path: str | Path,
+    name: str,
+    axes: Sequence[str],
+    scale: Sequence[float],
+    unit: str | None = None,
+    n_levels: int = 1,
+) -> None:
+    """Write OME-NGFF multiscales metadata for the image in a group.
+
+    Level `k` of the image is expected in the `str(k)` array of the group, and is
+    downsampled `2**k` times in Y and X. Zarr 3 groups get NGFF 0.5 metadata
+    (under the "ome" attribute), zarr 2 groups get NGFF 0.4.
+
+    Parameters
+    ----------
+    group_path : str | Path
+        Path of the zarr group holding the image.
+    name : str
+        Name of the image.
+    axes : Sequence[str]
+        Axis labels, e.g. `['t', 'c', 'z', 'y', 'x']` (see `_is_ngff_image`).
+    scale : Sequence[float]
+        Scale of each axis.
+    unit : str | None
+        Unit of the spatial axes, if known.
+    n_levels : int
+        Number of resolution levels, by default 1.
+    """
+    ngff_axes: list[dict[str, str]] = []
+    for ax in axes:
+        axis = {"name": ax}
+        if type_ := _NGFF_AXIS_TYPES.get(ax):
+            axis["type"] = type_
+            if type_ == "space" and unit:
+                axis["unit"] = unit
+        ngff_axes.append(axis)
+
+    datasets = []
+    for k in range(n_levels):
+        level_scale = [
+            s * 2**k if ax in ("y", "x") else s
+            for ax, s in zip(axes, scale, strict=False)
+        ]
+        datasets.append(
+            {
+                "path": str(k),
+                "coordinateTransformations": [{"type": "scale", "scale": level_scale}],
+            }
+        )
+    multiscale: dict[str, Any] = {"name": name, "axes": ngff_axes, "datasets": datasets}
+    group = zarr.open_group(str(group_path), mode="a")
+    if _ZARR_V3:
+        group.attrs["ome"] = {"version": "0.5", "multiscales": [multiscale]}
+    else:
+        group.attrs["multiscales"] = [{"version": "0.4", **multiscale}]
+
+
+def _scratch_dirs_from_env() -> list[Path]:
+    """Return the existing directories listed in `SCRATCH_ENV_VAR`."""
+    dirs = []
+    for entry in os.environ.get(SCRATCH_ENV_VAR, "").split(os.pathsep):
+        if not entry:
+            continue
+        if Path(entry).is_dir():
+            dirs.append(Path(entry))
+        else:
+            warnings.warn(
+                f"{SCRATCH_ENV_VAR}: {entry!r} is not a directory, ignoring it.",
+                stacklevel=2,
+            )
+    return dirs
+
+
+def _dir_size(path: str | Path) -> int:
+    """Total size in bytes of all files below `path`."""
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def _open_levels(
+    directory: Path,
+    shape: Sequence[int],
+    dtype: str,
+    chunks: Sequence[int],
+    zarr_kwargs: dict[str, Any] | None,
+    n_levels: int,
+    shards: Sequence[int] | None = None,
+    dimension_names: Sequence[str] | None = None,
+) -> list[Any]:
+    """Create the zarr array of each pyramid level in `directory`/`k`.
+
+    With `shards` (zarr v3 only), the chunks are stored in shards of this shape
+    (rounded up to whole chunks): one file each. `dimension_names` are stored
+    with zarr v3 arrays only.
+    """
+    levels = []
+    for k, level_shape in enumerate(_pyramid_shapes(shape, n_levels)):
+        # downsampled levels have (at most) downsampled chunks as well
+        level_chunks = [min(c, n) for c, n in zip(chunks, level_shape, strict=False)]
+        kwargs = zarr_kwargs or {}
+        if dimension_names is not None and _ZARR_V3:
+            kwargs = {**kwargs, "dimension_names": list(dimension_names)}
+        if shards is not None:
+            kwargs = _sharding_kwargs(kwargs, level_chunks)
+            level_chunks = [
+                -(-min(s, n) // c) * c
+                for s, n, c in zip(shards, level_shape, level_chunks, strict=False)
+            ]
+        levels.append(
+            zarr.open(
+                str(directory / str(k)),
+                shape=level_shape,
+                dtype=dtype,
+                chunks=level_chunks,
+                **kwargs,
+            )
+        )
+    return levels
+
+
+def _write_unit(array: Any) -> tuple[int, ...]:
+    """The shards of `array`, or its chunks if it has none."""
+    return tuple(getattr(array, "shards", None) or array.chunks)
+
+
+class _Journal:
+    """Append-only record of the frames written to a temporary layer array.
+
+    `JOURNAL_FILE` holds a JSON header (the sequence, the layer axes, the layout
+    of the arrays...) and `JOURNAL_INDEX_FILE` the index of each written frame,
+    so that the data can be reopened after a crash without reading its chunks
+    (see `RecoveredStorage`).
+    """
+
+    def __init__(self, directory: str | Path, header: dict[str, Any]) -> None:
+        self._directory = Path(directory)
+        self._lock = threading.Lock()
+        self._file = open(Path(directory, JOURNAL_INDEX_FILE), "ab")
+        # the header appears last and at once: directories with one are complete
+        tmp = Path(directory, f"{JOURNAL_FILE}.tmp")
+        tmp.write_text(json.dumps(header))
+        os.replace(tmp, Path(directory, JOURNAL_FILE))
+
+    def append(self, index: Sequence[int]) -> None:
+        """Record that the frame at `index` is written."""
+        record = np.asarray(index, dtype="<i4").tobytes()
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(record)
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def discard(self) -> None:
+        """Close the journal, and remove its header: the data is not recoverable.
+
+        This is done at once (not by the background reaper), so that the data
+        of a closed layer never looks like that of a crashed session.
+        """
+        self.close()
+        with contextlib.suppress(FileNotFoundError):
+            Path(self._directory, JOURNAL_FILE).unlink()
+
+
+class _PartJournal(_Journal):
+    """The journal of a `RaggedStorage`, as seen by the storage of a position."""
+
+    def __init__(self, journal: _Journal, p_axis: int, position: int) -> None:
+        self._journal = journal
+        self._p_axis = p_axis
+        self._position = position
+
+    def append(self, index: Sequence[int]) -> None:
+        p = self._p_axis
+        self._journal.append((*index[:p], self._position, *index[p:]))
+
+    def close(self) -> None:
+        pass  # closed by the RaggedStorage
+
+    def discard(self) -> None:
+        pass
+
+
+class LayerStorage:
+    """Array backing one MDA layer, and the resources it needs.
+
+    Subclasses create `levels` (anything napari accepts as image data that supports
+    `array[index] = frame`) and release their resources in `close`.
+
+    Attributes
+    ----------
+    levels : list[Any]
+        The arrays of each resolution level, from full resolution to the smallest
+        one. Level `k` is downsampled `2**k` times in Y and X.
+    array : Any
+        The full resolution array (i.e. `levels[0]`).
+    chunks : tuple[int, ...]
+        Shape of the unit of storage that concurrent writes must not share.
+    path : str
+        Directory holding the data on disk, or "" for in-memory storage.
+    persistent : bool
+        Whether the data is kept after `close` (i.e. it is not only for display).
+    journal : _Journal | None
+        Record of the written frames, if started with `start_journal`.
+    """
+
+    levels: list[Any]
+    chunks: tuple[int, ...]
+    path: str = ""
+    persistent: bool = False
+    journal: _Journal | None = None
+    # frames of chunks spanning several frames, until their chunk is complete
+    _buffer: _ChunkBuffer | None = None
+
+    @property
+    def array(self) -> Any:
+        return self.levels[0]
+
+    def write(self, index: tuple[int, ...], image: np.ndarray) -> bool:
+        """Write the frame at `index` in every resolution level.
+
+        Returns whether the frame is in the arrays, or only buffered until the
+        other frames of its chunk are written (see `flush`).
+        """
+        if self._buffer is not None:
+            if (chunk := self._buffer.add(index, image)) is None:
+                return False
+            self._write_chunk(chunk)
+            return True
+        self.levels[0][index] = image
+        for level in self.levels[1:]:
+            image = _downsample(image)
+            level[index] = image
+        if self.journal is not None:
+            self.journal.append(index)
+        return True
+
+    def write_key(self, index: tuple[int, ...]) -> Hashable:
+        """Identify the stored chunk that the frame at `index` is written to.
+
+        Frames with the same key must not be written concurrently: views of a
+        shared array (e.g. `ChannelStorage`) return the key of the shared chunk.
+        """
+        return id(self), tuple(i // c for i, c in zip(index, self.chunks, strict=False))
+
+    def _write_chunk(self, chunk: _Chunk) -> None:
+        start, block, indices, whole = chunk
+        if whole:
+            key = tuple(
+                slice(s, s + n) for s, n in zip(start, block.shape, strict=False)
+            )
+            self.levels[0][key] = block
+            for level in self.levels[1:]:
+                block = _downsample_planes(block, len(start))
+                level[key] = block
+        else:
+            # frame by frame, not to overwrite those written apart with zeros
+            with cast("_ChunkBuffer", self._buffer).write_lock:
+                for index in indices:
+                    image = block[
+                        tuple(i - s for i, s in zip(index, start, strict=True))
+                    ]
+                    self.levels[0][index] = image
+                    for level in self.levels[1:]:
+                        image = _downsample(image)
+                        level[index] = image
+        if self.journal is not None:
+            for index in indices:
+                self.journal.append(index)
+
+    def flush(self, final: bool = True) -> bool:
+        """Write the chunks still waiting for frames, returning whether there were.
+
+        Called when the MDA ends (or is canceled): the frames never acquired are
+        left empty. Unless `final`, the rest of their frames are buffered (and
+        written) as they come, e.g. to free memory during the MDA.
+        """
+        if self._buffer is None:
+            return False
+        chunks = self._buffer.drain(final)
+        for chunk in chunks:
+            self._write_chunk(chunk)
+        return bool(chunks)
+
+    def track_buffered(self, callback: Callable[[int, int], None]) -> None:
+        """Call `callback(frames, nbytes)` as frames enter and leave the buffer.
+
+        See `_ChunkBuffer.on_change`.
+        """
+        if self._buffer is not None:
+            self._buffer.on_change = callback
+
+    def start_journal(self, header: dict[str, Any]) -> None:
+        """Record the frames written from now on, to recover them after a crash.
+
+        `header` (JSON-serializable) describes the layer. Only temporary data on
+        disk is journaled: the others are either kept or lost anyway.
+        """
+
+    def write_metadata(
+        self, name: str, axes: Sequence[str], scale: Sequence[float], unit: str | None
+    ) -> None:
+        """Record the layer name, axes and scale along with the data (if kept)."""
+
+    def write_frames(self, frames: np.ndarray) -> None:
+        """Store the per-frame metadata table (`FrameTable.data`) next to the data.
+
+        Only storage that is kept after `close` stores it.
+        """
+
+    def close(self) -> None:
+        """Release the array and any resources (files, handles) it uses."""
+
+
+class TempZarrStorage(LayerStorage):
+    """Zarr arrays (one per level) in a temporary directory, deleted on `close`.
+
+    The temporary directory is created in `directory`, by default the system one,
+    and deleted in the background. Chunks spanning several frames (`chunks`
+    larger than 1 along the axes before the frame axes, see `_chunk_buffer`) are
+    written once complete, and so are `shards` (see `_open_levels`).
+    """
+
+    def __init__(
+        self,
+        shape: Sequence[int],
+        dtype: str,
+        chunks: Sequence[int],
+        zarr_kwargs: dict[str, Any] | None = None,
+        n_levels: int = 1,
+        directory: str | None = None,
+        frame_ndim: int | None = None,
+        shards: Sequence[int] | None = None,
+    ) -> None:
+        self._tmp = make_scratch_dir(directory)
+        self.levels = _open_levels(
+            Path(self._tmp), shape, dtype, chunks, zarr_kwargs, n_levels, shards
+        )
+        self.path = str(Path(self._tmp, "0"))
+        self.chunks = _write_unit(self.array)
+        self._buffer = _chunk_buffer(shape, self.chunks, frame_ndim)
+
+    def start_journal(self, header: dict[str, Any]) -> None:
+        header = {**header, "levels": len(self.levels), "dtype": str(self.array.dtype)}
+        self.journal = _Journal(self._tmp, header)
+
+    def close(self) -> None:
+        if self.journal is not None:
+            self.journal.discard()
+        for level in self.levels:
+            level.store.close()
+        # deleting many chunk files is slow: don't block the caller
+        reap(self._tmp)
+
+
+class OMEZarrStorage(LayerStorage):
+    """The "0", "1"... level arrays of an OME-Zarr image group, kept on `close`.
+
+    Like `TempZarrStorage`, chunks spanning several frames (and shards) are
+    written once complete.
+    """
+
+    persistent = True
+
+    def __init__(
+        self,
+        group_path: str | Path,
+        shape: Sequence[int],
+        dtype: str,
+        chunks: Sequence[int],
+        zarr_kwargs: dict[str, Any] | None = None,
+        n_levels: int = 1,
+        frame_ndim: int | None = None,
+        shards: Sequence[int] | None = None,
+        dimension_names: Sequence[str] | None = None,
+    ) -> None:
+        self._group_path = Path(group_path)
+        zarr.open_group(str(self._group_path), mode="w-")
+        self.levels = _open_levels(
+            self._group_path,
+            shape,
+            dtype,
+            chunks,
+            zarr_kwargs,
+            n_levels,
+            shards,
+            dimension_names,
+        )
+        self.path = str(self._group_path / "0")
+        self.chunks = _write_unit(self.array)
+        self._buffer = _chunk_buffer(shape, self.chunks, frame_ndim)
+
+    def write_metadata(
+        self, name: str, axes: Sequence[str], scale: Sequence[float], unit: str | None
+    ) -> None:
+        if not _is_ngff_image(axes):
+            # e.g. the layers of generator MDAs, whose axes are only known as
+            # frames arrive (see `OMEZarrImagesStorage` for the others)
+            warnings.warn(
+                f"{name!r} has axes {list(axes)}, it is not written as an "
+                "OME-NGFF image.",
+                stacklevel=2,
+            )
+            return
+        _write_ngff_metadata(
+            self._group_path, name, axes, scale, unit, n_levels=len(self.levels)
+        )
+
+    def write_frames(self, frames: np.ndarray) -> None:
+        np.save(self._group_path / FRAMES_FILE, frames)
+
+    def close(self) -> None:
+        for level in self.levels:
+            level.store.close()
+
+
+class MemoryStorage(LayerStorage):
+    """Preallocated in-memory NumPy arrays (one per level)."""
+
+    def __init__(
+        self, shape: Sequence[int], dtype: str, chunks: Sequence[int], n_levels: int = 1
+    ) -> None:
+        self.levels = [
+            np.zeros(s, dtype=dtype) for s in _pyramid_shapes(shape, n_levels)
+        ]
+        self.chunks = tuple(chunks)
+
+    def close(self) -> None:
+        # the layer may still hold the arrays, but we no longer need them
+        self.levels = []
+
+
+class GrowableStorage(LayerStorage):
+    """Zarr storage (temporary or OME-Zarr) whose leading axes grow as frames arrive.
+
+    For acquisitions of unknown shape (e.g. a `GeneratorMDASequence`): the
+    arrays are resized in amortized blocks (doubling each axis that is too
+    short), then `trim`med to what was written.
+
+    Parameters
+    ----------
+    storage : TempZarrStorage | OMEZarrStorage
+        The storage to grow, created with a size of 1 along its leading axes.
+    n_axes : int
+        Number of leading (non Y, X, RGB) axes.
+    """
+
+    def __init__(self, storage: LayerStorage, n_axes: int) -> None:
+        self._storage = storage
+        self.levels = storage.levels
+        self.chunks = storage.chunks
+        self.path = storage.path
+        self.persistent = storage.persistent
+        self.n_axes = n_axes
+        # number of written planes along each leading axis
+        self.extent = [0] * n_axes
+        self._lock = threading.Lock()
+
+    def grow(self, index: Sequence[int]) -> bool:
+        """Make room for a frame at `index`, returning whether the arrays grew.
+
+        Call it before writing the frame, from a single thread.
+        """
+        with self._lock:
+            n = self.n_axes
+            self.extent = [
+                max(e, i + 1) for e, i in zip(self.extent, index, strict=True)
+            ]
+            shape = self.array.shape[:n]
+            if all(i < s for i, s in zip(index, shape, strict=True)):
+                return False
+            grown = tuple(max(i + 1, 2 * s) for i, s in zip(index, shape, strict=True))
+            for level in self.levels:
+                level.resize((*grown, *level.shape[n:]))
+            return True
+
+    def trim(self) -> None:
+        """Shrink the arrays to the planes written (if any)."""
+        with self._lock:
+            if 0 in self.extent:
+                return
+            for level in self.levels:
+                level.resize((*self.extent, *level.shape[self.n_axes :]))
+
+    def write(self, index: tuple[int, ...], image: np.ndarray) -> bool:
+        # (journaled by the wrapped storage)
+        return self._storage.write(index, image)
+
+    def flush(self, final: bool = True) -> bool:
+        return self._storage.flush(final)
+
+    def track_buffered(self, callback: Callable[[int, int], None]) -> None:
+        self._storage.track_buffered(callback)
+
+    def start_journal(self, header: dict[str, Any]) -> None:
+        self._storage.start_journal(header)
+
+    def write_metadata(
+        self, name: str, axes: Sequence[str], scale: Sequence[float], unit: str | None
+    ) -> None:
+        self._storage.write_metadata(name, axes, scale, unit)
+
+    def write_frames(self, frames: np.ndarray) -> None:
+        self._storage.write_frames(frames)
+
+    def close(self) -> None:
+        self._storage.close()
+
+
+def _expand_key(key: Any, ndim: int) -> tuple[int | slice, ...]:
+    """Return `key` as one int or slice per axis, expanding `...` and missing axes."""
+    if not isinstance(key, tuple):
+        key = (key,)
+    if any(k is Ellipsis for k in key):
+        i = next(i for i, k in enumerate(key) if k is Ellipsis)
+        fill = (slice(None),) * (ndim - len(key) + 1)
+        key = key[:i] + fill + key[i + 1 :]
+    key += (slice(None),) * (ndim - len(key))
+    return tuple(k if isinstance(k, slice) else int(k) for k in key)
+
+
+class _RaggedArray:
+    """Read-only view stacking arrays of different shapes along a position axis.
+
+    The view has the largest size of the parts along each axis, and reads as
+    zeros where a part is smaller: the padding is never stored.
+
+    Parameters
+    ----------
+    parts : Sequence[Any]
+        One array per position, with the same number of dimensions (without the
+        position axis).
+    p_axis : int
+        Index of the position axis in the view.
+    shape : Sequence[int]
+        Shape of the view.
+    dtype : Any
+        Data type of the parts.
+    """
+
+    def __init__(
+        self, parts: Sequence[Any], p_axis: int, shape: Sequence[int], dtype: Any
+    ) -> None:
+        self.parts = list(parts)
+        self.p_axis = p_axis
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __array__(self, dtype: Any = None, copy: bool | None = None) -> np.ndarray:
+        data = self[...]
+        return data if dtype is None else data.astype(dtype)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        key = _expand_key(key, self.ndim)
+        ranges: list[range | None] = []
+        for k, n in zip(key, self.shape, strict=False):
+            if isinstance(k, slice):
+                start, stop, step = k.indices(n)
+                if step < 0:
+                    raise IndexError("negative steps are not supported")
+                ranges.append(range(start, stop, step))
+            else:
+                ranges.append(None)
+        out = np.zeros([len(r) for r in ranges if r is not None], dtype=self.dtype)
+
+        p_key = key[self.p_axis]
+        p_range = ranges[self.p_axis]
+        positions = (
+            list(p_range) if p_range is not None else [p_key % self.shape[self.p_axis]]
+        )
+        for j, p in enumerate(positions):
+            part = self.parts[p]
+            part_key: list[int | slice] = []
+            out_key: list[int | slice] = []
+            for ax, (k, r) in enumerate(zip(key, ranges, strict=False)):
+                if ax == self.p_axis:
+                    if r is not None:
+                        out_key.append(j)
+                    continue
+                n = part.shape[ax - (ax > self.p_axis)]
+                if r is None:
+                    i = int(k) % self.shape[ax]
+                    if i >= n:
+                        break  # outside of this part: zeros
+                    part_key.append(i)
+                else:
+                    # the requested indices that exist in this part
+                    sub = r[: len(range(r.start, min(r.stop, n), r.step))]
+                    if not sub:
+                        break
+                    part_key.append(slice(sub.start, sub.stop, sub.step))
+                    out_key.append(slice(0, len(sub)))
+            else:
+                out[tuple(out_key)] = part[tuple(part_key)]
+        return out
+
+
+class RaggedStorage(LayerStorage):
+    """One storage per stage position, each with the shape that is acquired there.
+
+    The layer shows them through a `_RaggedArray` padded to the largest position,
+    so the padding costs neither disk nor memory.
+
+    Parameters
+    ----------
+    parts : Sequence[LayerStorage]
+        Storage of each position (without the position axis).
+    p_axis : int
+        Index of the position axis in the layer.
+    shape : Sequence[int]
+        Shape of the layer, i.e. the largest size of the parts along each axis.
+    chunks : Sequence[int]
+        Chunks of the layer.
+    path : str
+        Directory holding all the parts, if any.
+    tmp : str | None
+        Temporary directory holding the parts (see `make_scratch_dir`), deleted
+        in the background on `close`.
+    """
+
+    def __init__(
+        self,
+        parts: Sequence[LayerStorage],
+        p_axis: int,
+        shape: Sequence[int],
+        chunks: Sequence[int],
+        path: str = "",
+        tmp: str | None = None,
+    ) -> None:
+        self.parts = list(parts)
+        self.p_axis = p_axis
+        self.chunks = tuple(chunks)
+        self.path = path
+        self.persistent = any(part.persistent for part in self.parts)
+        self._tmp = tmp
+        dtype = self.parts[0].array.dtype
+        self.levels = [
+            _RaggedArray([part.levels[k] for part in self.parts], p_axis, s, dtype)
+            for k, s in enumerate(_pyramid_shapes(shape, len(self.parts[0].levels)))
+        ]
+
+    def write(self, index: tuple[int, ...], image: np.ndarray) -> bool:
+        p = self.p_axis
+        # (journaled by the part, once the frame is in its arrays)
+        return self.parts[index[p]].write(index[:p] + index[p + 1 :], image)
+
+    def flush(self, final: bool = True) -> bool:
+        # (every part, not only up to the first with chunks to write)
+        flushed = [part.flush(final) for part in self.parts]
+        return any(flushed)
+
+    def track_buffered(self, callback: Callable[[int, int], None]) -> None:
+        for part in self.parts:
+            part.track_buffered(callback)
+
+    def start_journal(self, header: dict[str, Any]) -> None:
+        if self._tmp is None:
+            return
+        header = {
+            **header,
+            "levels": len(self.levels),
+            "dtype": str(self.array.dtype),
+            "full_shape": list(self.array.shape),
+            "p_axis": self.p_axis,
+            # the temporary directory of each part, relative to ours
+            "parts": [
+                os.path.relpath(Path(p.path).parent, self._tmp) for p in self.parts
+            ],
+        }
+        self.journal = _Journal(self._tmp, header)
+        for i, part in enumerate(self.parts):
+            part.journal = _PartJournal(self.journal, self.p_axis, i)
+
+    def write_metadata(
+        self, name: str, axes: Sequence[str], scale: Sequence[float], unit: str | None
+    ) -> None:
+        p = self.p_axis
+        axes, scale = [*axes[:p], *axes[p + 1 :]], [*scale[:p], *scale[p + 1 :]]
+        for i, part in enumerate(self.parts):
+            part.write_metadata(f"{name}_p{i:03d}", axes, scale, unit)
+
+    def write_frames(self, frames: np.ndarray) -> None:
+        # one table for all the positions, next to their groups
+        if self.persistent and self.path:
+            np.save(Path(self.path, FRAMES_FILE), frames)
+
+    def close(self) -> None:
+        if self.journal is not None:
+            self.journal.discard()
+        for part in self.parts:
+            part.close()
+        if self._tmp is not None:
+            reap(self._tmp)
+
+
+def _field_name(axes: Sequence[str], field: Sequence[int]) -> str:
+    """Name of the image of a field, e.g. "p001_g002" (or "" for the only one)."""
+    return "_".join(f"{ax}{i:03d}" for ax, i in zip(axes, field, strict=True))
+
+
+class _FieldsArray:
+    """Read-only view of OME-Zarr images (one per field) as one array.
+
+    The images have the (T, C, Z, Y, X) axes of the view, in this order, and the
+    view also has the axes along which they are split (fields, e.g. positions
+    and grid tiles), and the order of the acquisition. Like `_RaggedArray`, it
+    reads as zeros where an image is smaller than the view, or missing.
+
+    Parameters
+    ----------
+    images : Mapping[tuple[int, ...], Any]
+        The array of each field, by its index along the field axes.
+    field_axes : Sequence[int]
+        Indices of the field axes in the view.
+    image_axes : Sequence[int]
+        Index in the view of each axis of the images.
+    shape : Sequence[int]
+        Shape of the view.
+    dtype : Any
+        Data type of the images.
+    """
+
+    def __init__(
+        self,
+        images: Mapping[tuple[int, ...], Any],
+        field_axes: Sequence[int],
+        image_axes: Sequence[int],
+        shape: Sequence[int],
+        dtype: Any,
+    ) -> None:
+        self.images = dict(images)
+        self.field_axes = tuple(field_axes)
+        self.image_axes = tuple(image_axes)
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __array__(self, dtype: Any = None, copy: bool | None = None) -> np.ndarray:
+        data = self[...]
+        return data if dtype is None else data.astype(dtype)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        key = _expand_key(key, self.ndim)
+        ranges: list[range | None] = []
+        for k, n in zip(key, self.shape, strict=False):
+            if isinstance(k, slice):
+                start, stop, step = k.indices(n)
+                if step < 0:
+                    raise IndexError("negative steps are not supported")
+                ranges.append(range(start, stop, step))
+            else:
+                ranges.append(None)
+        out = np.zeros([len(r) for r in ranges if r is not None], dtype=self.dtype)
+        # the view axes kept in `out`, and the image axes among them
+        kept = [ax for ax, r in enumerate(ranges) if r is not None]
+        kept_image_axes = [ax for ax in self.image_axes if ranges[ax] is not None]
+        to_view_order = np.argsort(kept_image_axes)
+
+        field_values = [
+            list(enumerate(r)) if (r := ranges[ax]) is not None else [(0, None)]
+            for ax in self.field_axes
+        ]
+        for values in product(*field_values):
+            field = tuple(
+                int(key[ax]) % self.shape[ax] if i is None else i
+                for ax, (_, i) in zip(self.field_axes, values, strict=True)
+            )
+            if (image := self.images.get(field)) is None:
+                continue
+            image_key: list[int | slice] = []
+            out_key: list[int | slice] = [0] * len(kept)
+            for ax, (j, i) in zip(self.field_axes, values, strict=True):
+                if i is not None:
+                    out_key[kept.index(ax)] = j
+            for ax, n in zip(self.image_axes, image.shape, strict=True):
+                k, r = key[ax], ranges[ax]
+                if r is None:
+                    i = int(k) % self.shape[ax]
+                    if i >= n:
+                        break  # outside of this image: zeros
+                    image_key.append(i)
+                else:
+                    # the requested indices that exist in this image
+                    sub = r[: len(range(r.start, min(r.stop, n), r.step))]
+                    if not sub:
+                        break
+                    image_key.append(slice(sub.start, sub.stop, sub.step))
+                    out_key[kept.index(ax)] = slice(0, len(sub))
+            else:
+                data = np.asarray(image[tuple(image_key)])
+                out[tuple(out_key)] = data.transpose(to_view_order)
+        return out
+
+
+class OMEZarrImagesStorage(LayerStorage):
+    """OME-Zarr images of a layer, one per field (e.g. stage position, grid tile).
+
+    OME-NGFF images have at most (T, C, Z, Y, X) axes, in this order: the layer
+    is split along its other axes (e.g. "p" and "g", or the RGB components),
+    each field being an image group named after its index (e.g. "p001_g002"),
+    whose axes are the T, C and Z axes of the layer, reordered. A layer without
+    such axes is a single image, in `group_path` itself. The layer shows them
+    through a `_FieldsArray`.
+
+    Parameters
+    ----------
+    group_path : str | Path
+        Path of the group holding the images.
+    axes : Sequence[str]
+        Labels of the leading (non Y, X, RGB) axes of the layer.
+    shape : Sequence[int]
+        Shape of the layer.
+    dtype : str
+        Data type of the images.
+    chunks : Sequence[int]
+        Chunks of the layer (1 along the field axes).
+    zarr_kwargs : dict[str, Any] | None
+        Compression kwargs of the arrays (see `_compression_kwargs`).
+    n_levels : int
+        Number of resolution levels, by default 1.
+    shards : Sequence[int] | None
+        Shards of the layer (see `_open_levels`), if any.
+    part_shapes : Sequence[Sequence[int]] | None
+        Leading shape (without "p") of each stage position whose sub-sequences
+        differ in size (see `_position_shapes`), by default that of the layer.
+    """
+
+    persistent = True
+
+    def __init__(
+        self,
+        group_path: str | Path,
+        axes: Sequence[str],
+        shape: Sequence[int],
+        dtype: str,
+        chunks: Sequence[int],
+        zarr_kwargs: dict[str, Any] | None = None,
+        n_levels: int = 1,
+        shards: Sequence[int] | None = None,
+        part_shapes: Sequence[Sequence[int]] | None = None,
+    ) -> None:
+        self._group_path = Path(group_path)
+        self.path = str(self._group_path)
+        n = len(axes)
+        rgb = len(shape) - n == 3
+        labels = [*axes, "y", "x", "rgb"] if rgb else [*axes, "y", "x"]
+        self._labels = labels
+        self._field_axes = [
+            i for i, ax in enumerate(labels) if ax not in (*NGFF_AXES, "y", "x")
+        ]
+        self._lead_axes = [labels.index(ax) for ax in NGFF_AXES if ax in axes]
+        self._image_axes = [*self._lead_axes, n, n + 1]
+        self.chunks = tuple(
+            1 if i in self._field_axes else c for i, c in enumerate(chunks)
+        )
+
+        def image_order(values: Sequence[int]) -> list[int]:
+            return [values[i] for i in self._image_axes]
+
+        if self._field_axes:
+            zarr.open_group(self.path, mode="w-")
+        p = labels.index("p") if "p" in labels else None
+        self.images: dict[tuple[int, ...], OMEZarrStorage] = {}
+        fields = product(*(range(shape[i]) for i in self._field_axes))
+        for field in fields:
+            image_shape = list(shape)
+            if part_shapes is not None and p is not None:
+                # the size of this position along the other axes
+                part = list(part_shapes[field[self._field_axes.index(p)]])
+                image_shape[:n] = [*part[:p], shape[p], *part[p:]]
+                if any(
+                    i >= image_shape[ax]
+                    for ax, i in zip(self._field_axes, field, strict=True)
+                ):
+                    continue  # e.g. a grid tile that this position does not have
+            name = _field_name([labels[i] for i in self._field_axes], field)
+            self.images[field] = OMEZarrStorage(
+                self._group_path / name if name else self._group_path,
+                image_order(image_shape),
+                dtype,
+                image_order(chunks),
+                zarr_kwargs,
+                n_levels,
+                frame_ndim=2,
+                shards=image_order(shards) if shards is not None else None,
+                dimension_names=[labels[i] for i in self._image_axes],
+            )
+        self.levels = [
+            _FieldsArray(
+                {f: image.levels[k] for f, image in self.images.items()},
+                self._field_axes,
+                self._image_axes,
+                level_shape,
+                dtype,
+            )
+            for k, level_shape in enumerate(_pyramid_shapes(shape, n_levels))
+        ]
+
+    def write(self, index: tuple[int, ...], image: np.ndarray) -> bool:
+        field = [index[i] for i in self._field_axes if i < len(index)]
+        lead = tuple(index[i] for i in self._lead_axes)
+        if image.ndim == 2:
+            return self.images[tuple(field)].write(lead, image)
+        # each RGB component is an image of its own
+        written = [
+            self.images[(*field, rgb)].write(lead, image[..., rgb])
+            for rgb in range(image.shape[-1])
+        ]
+        return all(written)
+
+    def flush(self, final: bool = True) -> bool:
+        # (every image, not only up to the first with chunks to write)
+        flushed = [image.flush(final) for image in self.images.values()]
+        return any(flushed)
+
+    def track_buffered(self, callback: Callable[[int, int], None]) -> None:
+        for image in self.images.values():
+            image.track_buffered(callback)
+
+    def write_metadata(
+        self, name: str, axes: Sequence[str], scale: Sequence[float], unit: str | None
+    ) -> None:
+        image_axes = [axes[i] for i in self._image_axes]
+        image_scale = [scale[i] for i in self._image_axes]
+        field_labels = [self._labels[i] for i in self._field_axes]
+        for field, image in self.images.items():
+            suffix = _field_name(field_labels, field)
+            image_name = f"{name}_{suffix}" if suffix else name
+            image.write_metadata(image_name, image_axes, image_scale, unit)
+
+    def write_frames(self, frames: np.ndarray) -> None:
+        # one table for all the images, next to them
+        np.save(self._group_path / FRAMES_FILE, frames)
+
+    def close(self) -> None:
+        for image in self.images.values():
+            image.close()
+
+
+class _ChannelView:
+    """Read-only view of one index along an axis (the channel) of an array.
+
+    For arrays that are not NumPy arrays (e.g. zarr), whose indexing copies:
+    only the requested part of the channel is read.
+
+    Parameters
+    ----------
+    array : Any
+        The array with a channel axis.
+    c_axis : int
+        Index of the channel axis in `array`.
+    channel : int
+        Index of the channel shown by the view.
+    """
+
+    def __init__(self, array: Any, c_axis: int, channel: int) -> None:
+        self.base = array
+        self.c_axis = c_axis
+        self.channel = channel
+        self.shape: tuple[int, ...] = tuple(
+            array.shape[:c_axis] + array.shape[c_axis + 1 :]
+        )
+        self.dtype = np.dtype(array.dtype)
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __array__(self, dtype: Any = None, copy: bool | None = None) -> np.ndarray:
+        data = self[...]
+        return data if dtype is None else data.astype(dtype)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        key = _expand_key(key, self.ndim)
+        c = self.c_axis
+        return np.asarray(self.base[(*key[:c], self.channel, *key[c:])])
+
+
+def _channel_level(level: Any, c_axis: int, channel: int) -> Any:
+    """A view of one channel of a level array, without copying it."""
+    if isinstance(level, np.ndarray):
+        return level[(slice(None),) * c_axis + (channel,)]
+    return _ChannelView(level, c_axis, channel)
+
+
+class _ChannelGroup:
+    """The storage shared by the `ChannelStorage` of each channel."""
+
+    def __init__(self, storage: LayerStorage, c_axis: int, n_channels: int) -> None:
+        self.storage = storage
+        self.c_axis = c_axis
+        self.n_open = n_channels
+        # channel -> frame table, stored as one table once all have one
+        self.frames: dict[int, np.ndarray] = {}
+        self.lock = threading.Lock()
+
+
+class ChannelStorage(LayerStorage):
+    """One channel of a storage with a channel axis, shown as a layer of its own.
+
+    In split channels mode all the channels are stored in a single array (one
+    temporary directory, or OME-Zarr image group), so that splitting them is a
+    display choice that does not multiply the files and stores. Create them
+    with `split_channels`; the array is closed with the last channel.
+    """
+
+    def __init__(self, group: _ChannelGroup, channel: int) -> None:
+        self._group = group
+        self.channel = channel
+        storage, c = group.storage, group.c_axis
+        self.levels = [_channel_level(level, c, channel) for level in storage.levels]
+        self.chunks = storage.chunks[:c] + storage.chunks[c + 1 :]
+        self.path = storage.path
+        self.persistent = storage.persistent
+
+    def write(self, index: tuple[int, ...], image: np.ndarray) -> bool:
+        c = self._group.c_axis
+        return self._group.storage.write((*index[:c], self.channel, *index[c:]), image)
+
+    def write_key(self, index: tuple[int, ...]) -> Hashable:
+        c = self._group.c_axis
+        return self._group.storage.write_key((*index[:c], self.channel, *index[c:]))
+
+    def flush(self, final: bool = True) -> bool:
+        return self._group.storage.flush(final)
+
+    def track_buffered(self, callback: Callable[[int, int], None]) -> None:
+        self._group.storage.track_buffered(callback)
+
+    def write_frames(self, frames: np.ndarray) -> None:
+        group = self._group
+        with group.lock:
+            group.frames[self.channel] = frames
+            if len(group.frames) < group.n_open:
+                return
+            tables = [group.frames[ch] for ch in sorted(group.frames)]
+        group.storage.write_frames(_with_channel_column(tables, group.c_axis))
+
+    def close(self) -> None:
+        group = self._group
+        with group.lock:
+            group.n_open -= 1
+            last = group.n_open == 0
+        if last:
+            group.storage.close()
+
+
+def split_channels(
+    storage: LayerStorage, c_axis: int, n_channels: int
+) -> list[ChannelStorage]:
+    """Return a zero-copy `ChannelStorage` for each channel of `storage`."""
+    group = _ChannelGroup(storage, c_axis, n_channels)
+    return [ChannelStorage(group, ch) for ch in range(n_channels)]
+
+
+def _with_channel_column(tables: Sequence[np.ndarray], c_axis: int) -> np.ndarray:
+    """Concatenate the frame tables of each channel, with a "c" index column."""
+    names = tables[0].dtype.names or ()
+    fields = [(name, tables[0].dtype[name]) for name in names]
+    dtype = np.dtype([*fields[:c_axis], ("c", "i4"), *fields[c_axis:]])
+    merged = np.zeros(sum(len(t) for t in tables), dtype=dtype)
+    start = 0
+    for channel, table in enumerate(tables):
+        rows = merged[start : start + len(table)]
+        for name in names:
+            rows[name] = table[name]
+        rows["c"] = channel
+        start += len(table)
+    return merged
+
+
+class RecoveredStorage(LayerStorage):
+    """The temporary arrays of a layer of a crashed session, reopened from its journal.
+
+    The directory is taken over by this process (renamed with its prefix) and
+    deleted on `close`, or recovered again if this session crashes too.
+
+    Parameters
+    ----------
+    directory : str | Path
+        Temporary directory of the layer, holding a `JOURNAL_FILE`.
+
+    Attributes
+    ----------
+    header : dict[str, Any]
+        The journal header, e.g. "name", "sequence" (JSON) and "axes" of the layer.
+    written : np.ndarray
+        Index of each written frame, one row per frame in the order written.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        directory = Path(directory)
+        self._tmp = str(
+            directory.with_name(scratch_prefix() + directory.name.split("-", 2)[-1])
+        )
+        os.replace(directory, self._tmp)
+        self.header = json.loads(Path(self._tmp, JOURNAL_FILE).read_text())
+        ndim = len(self.header["shape"])
+        raw = Path(self._tmp, JOURNAL_INDEX_FILE).read_bytes()
+        # (the last record may have been cut by the crash)
+        n = len(raw) // (4 * ndim)
+        self.written = np.frombuffer(raw[: n * 4 * ndim], "<i4").reshape(n, ndim)
+
+        n_levels = self.header["levels"]
+        if (parts := self.header.get("parts")) is None:
+            self._stores = self.levels = [
+                zarr.open(str(Path(self._tmp, str(k))), mode="r+")
+                for k in range(n_levels)
+            ]
+            self.path = str(Path(self._tmp, "0"))
+        else:
+            part_levels = [
+                [
+                    zarr.open(str(Path(self._tmp, part, str(k))), mode="r+")
+                    for k in range(n_levels)
+                ]
+                for part in parts
+            ]
+            self._stores = [level for levels in part_levels for level in levels]
+            shapes = _pyramid_shapes(self.header["full_shape"], n_levels)
+            self.levels = [
+                _RaggedArray(
+                    [levels[k] for levels in part_levels],
+                    self.header["p_axis"],
+                    shape,
+                    self.header["dtype"],
+                )
+                for k, shape in enumerate(shapes)
+            ]
+            self.path = self._tmp
+        self.chunks = (1,) * ndim + tuple(self.array.shape[ndim:])
+
+    def close(self) -> None:
+        for store in self._stores:
+            store.store.close()
+        with contextlib.suppress(FileNotFoundError):
+            Path(self._tmp, JOURNAL_FILE).unlink()
+        reap(self._tmp)
+
+
+def _find_journals(directories: Sequence[str | Path]) -> list[Path]:
+    """Return the journaled temporary directories of sessions no longer running."""
+    return [
+        path
+        for path in find_orphans(directories)
+        if path.is_dir() and (path / JOURNAL_FILE).is_file()
+    ]
+
+
+def _recoverable(directories: Sequence[str | Path]) -> list[tuple[str, int]]:
+    """Return the layer name and size of the journaled data of crashed sessions."""
+    found = []
+    for path in _find_journals(directories):
+        try:
+            name = json.loads((path / JOURNAL_FILE).read_text())["name"]
+            found.append((str(name), _dir_size(path)))
+        except (OSError, ValueError, KeyError):
+            continue  # being deleted or recovered, or not a layer journal
+    return found
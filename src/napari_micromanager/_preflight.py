@@ -0,0 +1,207 @@
+"""Pre-flight check that an MDA fits on, and can be written fast enough to, disk."""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# bytes written by the bandwidth probe, in blocks of PROBE_BLOCK bytes
+PROBE_BYTES = 32 * 2**20
+PROBE_BLOCK = 4 * 2**20
+# seconds a measured write rate is reused for the same directory
+PROBE_TTL = 600.0
+
+# directory -> (time of the probe, measured write rate in bytes/s)
+_PROBES: dict[Path, tuple[float, float]] = {}
+# directories being probed in the background
+_PROBING: set[Path] = set()
+_PROBING_LOCK = threading.Lock()
+
+
+def probe_write_rate(directory: str | Path, n_bytes: int = PROBE_BYTES) -> float:
+    """Return the rate (bytes/s) at which `n_bytes` can be written to `directory`.
+
+    The data is written to a temporary file, synced to disk and removed. The
+    result is cached for `PROBE_TTL` seconds.
+    """
+    directory = Path(directory).resolve()
+    now = time.monotonic()
+    if (cached := _PROBES.get(directory)) and now - cached[0] < PROBE_TTL:
+        return cached[1]
+
+    block = np.random.default_rng().bytes(min(n_bytes, PROBE_BLOCK))
+    t0 = time.perf_counter()
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=".nmm-probe-") as f:
+        for _ in range(max(n_bytes // len(block), 1)):
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+        elapsed = time.perf_counter() - t0
+        written = f.tell()
+    rate = written / elapsed if elapsed > 0 else math.inf
+    _PROBES[directory] = (now, rate)
+    return rate
+
+
+def cached_write_rate(directory: str | Path) -> float | None:
+    """Return the write rate of `directory` if probed less than `PROBE_TTL` ago."""
+    cached = _PROBES.get(Path(directory).resolve())
+    if cached is None or time.monotonic() - cached[0] >= PROBE_TTL:
+        return None
+    return cached[1]
+
+
+def probe_in_background(
+    directory: str | Path, n_bytes: int = PROBE_BYTES
+) -> threading.Thread | None:
+    """Run `probe_write_rate` in a daemon thread, unless its result is cached.
+
+    Writing and syncing the probe takes seconds on slow or network disks, too
+    long to block the GUI. Returns the thread, or None if the rate is cached or
+    already being probed.
+    """
+    directory = Path(directory).resolve()
+    with _PROBING_LOCK:
+        if cached_write_rate(directory) is not None or directory in _PROBING:
+            return None
+        _PROBING.add(directory)
+
+    def _probe() -> None:
+        try:
+            probe_write_rate(directory, n_bytes)
+        except OSError as e:
+            logger.warning("Could not measure the write rate of %s: %s", directory, e)
+        finally:
+            with _PROBING_LOCK:
+                _PROBING.discard(directory)
+
+    thread = threading.Thread(target=_probe, name="nmm-probe", daemon=True)
+    thread.start()
+    return thread
+
+
+@dataclass
+class StorageEstimate:
+    """Size and data rate of an MDA, against the room and speed of its storage.
+
+    Attributes
+    ----------
+    n_frames : int
+        Number of frames stored.
+    n_bytes : int
+        Uncompressed size of the stored data (including pyramid levels).
+    duration : float
+        Estimated duration of the acquisition in seconds (0 if unknown).
+    directory : Path | None
+        Directory the data is written to, or None if it is kept in memory.
+    free_bytes : int
+        Free space in `directory`.
+    write_rate : float | None
+        Measured write bandwidth of `directory`, in bytes/s (None if not measured
+        yet).
+    compressed : bool
+        Whether the data is compressed, i.e. may take less than `n_bytes`.
+    """
+
+    n_frames: int
+    n_bytes: int
+    duration: float
+    directory: Path | None = None
+    free_bytes: int = 0
+    write_rate: float | None = None
+    compressed: bool = False
+
+    @classmethod
+    def measure(
+        cls,
+        n_frames: int,
+        n_bytes: int,
+        duration: float,
+        directory: str | Path | None,
+        compressed: bool = False,
+    ) -> StorageEstimate:
+        """Measure the free space and write rate of `directory` (if any).
+
+        The write rate is that probed in the background (see
+        `probe_in_background`), which is started if it is not cached: until it
+        is measured, `problems` reports it as unknown.
+        """
+        if directory is None:
+            return cls(n_frames, n_bytes, duration, compressed=compressed)
+        directory = Path(directory)
+        if (write_rate := cached_write_rate(directory)) is None:
+            probe_in_background(directory)
+        return cls(
+            n_frames,
+            n_bytes,
+            duration,
+            directory,
+            shutil.disk_usage(directory).free,
+            write_rate,
+            compressed,
+        )
+
+    @property
+    def data_rate(self) -> float:
+        """Average rate (bytes/s) at which the MDA produces data (0 if unknown)."""
+        return self.n_bytes / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def fits(self) -> bool:
+        """Whether the uncompressed data fits in the free space of `directory`."""
+        return self.directory is None or self.n_bytes <= self.free_bytes
+
+    @property
+    def keeps_up(self) -> bool:
+        """Whether `directory` can be written as fast as the MDA produces data.
+
+        False while the write rate of `directory` is not measured, unless the
+        MDA has no data rate to keep up with.
+        """
+        if self.directory is None or self.data_rate == 0:
+            return True
+        return self.write_rate is not None and self.data_rate <= self.write_rate
+
+    def problems(self) -> list[str]:
+        """Describe why the MDA may not fit or keep up (empty if it should)."""
+        problems = []
+        if not self.fits:
+            maybe = "may not fit" if self.compressed else "will not fit"
+            problems.append(
+                f"The {_fmt_bytes(self.n_bytes)} of data {maybe} in the "
+                f"{_fmt_bytes(self.free_bytes)} free in {self.directory}."
+            )
+        if self.keeps_up:
+            return problems
+        if self.write_rate is None:
+            problems.append(
+                f"The data is acquired at {_fmt_bytes(self.data_rate)}/s but the "
+                f"write speed of {self.directory} is not measured yet: frames may "
+                "pile up in memory."
+            )
+        else:
+            problems.append(
+                f"The data is acquired at {_fmt_bytes(self.data_rate)}/s but "
+                f"{self.directory} is written at {_fmt_bytes(self.write_rate)}/s: "
+                "frames will pile up in memory."
+            )
+        return problems
+
+
+def _fmt_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
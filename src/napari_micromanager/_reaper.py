@@ -0,0 +1,160 @@
+"""Deletion of temporary MDA data in the background, and of crashed sessions' data."""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+logger = logging.getLogger(__name__)
+
+# temporary files and directories are named "nmm-<pid>-...", so that those left
+# behind by a session that crashed (or exited while deleting) can be found
+SCRATCH_PREFIX = "nmm-"
+# header of the journal of the frames written to a temporary directory: the
+# directories holding one are kept for recovery after a crash
+JOURNAL_FILE = "journal.json"
+# seconds after which journaled directories that were never recovered are deleted
+JOURNAL_MAX_AGE = 7 * 24 * 3600
+
+
+def scratch_prefix() -> str:
+    """Prefix of the temporary files and directories of this process."""
+    return f"{SCRATCH_PREFIX}{os.getpid()}-"
+
+
+def make_scratch_dir(directory: str | Path | None = None) -> str:
+    """Create a temporary directory in `directory` (by default the system one).
+
+    Unlike `tempfile.TemporaryDirectory`, nothing deletes it at exit: pass it to
+    `reap` when done with it.
+    """
+    return tempfile.mkdtemp(prefix=scratch_prefix(), dir=directory)
+
+
+class _Reaper:
+    """A daemon thread deleting the paths it is given, one after the other.
+
+    Deleting hundreds of GB of chunk files can take tens of seconds, which
+    would block the thread tearing down the viewer. Paths not deleted when the
+    process exits are removed by `reap_orphans` on the next startup.
+    """
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue[Path] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def reap(self, path: str | Path) -> None:
+        """Delete `path` (a file or a directory tree) in the background."""
+        self._queue.put(Path(path))
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="nmm-reaper", daemon=True
+                )
+                self._thread.start()
+
+    def join(self) -> None:
+        """Wait until all the paths given so far are deleted."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            path = self._queue.get()
+            try:
+                if path.is_dir() and not path.is_symlink():
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    with contextlib.suppress(FileNotFoundError):
+                        path.unlink()
+            except OSError as e:
+                logger.warning("Could not delete %s: %s", path, e)
+            finally:
+                self._queue.task_done()
+
+
+_REAPER = _Reaper()
+
+
+def reap(path: str | Path) -> None:
+    """Delete `path` (a file or a directory tree) in a background thread."""
+    _REAPER.reap(path)
+
+
+def _pid_alive(pid: int) -> bool:
+    """Whether a process with this id is running."""
+    if pid == os.getpid():
+        return True
+    if sys.platform == "win32":
+        import ctypes
+
+        # PROCESS_QUERY_LIMITED_INFORMATION
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # running, as another user
+        return True
+    return True
+
+
+def find_orphans(directories: Iterable[str | Path]) -> list[Path]:
+    """Return the temporary data, in `directories`, of sessions no longer running."""
+    orphans = []
+    for directory in {Path(d) for d in directories}:
+        with contextlib.suppress(OSError):
+            for path in directory.glob(f"{SCRATCH_PREFIX}*"):
+                pid = path.name[len(SCRATCH_PREFIX) :].split("-", 1)[0]
+                if pid.isdigit() and not _pid_alive(int(pid)):
+                    orphans.append(path)
+    return orphans
+
+
+def _journal_age(path: Path) -> float | None:
+    """Seconds since the journal of `path` was written, or None without journal."""
+    try:
+        return time.time() - (path / JOURNAL_FILE).stat().st_mtime
+    except OSError:
+        return None
+
+
+def reap_orphans(
+    directories: Iterable[str | Path],
+    keep_journals: bool = True,
+    max_journal_age: float = JOURNAL_MAX_AGE,
+) -> list[Path]:
+    """Delete, in the background, the temporary data of sessions no longer running.
+
+    Directories with a `JOURNAL_FILE` are kept, to be recovered (see
+    `RecoveredStorage`), unless `keep_journals` is False or the journal is
+    older than `max_journal_age` seconds. Returns the paths that are being
+    deleted.
+    """
+    orphans = []
+    for path in find_orphans(directories):
+        age = _journal_age(path)
+        if keep_journals and age is not None and age < max_journal_age:
+            continue
+        orphans.append(path)
+    for path in orphans:
+        logger.info("Deleting temporary data of a previous session: %s", path)
+        reap(path)
+    return orphans
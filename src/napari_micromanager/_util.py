@@ -17,6 +17,13 @@ except ImportError:
     PYMMCW_METADATA_KEY = "pymmcore_widgets"
 
 
+# codecs that can be picked with the "compression" key of the NMM_METADATA_KEY
+# sequence metadata ("default" leaves the choice to zarr).
+COMPRESSION_CODECS = ("default", "none", "lz4", "zstd", "blosc")
+# (default, max) compression level of each codec that takes one
+COMPRESSION_LEVELS = {"lz4": (5, 9), "zstd": (3, 22), "blosc": (5, 9)}
+
+
 def get_full_sequence_axes(sequence: useq.MDASequence) -> tuple[str, ...]:
     """Get the combined axes from sequence and sub-sequences."""
     # axes main sequence
@@ -27,9 +34,10 @@ def get_full_sequence_axes(sequence: useq.MDASequence) -> tuple[str, ...]:
     sub_seq_axes: list = []
     for p in sequence.stage_positions:
         if p.sequence is not None:
-            sub_seq_axes.extend(
-                [ax for ax in p.sequence.used_axes if ax not in main_seq_axes]
-            )
+            # (positions often share the same sub-sequence axes)
+            for ax in p.sequence.used_axes:
+                if ax not in main_seq_axes and ax not in sub_seq_axes:
+                    sub_seq_axes.append(ax)
     return tuple(main_seq_axes + sub_seq_axes)
 
 
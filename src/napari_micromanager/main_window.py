@@ -3,6 +3,7 @@ from __future__ import annotations
 import atexit
 import contextlib
 import logging
+import tempfile
 import weakref
 from typing import TYPE_CHECKING, Any
 from warnings import warn
@@ -13,14 +14,21 @@ import napari.viewer
 from pymmcore_plus import CMMCorePlus
 
 from napari_micromanager._core_link import CoreViewerLink
+from napari_micromanager._gui_objects._latency_widget import LatencyWidget
 from napari_micromanager._gui_objects._toolbar import MicroManagerToolbar
+from napari_micromanager._preflight import _fmt_bytes
+from napari_micromanager._reaper import reap_orphans
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Sequence
     from pathlib import Path
 
     from pymmcore_plus.core.events._protocol import PSignalInstance
 
+    from napari_micromanager._latency import LatencyMonitor
+
+
+logger = logging.getLogger(__name__)
 
 # this is very verbose
 logging.getLogger("napari.loader").setLevel(logging.WARNING)
@@ -78,7 +86,13 @@ class MainWindow(MicroManagerToolbar):
         mmcore: CMMCorePlus | None = None,
     ) -> None:
         super().__init__(viewer, mmcore=mmcore)
+        self._latency: LatencyMonitor | None = None
+        self._scratch_dirs: list[Path] | None = None
         self.set_core(self._mmc, owns=self._owns_core)
+        # delete (in the background) what crashed sessions left in scratch dirs,
+        # and tell about the acquisitions kept there to be recovered
+        reap_orphans([*self.scratch_dirs, tempfile.gettempdir()])
+        self._report_recoverable()
 
         # some remaining connections related to widgets ... TODO: unify with superclass
         self._connections: list[tuple[PSignalInstance, Callable]] = [
@@ -168,6 +182,10 @@ class MainWindow(MicroManagerToolbar):
         self._owns_core = owns
         self._core_link = CoreViewerLink(self.viewer, self._mmc, self)
         self._wrap_load_system_configuration(self._mmc)
+        if self._latency is not None:
+            self._core_link.enable_latency_monitor(self._latency)
+        if self._scratch_dirs is not None:
+            self._core_link._mda_handler.scratch_dirs = self._scratch_dirs
 
         # Rebuild UI (only needed when swapping, not on first init)
         if old_link is not None:
@@ -176,6 +194,78 @@ class MainWindow(MicroManagerToolbar):
             if console := getattr(self.viewer.window._qt_viewer, "console", None):
                 console.push({"mmcore": self._mmc})
 
+    @property
+    def scratch_dirs(self) -> list[Path]:
+        """Directories the temporary arrays of MDA layers are written to.
+
+        Fast volumes (e.g. a tmpfs or NVMe disk) keep up with fast cameras. With
+        several directories, the layers of an MDA are striped across them, so
+        that they are written to different disks in parallel. By default, the
+        directories in the `NAPARI_MICROMANAGER_SCRATCH` environment variable
+        (separated by `os.pathsep`), else the system temporary directory.
+        """
+        return self._core_link._mda_handler.scratch_dirs
+
+    @scratch_dirs.setter
+    def scratch_dirs(self, dirs: Sequence[str | Path]) -> None:
+        self._core_link._mda_handler.scratch_dirs = dirs
+        self._scratch_dirs = self._core_link._mda_handler.scratch_dirs
+        reap_orphans(self._scratch_dirs)
+
+    def recover_acquisitions(self) -> list[napari.layers.Image]:
+        """Add layers for the MDA data of sessions that crashed while acquiring.
+
+        The temporary arrays left in the scratch directories (and the system
+        temporary directory) are reopened from their journal. They are deleted
+        when the window closes: save the layers to keep them.
+        """
+        return self._core_link._mda_handler.recover()
+
+    def _report_recoverable(self) -> None:
+        """Warn about the MDA data of crashed sessions, kept to be recovered."""
+        if not (found := self._core_link._mda_handler.recoverable()):
+            return
+        layers = "\n".join(f"  {name} ({_fmt_bytes(size)})" for name, size in found)
+        logger.warning(
+            "%d acquisition layer(s) of crashed sessions can be recovered with "
+            "`recover_acquisitions()` or deleted with `discard_acquisitions()`:\n%s",
+            len(found),
+            layers,
+        )
+
+    def discard_acquisitions(self) -> list[Path]:
+        """Delete the MDA data of sessions that crashed, instead of recovering it.
+
+        Returns the temporary directories that are being deleted (in the
+        background).
+        """
+        return self._core_link._mda_handler.discard_recoverable()
+
+    @property
+    def latency(self) -> LatencyMonitor | None:
+        """The frame latency monitor, if enabled with `show_latency_monitor`."""
+        return self._latency
+
+    def show_latency_monitor(self) -> LatencyMonitor:
+        """Measure frame latencies and show their percentiles in a dock widget.
+
+        The timestamps are taken when frames arrive, leave the write queue, are
+        written and are displayed, both during MDAs and in live mode.
+
+        Returns
+        -------
+        LatencyMonitor
+            The monitor, e.g. `monitor.percentiles()["total"][99]` is the 99th
+            percentile (ms) of the time from frameReady to the screen.
+        """
+        if self._latency is None:
+            self._latency = self._core_link.enable_latency_monitor()
+        if "Latency" not in getattr(self.viewer.window, "dock_widgets", []):
+            self.viewer.window.add_dock_widget(
+                LatencyWidget(self._latency), name="Latency", area="left"
+            )
+        return self._latency
+
     _ORIGINAL_LOAD_ATTR = "_nmm_original_loadSystemConfiguration"
 
     def _wrap_load_system_configuration(self, core: CMMCorePlus) -> None:
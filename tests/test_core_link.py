@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock
+
+import pytest
+from pymmcore_plus import Keyword, Metadata
+
+from napari_micromanager._core_link import (
+    MAX_POLL_MS,
+    MIN_POLL_MS,
+    CoreViewerLink,
+    _image_number,
+    _poll_interval_ms,
+    _received_time,
+)
+
+if TYPE_CHECKING:
+    from pytestqt.qtbot import QtBot
+
+
+@pytest.mark.parametrize(
+    ("frame_period", "render_cost", "expected"),
+    [
+        (math.inf, 0.0, MAX_POLL_MS),  # no frames yet
+        (0.001, 0.0, MIN_POLL_MS),  # 1000 fps: as fast as allowed
+        (0.1, 0.001, 100),  # follows the frame rate
+        (0.001, 0.02, 80),  # slow rendering: keep the main thread mostly free
+        (10, 0.0, MAX_POLL_MS),
+    ],
+)
+def test_poll_interval(frame_period: float, render_cost: float, expected: int) -> None:
+    assert _poll_interval_ms(frame_period, render_cost) == expected
+
+
+def test_live_image_metadata() -> None:
+    md = Metadata()
+    assert _received_time(md) is None
+    assert _image_number(md) is None
+
+    received = datetime.now() - timedelta(seconds=0.5)
+    md[Keyword.Metadata_TimeInCore] = received.isoformat(sep=" ")
+    md[Keyword.Metadata_ImageNumber] = "7"
+    t_received = _received_time(md)
+    assert t_received is not None
+    assert time.perf_counter() - t_received == pytest.approx(0.5, abs=0.1)
+    assert _image_number(md) == 7
+
+
+def test_mda_poll_on_main_thread(qtbot: QtBot) -> None:
+    from pymmcore_plus.experimental.unicore import UniMMCore
+
+    link = CoreViewerLink(MagicMock(), UniMMCore())
+    # sequenceStarted/Finished are emitted from the runner thread
+    runner = threading.Thread(target=link._start_mda_poll)
+    runner.start()
+    runner.join()
+    qtbot.waitUntil(lambda: link._mda_poll_timer_id is not None)
+    assert link._mda_running
+    # no frame yet: the initial interval is kept
+    t0, timer_id = link._last_poll[0], link._mda_poll_timer_id
+    link._adapt_mda_poll(t0 + 1, 0)
+    assert (link._mda_poll_ms, link._mda_poll_timer_id) == (50, timer_id)
+    # a frame every 10 ms: polled as fast as allowed
+    link._adapt_mda_poll(t0 + 1, 100)
+    assert link._mda_poll_ms == MIN_POLL_MS
+
+    link._stop_mda_poll()
+    assert link._mda_poll_timer_id is None
+    # a poll that was running when the MDA finished doesn't restart the timer
+    link._adapt_mda_poll(time.perf_counter(), 100)
+    assert link._mda_poll_timer_id is None
+    link.cleanup()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+import numpy as np
 from useq import MDAEvent
 
 if TYPE_CHECKING:
@@ -23,10 +24,31 @@ def test_generator_mda_does_not_crash(main_window: MainWindow, qtbot: QtBot) ->
     with qtbot.waitSignal(mmc.mda.events.sequenceFinished, timeout=5000):
         mmc.run_mda(_events())
 
-    # No zarr-backed MDA layers should have been created.
-    layer_names = [layer.name for layer in main_window.viewer.layers]
-    assert all("Exp_" not in n for n in layer_names)
+    # frames without an index are stacked in a growable layer, in order
+    viewer = main_window.viewer
+    qtbot.waitUntil(lambda: len(viewer.layers) > 0, timeout=5000)
+    assert "preview" not in viewer.layers
+    [layer] = [lay for lay in viewer.layers if lay.name.startswith("Exp_n_")]
+    assert layer.data.shape == (2, 512, 512)
+    assert viewer.dims.axis_labels[0] == "n"
 
-    # The acquired frames should still be visible in the preview layer.
-    assert "preview" in layer_names
-    assert main_window.viewer.layers["preview"].data.shape == (512, 512)
+
+def test_generator_mda_grows_layers(main_window: MainWindow, qtbot: QtBot) -> None:
+    """Layers of generator MDAs grow along the axes of the event indices."""
+
+    def _events() -> Iterator[MDAEvent]:
+        for t in range(5):
+            for c in range(2):
+                yield MDAEvent(index={"c": c, "t": t}, exposure=1)
+
+    mmc = main_window._mmc
+    with qtbot.waitSignal(mmc.mda.events.sequenceFinished, timeout=5000):
+        mmc.run_mda(_events())
+
+    viewer = main_window.viewer
+    qtbot.waitUntil(lambda: len(viewer.layers) > 0, timeout=5000)
+    [layer] = [lay for lay in viewer.layers if lay.name.startswith("Exp_t_c_")]
+    # trimmed to what was acquired
+    assert layer.data.shape == (5, 2, 512, 512)
+    assert np.asarray(layer.data[4, 1]).any()
+    assert viewer.dims.axis_labels == ("t", "c", "y", "x")
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from napari_micromanager._latency import (
+    LATENCY_STAGES,
+    LatencyMonitor,
+    RollingPercentiles,
+)
+
+
+def test_rolling_percentiles_window() -> None:
+    values = RollingPercentiles(window=10)
+    assert len(values) == 0
+    assert np.isnan(values.percentiles([50])).all()
+
+    for v in range(100):
+        values.add(v)
+    # only the last 10 values are kept
+    assert len(values) == 10
+    np.testing.assert_allclose(values.percentiles([0, 100]), [90, 99])
+
+
+def test_latency_monitor_stages() -> None:
+    monitor = LatencyMonitor(window=16)
+    monitor.record("queue", 0.001)
+    monitor.record("write", 0.002)
+    monitor.frame_written(t_ready=1.0, t_written=1.003)
+    # an older frame finishing late is measured too
+    monitor.frame_written(t_ready=0.5, t_written=1.002)
+    monitor.frame_displayed(now=1.013)
+    # nothing new was written since the last display
+    monitor.frame_displayed(now=2.0)
+
+    counts = monitor.counts()
+    assert counts == {"queue": 1, "write": 1, "display": 2, "total": 2, "live": 0}
+    p = monitor.percentiles((0, 100))
+    assert set(p) == set(LATENCY_STAGES)
+    assert p["queue"][0] == pytest.approx(1)
+    assert p["display"][0] == pytest.approx(10)
+    assert p["display"][100] == pytest.approx(11)
+    assert p["total"][0] == pytest.approx(13)
+    assert p["total"][100] == pytest.approx(513)
+    assert math.isnan(p["live"][0])
+    assert not any(monitor.skipped().values())
+
+    monitor.record_skipped("live", 3)
+    assert monitor.skipped()["live"] == 3
+
+    monitor.reset()
+    assert not any(monitor.counts().values())
+    assert not any(monitor.skipped().values())
+
+
+def test_latency_monitor_too_many_pending_frames() -> None:
+    monitor = LatencyMonitor(window=4)
+    for t in range(6):
+        monitor.frame_written(t_ready=t, t_written=t)
+    monitor.frame_displayed(now=10)
+    # the 2 oldest frames don't fit in the window
+    assert monitor.counts()["display"] == 4
+    assert monitor.skipped()["display"] == 2
@@ -75,3 +75,26 @@ def test_image_snapped_gate_closed_during_mda_signal_window(
     with patch.object(core_link, "_update_viewer") as mocked:
         core_link._image_snapped()
     mocked.assert_not_called()
+
+
+def test_recoverable_acquisitions_reported(
+    qtbot: QtBot,
+    core: CMMCorePlus,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    monkeypatch.setattr(
+        "napari_micromanager._mda_handler._NapariMDAHandler.recoverable",
+        lambda self: [("img", 3 * 2**20), ("img [1]", 512)],
+    )
+    with caplog.at_level("WARNING", logger="napari_micromanager.main_window"):
+        wdg = MainWindow(MagicMock(), mmcore=core)
+    qtbot.addWidget(wdg)
+    [record] = caplog.records
+    assert record.getMessage().splitlines() == [
+        "2 acquisition layer(s) of crashed sessions can be recovered with "
+        "`recover_acquisitions()` or deleted with `discard_acquisitions()`:",
+        "  img (3.0 MB)",
+        "  img [1] (512.0 B)",
+    ]
+    wdg._cleanup()
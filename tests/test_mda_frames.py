@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import useq
+
+from napari_micromanager._mda_frames import FrameTable, PlaneStats
+
+
+def test_frame_table() -> None:
+    seq = useq.MDASequence(
+        stage_positions=[(0, 0, 0), (10, 20, 1)],
+        time_plan={"interval": 0, "loops": 3},
+    )
+    table = FrameTable(["t", "p"], capacity=2)
+    # write them in reverse, the table grows past its capacity
+    for i, event in enumerate(reversed(list(seq))):
+        meta = {"runner_time_ms": 100.0 - i, "exposure_ms": 10.0}
+        table.append((event.index["t"], event.index["p"]), event, meta, 0.002)
+
+    assert len(table) == 6
+    assert table.data.dtype.names[:2] == ("t", "p")
+    rows = table.where(p=1, sort="runner_time_ms")
+    assert list(rows["t"]) == [0, 1, 2]
+    assert (rows["x_um"] == 10).all()
+    assert np.allclose(rows["write_latency_ms"], 2)
+    assert len(table.where(t=2, p=0)) == 1
+
+
+def test_frame_table_without_metadata() -> None:
+    table = FrameTable(["t"])
+    table.append((0,), useq.MDAEvent(), None)
+    row = table.data[0]
+    assert math.isnan(row["runner_time_ms"])
+    assert math.isnan(row["x_um"])
+
+
+def test_plane_stats() -> None:
+    stats = PlaneStats((2, 3), bit_depth=12, n_bins=16)
+    assert stats.range_at() is None
+    plane = np.arange(4096, dtype="u2").reshape(64, 64)
+    stats.record((1, 0), plane)
+    stats.record((1, 2), plane // 2)
+
+    assert stats.range_at() == (0, 4095)
+    assert stats.range_at((1, 2, math.nan, math.nan)) == (0, 2047)
+    assert stats.range_at((0, 0, math.nan, math.nan)) is None
+    # NaN (displayed) axes cover all their planes
+    assert stats.range_at((1, math.nan, math.nan, math.nan)) == (0, 4095)
+    assert list(stats.bin_edges[[0, -1]]) == [0, 4096]
+    hist = stats.histogram_at((1, 0, math.nan, math.nan))
+    assert hist.sum() == plane.size
+    assert (hist == plane.size // 16).all()
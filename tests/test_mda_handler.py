@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+import useq
+from napari.components import ViewerModel
+
+from napari_micromanager._core_link import CoreViewerLink
+from napari_micromanager._mda_handler import (
+    _DisplayChannel,
+    _FrameBudget,
+    _FrameQueue,
+    _id_idx_layer,
+    _NapariMDAHandler,
+    _position_shapes,
+    _SequenceLookup,
+    _SpillFile,
+    _WriterPool,
+)
+from napari_micromanager._reaper import _REAPER, scratch_prefix
+from napari_micromanager._util import NMM_METADATA_KEY, get_full_sequence_axes
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from pymmcore_plus.experimental.unicore import UniMMCore
+    from pytestqt.qtbot import QtBot
+
+SUB_SEQ = useq.MDASequence(grid_plan=useq.GridRowsColumns(rows=2, columns=1))
+
+
+@pytest.mark.parametrize("n_writers", [1, 4])
+def test_writer_pool_keeps_order_per_key(n_writers: int) -> None:
+    written: dict[str, list[int]] = {}
+    threads: dict[str, set[int]] = {}
+    lock = threading.Lock()
+
+    def _write(item: tuple[str, int]) -> None:
+        key, value = item
+        with lock:
+            written.setdefault(key, []).append(value)
+            threads.setdefault(key, set()).add(threading.get_ident())
+
+    pool: _WriterPool[tuple[str, int]] = _WriterPool(n_writers, _write)
+    for i in range(100):
+        for key in "abcdef":
+            pool.submit(key, (key, i))
+    pool.join()
+
+    assert not pool
+    for key in "abcdef":
+        assert written[key] == list(range(100))
+        # every item with the same key is written by the same thread
+        assert len(threads[key]) == 1
+
+
+def test_writer_pool_groups_do_not_share_threads() -> None:
+    threads: dict[int, set[int]] = {0: set(), 1: set()}
+
+    def _write(item: tuple[int, int]) -> None:
+        threads[item[0]].add(threading.get_ident())
+
+    # fewer writers than groups: still one each
+    pool: _WriterPool[tuple[int, int]] = _WriterPool(1, _write, n_groups=2)
+    for i in range(20):
+        for group in (0, 1):
+            pool.submit(i, (group, i), group)
+    pool.join()
+
+    assert len(threads[0]) == len(threads[1]) == 1
+    assert not threads[0] & threads[1]
+
+
+def test_frame_queue_is_fifo() -> None:
+    queue: _FrameQueue[int] = _FrameQueue()
+    for i in range(5):
+        queue.put(i)
+    queue.close()
+    assert [queue.get() for _ in range(6)] == [0, 1, 2, 3, 4, None]
+
+
+def test_display_channel_keeps_latest_update() -> None:
+    display = _DisplayChannel()
+    assert not display
+    display.publish("a", (0, 0))
+    display.publish("a", (1, 0))
+    display.publish("a", None)  # not the newest frame: keeps the last step
+    display.publish("b", None)
+    assert display.take() == [("a", (1, 0)), ("b", None)]
+    assert not display.take()
+
+
+def test_frame_budget() -> None:
+    budget = _FrameBudget(max_frames=4, max_bytes=100)
+    # a single frame always fits, even if larger than max_bytes
+    assert budget.acquire(200)
+    assert not budget.acquire(10)
+    budget.release(200)
+    for _ in range(4):
+        assert budget.acquire(10)
+    assert not budget.acquire(10)
+    assert budget.acquire(10, force=True)
+    assert not budget.below_low_water()
+    for _ in range(3):
+        budget.release(10)
+    assert budget.below_low_water()
+    assert (budget.peak_frames, budget.peak_bytes) == (5, 200)
+
+    # blocking acquire waits for a release
+    for _ in range(2):
+        budget.acquire(10)
+    t = threading.Timer(0.05, budget.release, args=(10,))
+    t.start()
+    assert budget.acquire(10, block=True)
+    assert budget.frames == 4
+    t.join()
+
+
+def test_frame_budget_counts_buffered_frames() -> None:
+    budget = _FrameBudget(max_frames=4)
+    budget.acquire(10)
+    # written to a chunk buffer, the frame's bytes are replaced by the buffer's
+    budget.add_buffered(1, 40)
+    budget.release(10)
+    assert (budget.frames, budget.nbytes) == (1, 40)
+    assert not budget.buffers_full()
+    budget.add_buffered(1, 0)
+    assert budget.buffers_full()
+    budget.add_buffered(-2, -40)
+    assert (budget.frames, budget.nbytes) == (0, 0)
+    assert not budget.buffers_full()
+
+    # e.g. for shards, without a queue limit
+    budget = _FrameBudget(max_buffered_bytes=100)
+    budget.add_buffered(1, 80)
+    assert not budget.buffers_full()
+    budget.add_buffered(1, 20)
+    assert budget.buffers_full()
+
+
+def test_spill_file(tmp_path) -> None:
+    spill = _SpillFile(tmp_path)
+    assert [str(p) for p in tmp_path.glob(f"{scratch_prefix()}spill-*")] == [spill.path]
+    images = [np.full((4, 5), i, dtype="uint16") for i in range(3)]
+    spilled = [spill.append(im) for im in images]
+    for image, frame in zip(images, spilled, strict=False):
+        np.testing.assert_array_equal(frame.load(), image)
+    spill.close()
+    # deleted in the background
+    _REAPER.join()
+    assert not list(tmp_path.glob(f"{scratch_prefix()}spill-*"))
+
+
+@pytest.mark.parametrize("failure", ["write", "route"])
+def test_failed_frames_leave_the_budget(failure: str) -> None:
+    core = MagicMock()
+    handler = _NapariMDAHandler(core, MagicMock(), max_queued_frames=3)
+    seq = useq.MDASequence(time_plan={"interval": 0, "loops": 10})
+    storage = MagicMock(chunks=(1, 8, 8))
+    if failure == "write":
+        storage.write.side_effect = OSError("No space left on device")
+    else:
+        handler._lookups[seq.uid] = MagicMock(side_effect=RuntimeError)
+    handler._tmp_arrays[str(seq.uid)] = storage
+
+    handler._start_frame_workers(persistent=False)
+    for event in seq:
+        handler._on_mda_frame(np.zeros((8, 8), "u2"), event)
+    handler._stop_worker()
+
+    # the MDA was paused by the budget, then resumed
+    assert handler.stats.pauses
+    core.mda.set_paused.assert_called_with(False)
+    assert handler._budget.below_low_water()
+
+
+@pytest.mark.parametrize("split", [False, True])
+@pytest.mark.parametrize(
+    "seq",
+    [
+        useq.MDASequence(
+            channels=["DAPI", "FITC"], time_plan={"interval": 0, "loops": 2}
+        ),
+        useq.MDASequence(
+            stage_positions=[
+                useq.Position(x=0, y=0),
+                useq.Position(x=1, y=1, sequence=SUB_SEQ),
+            ],
+            channels=["DAPI", "FITC"],
+            z_plan={"range": 1, "step": 0.5},
+        ),
+    ],
+)
+def test_sequence_lookup_matches_id_idx_layer(
+    seq: useq.MDASequence, split: bool
+) -> None:
+    seq = seq.model_copy(
+        update={
+            "metadata": {NMM_METADATA_KEY: {"split_channels": split, "file_name": "f"}}
+        }
+    )
+    lookup = _SequenceLookup(seq)
+    for event in seq:
+        assert lookup(event) == _id_idx_layer(event)
+
+
+@pytest.mark.parametrize("split", [True, False])
+def test_sequence_lookup_cameras(split: bool) -> None:
+    seq = useq.MDASequence(
+        time_plan={"interval": 0, "loops": 2},
+        channels=["DAPI", "FITC"],
+        metadata={NMM_METADATA_KEY: {"split_channels": split}},
+    )
+    lookup = _SequenceLookup(seq, ["CamA", "CamB"])
+    for event in seq:
+        _id, idx, _name = _id_idx_layer(event)
+        assert lookup(event, {"camera_device": "CamB"}) == (
+            f"CamB_{_id}",
+            idx,
+            f"Exp_CamB_{_id}",
+        )
+        # without metadata, the camera index added by pymmcore-plus is used
+        cam_event = event.model_copy(update={"index": {**event.index, "cam": 1}})
+        assert lookup(cam_event)[0] == f"CamB_{_id}"
+        assert lookup(event)[0] == f"CamA_{_id}"
+
+
+def test_sequence_lookup_is_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    import napari_micromanager._mda_handler as mda_handler
+
+    seq = useq.MDASequence(
+        stage_positions=[(i, i, 0) for i in range(10)],
+        channels=["DAPI", "FITC"],
+        metadata={NMM_METADATA_KEY: {"split_channels": True}},
+    )
+    lookup = _SequenceLookup(seq)
+    expected = [_id_idx_layer(event) for event in seq]
+
+    calls: list[str] = []
+
+    def _counted(func: Callable) -> Callable:
+        def _wrapper(*args: Any) -> Any:
+            calls.append(func.__name__)
+            return func(*args)
+
+        return _wrapper
+
+    for name in ("get_full_sequence_axes", "_get_file_name_from_metadata"):
+        monkeypatch.setattr(mda_handler, name, _counted(getattr(mda_handler, name)))
+    assert [lookup(event) for event in seq] == expected
+    # nothing is recomputed per event...
+    assert not calls
+    # ...unlike in the uncached lookup
+    _id_idx_layer(next(iter(seq)))
+    assert calls
+
+
+def test_position_shapes() -> None:
+    seq = useq.MDASequence(
+        stage_positions=[
+            useq.Position(x=0, y=0),
+            useq.Position(x=1, y=1, sequence=SUB_SEQ),
+        ],
+        channels=["DAPI", "FITC"],
+    )
+    assert _position_shapes(seq, ["p", "c", "g"]) == [[2, 1], [2, 2]]
+    assert (
+        _position_shapes(seq.model_copy(update={"stage_positions": []}), ["c"]) is None
+    )
+
+
+def test_full_sequence_axes_shared_sub_sequence() -> None:
+    seq = useq.MDASequence(
+        stage_positions=[
+            useq.Position(x=0, y=0, sequence=SUB_SEQ),
+            useq.Position(x=1, y=1, sequence=SUB_SEQ),
+        ],
+        channels=["DAPI", "FITC"],
+    )
+    assert get_full_sequence_axes(seq) == ("p", "c", "g")
+
+
+def test_write_rate_probed_on_preflight(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    probed: list[Path] = []
+    monkeypatch.setattr(
+        "napari_micromanager._preflight.probe_in_background", probed.append
+    )
+    handler = _NapariMDAHandler(MagicMock(), MagicMock())
+    handler.scratch_dirs = [tmp_path]
+    # nothing is written to the scratch directories until a pre-flight check
+    assert not probed
+
+    handler.memory_budget = 0
+    handler._mmc.configure_mock(
+        **{
+            "getImageHeight.return_value": 16,
+            "getImageWidth.return_value": 16,
+            "getNumberOfComponents.return_value": 1,
+            "getBytesPerPixel.return_value": 2,
+            "getNumberOfCameraChannels.return_value": 1,
+        }
+    )
+    [estimate] = handler.preflight(
+        useq.MDASequence(time_plan={"loops": 2, "interval": 1})
+    )
+    assert probed == [tmp_path]
+    assert estimate.write_rate is None
+
+
+def test_multi_camera_mda(
+    qtbot: QtBot,
+    synthetic_core: Callable[..., UniMMCore],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # a Multi Camera device with two physical cameras
+    core = synthetic_core((16, 16))
+    cameras = ["CamA", "CamB"]
+    monkeypatch.setattr(core, "getNumberOfCameraChannels", lambda: len(cameras))
+    monkeypatch.setattr(core, "getPhysicalCameraDevice", lambda i=0: cameras[i])
+    viewer = ViewerModel()
+    link = CoreViewerLink(viewer, core)
+    handler = link._mda_handler
+
+    seq = useq.MDASequence(
+        time_plan={"interval": 0, "loops": 2}, channels=["DAPI", "FITC"]
+    )
+    signals = core.mda.events
+    signals.sequenceStarted.emit(seq, {})
+    for event in seq:
+        for k, camera in enumerate(cameras):
+            value = 100 * k + 10 * event.index["c"] + event.index["t"]
+            frame = np.full((16, 16), value, dtype="uint16")
+            signals.frameReady.emit(frame, event, {"camera_device": camera})
+    qtbot.waitUntil(lambda: handler.stats.frames == 2 * 4)
+    signals.sequenceFinished.emit(seq)
+
+    # a layer per camera, written by writers of its own
+    ids = [f"{camera}_{seq.uid}" for camera in cameras]
+    assert handler._write_groups == {ids[0]: 0, ids[1]: 1}
+    for k, camera in enumerate(cameras):
+        [layer] = [lyr for lyr in viewer.layers if lyr.name.endswith(ids[k])]
+        meta = layer.metadata[NMM_METADATA_KEY]
+        assert (meta["camera"], meta["uid"]) == (camera, seq.uid)
+        data = np.asarray(layer.data[0] if layer.multiscale else layer.data)
+        assert data.shape == (2, 2, 16, 16)
+        for t, c in np.ndindex(2, 2):
+            assert (data[t, c] == 100 * k + 10 * c + t).all()
+    link.cleanup(owns=True)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import useq
+from vispy.visuals.image import ImageVisual
+
+from napari_micromanager._mda_mosaic import (
+    MosaicCanvas,
+    _tile_positions,
+    repaint_region,
+)
+
+
+def test_tile_positions() -> None:
+    seq = useq.MDASequence(
+        stage_positions=[(0, 0, 0), (1000, 0, 0)],
+        channels=["DAPI", "FITC"],
+        grid_plan=useq.GridRowsColumns(rows=2, columns=1, fov_height=100),
+    )
+    assert len(_tile_positions(seq)) == 4
+
+
+def test_mosaic_canvas() -> None:
+    positions = [(0, 0), (100, 0), (0, 50), (100, 50)]
+    canvas = MosaicCanvas(positions, (50, 100), "u2", pixel_size=1, downsample=5)
+    assert canvas.data.shape == (20, 40)
+    assert canvas.origin == (-25, -50)
+    assert canvas.scale == (5, 5)
+    assert canvas.take_dirty() is None
+
+    tile = np.full((50, 100), 7, dtype="u2")
+    assert canvas.paste(tile, 100, 50) == (slice(10, 20), slice(20, 40))
+    assert canvas.paste(tile, 0, 0) == (slice(0, 10), slice(0, 20))
+    # only the pasted regions are painted
+    assert (canvas.data[10:, 20:] == 7).all()
+    assert (canvas.data[:10, :20] == 7).all()
+    assert not canvas.data[:10, 20:].any()
+    assert canvas.take_dirty() == (0, 20, 0, 40)
+    assert canvas.take_dirty() is None
+
+
+def test_repaint_region() -> None:
+    canvas = MosaicCanvas([(0, 0), (100, 0)], (50, 100), "u2", 1, downsample=5)
+    node = ImageVisual(canvas.data, clim=(0, 100))
+    node._build_texture()  # as if drawn once
+    layer = object()
+    qt_viewer = SimpleNamespace(layer_to_visual={layer: SimpleNamespace(node=node)})
+    viewer = SimpleNamespace(window=SimpleNamespace(_qt_viewer=qt_viewer))
+
+    canvas.paste(np.full((50, 100), 7, dtype="u2"), 100, 0)
+    box = canvas.take_dirty()
+    assert box == (0, 10, 20, 40)
+    texture = node._texture
+    with patch.object(texture, "scale_and_set_data") as upload:
+        assert repaint_region(viewer, layer, canvas.data, box)
+    # only the painted region is uploaded
+    region, offset = upload.call_args[0][0], upload.call_args[1]["offset"]
+    assert region.shape == (10, 20)
+    assert offset == (0, 20)
+
+    # the whole layer is refreshed when the node shows a copy, or without canvas
+    assert not repaint_region(viewer, layer, canvas.data.copy(), box)
+    assert not repaint_region(SimpleNamespace(), layer, canvas.data, box)
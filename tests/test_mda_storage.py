@@ -0,0 +1,421 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+import zarr
+from useq import MDAEvent
+
+from napari_micromanager._mda_frames import FrameTable
+from napari_micromanager._mda_storage import (
+    _ZARR_V3,
+    FRAMES_FILE,
+    JOURNAL_INDEX_FILE,
+    SCRATCH_ENV_VAR,
+    MemoryStorage,
+    OMEZarrImagesStorage,
+    OMEZarrStorage,
+    RaggedStorage,
+    RecoveredStorage,
+    TempZarrStorage,
+    _compression_kwargs,
+    _dir_size,
+    _find_journals,
+    _recoverable,
+    _scratch_dirs_from_env,
+    _write_ngff_metadata,
+    split_channels,
+)
+from napari_micromanager._reaper import (
+    _REAPER,
+    JOURNAL_FILE,
+    reap_orphans,
+    scratch_prefix,
+)
+from napari_micromanager._util import COMPRESSION_CODECS
+
+
+@pytest.mark.parametrize("codec", COMPRESSION_CODECS)
+def test_compression_codecs(codec: str, tmp_path: Path) -> None:
+    z = zarr.open(
+        str(tmp_path),
+        shape=(2, 64, 64),
+        dtype="u2",
+        chunks=(1, 64, 64),
+        **_compression_kwargs(codec, 1),
+    )
+    data = np.arange(2 * 64 * 64, dtype="u2").reshape(2, 64, 64)
+    z[:] = data
+    np.testing.assert_array_equal(zarr.open(str(tmp_path))[:], data)
+
+
+def test_write_ngff_metadata(tmp_path: Path) -> None:
+    zarr.open_group(str(tmp_path), mode="w-")
+    _write_ngff_metadata(
+        tmp_path, "img", ["t", "c", "z", "y", "x"], [1, 1, 2, 0.5, 0.5]
+    )
+
+    attrs = dict(zarr.open_group(str(tmp_path)).attrs)
+    multiscales = attrs["ome"]["multiscales"] if _ZARR_V3 else attrs["multiscales"]
+    axes = multiscales[0]["axes"]
+    assert [ax["name"] for ax in axes] == ["t", "c", "z", "y", "x"]
+    assert [ax["type"] for ax in axes] == ["time", "channel", "space", "space", "space"]
+    assert "unit" not in axes[2]
+    transform = multiscales[0]["datasets"][0]["coordinateTransformations"][0]
+    assert transform == {"type": "scale", "scale": [1, 1, 2, 0.5, 0.5]}
+
+
+def test_storage_backends(tmp_path: Path) -> None:
+    frame = np.arange(64 * 64, dtype="u2").reshape(64, 64)
+    backends = [
+        MemoryStorage((3, 64, 64), "u2", (1, 64, 64)),
+        TempZarrStorage((3, 64, 64), "u2", (1, 64, 64)),
+        OMEZarrStorage(tmp_path / "img", (3, 64, 64), "u2", (1, 64, 64)),
+    ]
+    for storage in backends:
+        storage.array[1] = frame
+        np.testing.assert_array_equal(storage.array[1], frame)
+        assert not np.asarray(storage.array[0]).any()
+
+    mem, tmp, ome = backends
+    assert not mem.path
+    for storage in backends:
+        storage.close()
+    # temporary data is deleted (in the background), OME-Zarr data is kept
+    _REAPER.join()
+    assert not Path(tmp.path).exists()
+    np.testing.assert_array_equal(zarr.open(ome.path)[1], frame)
+
+
+@pytest.mark.parametrize("rgb", [False, True])
+def test_storage_pyramid(tmp_path: Path, rgb: bool) -> None:
+    shape = (2, 64, 48, 3) if rgb else (2, 64, 48)
+    chunks = (1, 64, 48, 3) if rgb else (1, 64, 48)
+    frame = np.random.randint(0, 2**12, shape[1:], dtype="u2")
+    backends = [
+        MemoryStorage(shape, "u2", chunks, n_levels=3),
+        TempZarrStorage(shape, "u2", chunks, n_levels=3),
+        OMEZarrStorage(tmp_path / "img", shape, "u2", chunks, n_levels=3),
+    ]
+    for storage in backends:
+        storage.write((1,), frame)
+        assert [lvl.shape[1:3] for lvl in storage.levels] == [
+            (64, 48),
+            (32, 24),
+            (16, 12),
+        ]
+        np.testing.assert_array_equal(storage.array[1], frame)
+        expected = frame.reshape(16, 4, 12, 4, *shape[3:]).mean(axis=(1, 3))
+        # each level truncates the mean
+        np.testing.assert_allclose(storage.levels[2][1], expected, atol=2)
+
+    ome = backends[2]
+    if rgb:
+        # not an OME-NGFF image (see OMEZarrImagesStorage)
+        with pytest.warns(UserWarning, match="not written as an OME-NGFF image"):
+            ome.write_metadata("img", ["t", "y", "x", "rgb"], [1.0] * 4, None)
+    else:
+        ome.write_metadata("img", ["t", "y", "x"], [1.0] * 3, None)
+    for storage in backends:
+        storage.close()
+    if rgb:
+        return
+    attrs = dict(zarr.open_group(str(tmp_path / "img")).attrs)
+    multiscales = attrs["ome"]["multiscales"] if _ZARR_V3 else attrs["multiscales"]
+    datasets = multiscales[0]["datasets"]
+    assert [d["path"] for d in datasets] == ["0", "1", "2"]
+    assert datasets[2]["coordinateTransformations"][0]["scale"][:3] == [1, 4, 4]
+
+
+def test_ome_zarr_images_storage(tmp_path: Path) -> None:
+    yaozarrs = pytest.importorskip("yaozarrs")
+    # axes (t, p, g, z, c): position 0 has 1 grid tile, position 1 has 2
+    storage = OMEZarrImagesStorage(
+        tmp_path / "layer",
+        ["t", "p", "g", "z", "c"],
+        (2, 2, 2, 3, 2, 8, 6),
+        "u2",
+        (1, 1, 1, 1, 1, 8, 6),
+        n_levels=2,
+        part_shapes=[[2, 1, 3, 2], [2, 2, 3, 2]],
+    )
+    assert sorted(storage.images) == [(0, 0), (1, 0), (1, 1)]
+    rng = np.random.default_rng(0)
+    frames = {}
+    for index in np.ndindex(2, 2, 2, 3, 2):
+        if index[1:3] != (0, 1):
+            frames[index] = rng.integers(0, 1000, (8, 6), dtype="u2")
+            storage.write(index, frames[index])
+    storage.write_metadata(
+        "img",
+        ["t", "p", "g", "z", "c", "y", "x"],
+        [1, 1, 1, 2, 1, 0.5, 0.5],
+        "micrometer",
+    )
+
+    data = np.asarray(storage.array)
+    assert data.shape == (2, 2, 2, 3, 2, 8, 6)
+    for index, frame in frames.items():
+        np.testing.assert_array_equal(storage.array[index], frame)
+    assert not data[:, 0, 1].any()
+    np.testing.assert_array_equal(
+        storage.array[1, :, 0, ::2, 1, 2:4], data[1, :, 0, ::2, 1, 2:4]
+    )
+    assert storage.levels[1][0, 1, 1, 2, 1].shape == (4, 3)
+    storage.close()
+
+    # each field is a valid OME-NGFF image, with (t, c, z, y, x) axes
+    for name in ("p000_g000", "p001_g000", "p001_g001"):
+        group = zarr.open_group(str(tmp_path / "layer" / name))
+        attrs = dict(group.attrs)
+        yaozarrs.validate_ome_object(attrs)
+        if _ZARR_V3:
+            yaozarrs.validate_zarr_store(str(tmp_path / "layer" / name))
+        multiscales = attrs["ome"]["multiscales"] if _ZARR_V3 else attrs["multiscales"]
+        assert multiscales[0]["name"] == f"img_{name}"
+        assert [ax["name"] for ax in multiscales[0]["axes"]] == list("tczyx")
+        assert group["0"].shape == (2, 2, 3, 8, 6)
+    np.testing.assert_array_equal(
+        zarr.open_group(str(tmp_path / "layer" / "p001_g001"))["0"][1, 0, 2],
+        frames[(1, 1, 1, 2, 0)],
+    )
+
+
+def test_ome_zarr_images_storage_rgb(tmp_path: Path) -> None:
+    storage = OMEZarrImagesStorage(
+        tmp_path / "layer", ["t"], (2, 8, 6, 3), "u1", (1, 8, 6, 3)
+    )
+    frame = np.arange(8 * 6 * 3, dtype="u1").reshape(8, 6, 3)
+    storage.write((1,), frame)
+    storage.write_metadata("img", ["t", "y", "x", "rgb"], [1, 1, 1, 1], None)
+    np.testing.assert_array_equal(storage.array[1], frame)
+    storage.close()
+    # each RGB component is an image
+    for rgb in range(3):
+        group = zarr.open_group(str(tmp_path / "layer" / f"rgb{rgb:03d}"))
+        np.testing.assert_array_equal(group["0"][1], frame[..., rgb])
+
+
+def test_ragged_storage(tmp_path: Path) -> None:
+    # position 0 has 1 grid tile, position 1 has 3, along axes (p, g, y, x)
+    parts = [
+        MemoryStorage((1, 4, 5), "u2", (1, 4, 5)),
+        TempZarrStorage((3, 4, 5), "u2", (1, 4, 5), directory=str(tmp_path)),
+    ]
+    storage = RaggedStorage(parts, 0, (2, 3, 4, 5), (1, 1, 4, 5))
+    padded = np.zeros((2, 3, 4, 5), dtype="u2")
+    for index in [(0, 0), (1, 0), (1, 2)]:
+        frame = np.full((4, 5), sum(index) + 1, dtype="u2")
+        storage.write(index, frame)
+        padded[index] = frame
+
+    data = storage.array
+    assert data.shape == padded.shape
+    np.testing.assert_array_equal(np.asarray(data), padded)
+    for key in [(0, 1), (1, slice(None, None, 2)), (slice(None), 2, 0), (..., 3)]:
+        np.testing.assert_array_equal(data[key], padded[key])
+    # only what is acquired is stored
+    assert sum(part.array.size for part in parts) == 4 * 4 * 5
+    storage.close()
+    _REAPER.join()
+    assert not Path(parts[1].path).exists()
+
+
+def test_multi_plane_chunks(tmp_path: Path) -> None:
+    # (t, z, y, x) in chunks of 4 planes along z: 6 planes are 2 chunks
+    storage = TempZarrStorage(
+        (2, 6, 4, 4), "u2", (1, 4, 4, 4), n_levels=2, directory=str(tmp_path)
+    )
+    assert storage.chunks == (1, 4, 4, 4)
+    frame = np.ones((4, 4), dtype="u2")
+    assert [storage.write((0, z), frame * (z + 1)) for z in range(4)] == [
+        False,
+        False,
+        False,
+        True,
+    ]
+    # planes of complete chunks are written at once, in every level
+    assert [bool(storage.array[0, z].any()) for z in range(6)] == [1, 1, 1, 1, 0, 0]
+    assert (storage.levels[1][0, 3] == 4).all()
+    assert not storage.write((0, 4), frame)
+    assert not storage.write((1, 5), frame)
+    assert not storage.array[0, 4].any()
+
+    # e.g. when the MDA is canceled: the partial chunks are written
+    assert storage.flush()
+    assert storage.array[0, 4].all()
+    assert storage.array[1, 5].all()
+    assert not storage.array[1, 4].any()
+    assert not storage.flush()
+    storage.close()
+
+
+def test_early_flush_of_chunks(tmp_path: Path) -> None:
+    storage = TempZarrStorage(
+        (8, 4, 4), "u2", (4, 4, 4), n_levels=2, directory=str(tmp_path)
+    )
+    held = [0, 0]
+
+    def _count(frames: int, nbytes: int) -> None:
+        held[0] += frames
+        held[1] += nbytes
+
+    storage.track_buffered(_count)
+    frame = np.ones((4, 4), dtype="u2")
+    for z in range(2):
+        assert not storage.write((z,), frame * (z + 1))
+    # the buffer holds a whole chunk
+    assert held == [2, 4 * frame.nbytes]
+
+    # written to free memory: the rest of the chunk is still to come
+    assert storage.flush(final=False)
+    assert held == [0, 0]
+    assert (storage.array[1] == 2).all()
+    assert not storage.write((2,), frame * 3)
+    assert storage.write((3,), frame * 4)
+    assert held == [0, 0]
+    # the frames written early are kept
+    for z in range(4):
+        assert (storage.array[z] == z + 1).all()
+        assert (storage.levels[1][z] == z + 1).all()
+    assert not storage.flush()
+    storage.close()
+
+
+@pytest.mark.skipif(not _ZARR_V3, reason="sharding requires zarr v3")
+def test_sharded_storage(tmp_path: Path) -> None:
+    # (t, y, x) frames in one-frame chunks, 4 chunks per shard file
+    storage = TempZarrStorage(
+        (6, 8, 8), "u2", (1, 8, 8), None, 2, str(tmp_path), shards=(4, 8, 8)
+    )
+    assert storage.array.chunks == (1, 8, 8)
+    assert storage.chunks == (4, 8, 8)
+    for t in range(6):
+        written = storage.write((t,), np.full((8, 8), t + 1, dtype="u2"))
+        # the last shard is cut at the end of the array
+        assert written == (t in (3, 5))
+    storage.flush()
+    # frames are still read one by one
+    for t in range(6):
+        assert (storage.array[t] == t + 1).all()
+        assert (storage.levels[1][t] == t + 1).all()
+    shard_files = [f for f in Path(storage.path).rglob("*") if f.is_file()]
+    assert len([f for f in shard_files if f.name != "zarr.json"]) == 2
+    storage.close()
+
+
+@pytest.mark.parametrize("in_memory", [True, False])
+def test_split_channels(tmp_path: Path, in_memory: bool) -> None:
+    # (t, c, y, x), shown as one (t, y, x) layer per channel
+    storage = (
+        MemoryStorage((2, 3, 4, 5), "u2", (1, 1, 4, 5))
+        if in_memory
+        else OMEZarrStorage(tmp_path / "img", (2, 3, 4, 5), "u2", (1, 1, 4, 5))
+    )
+    channels = split_channels(storage, 1, 3)
+    tables = [FrameTable(["t"]) for _ in channels]
+    for c, channel in enumerate(channels):
+        assert channel.array.shape == (2, 4, 5)
+        assert channel.chunks == (1, 4, 5)
+        channel.write((1,), np.full((4, 5), c + 1, dtype="u2"))
+        tables[c].append((1,), MDAEvent(), None)
+    for c, channel in enumerate(channels):
+        np.testing.assert_array_equal(channel.array[1], storage.array[1, c])
+        assert (np.asarray(channel.array)[1] == c + 1).all()
+        assert not channel.array[0].any()
+    # no copies: each channel is a view of the same array
+    if in_memory:
+        assert np.shares_memory(channels[2].array, storage.array)
+
+    for channel, table in zip(channels, tables, strict=True):
+        channel.write_frames(table.data)
+    if not in_memory:
+        frames = np.load(tmp_path / "img" / FRAMES_FILE)
+        assert frames.dtype.names[:2] == ("t", "c")
+        assert frames["c"].tolist() == [0, 1, 2]
+    for channel in channels:
+        channel.close()
+
+
+def test_split_channels_write_key(tmp_path: Path) -> None:
+    # channels 0 and 1 share the chunks of the stored array, channel 2 does not
+    storage = OMEZarrStorage(tmp_path / "img", (2, 3, 4, 5), "u2", (1, 2, 4, 5))
+    channels = split_channels(storage, 1, 3)
+    keys = [channel.write_key((1,)) for channel in channels]
+    assert keys[0] == keys[1] == storage.write_key((1, 0))
+    assert keys[2] != keys[0]
+    assert channels[0].write_key((0,)) != keys[0]
+    other = OMEZarrStorage(tmp_path / "other", (2, 3, 4, 5), "u2", (1, 2, 4, 5))
+    assert other.write_key((1, 0)) != keys[0]
+    for channel in channels:
+        channel.close()
+    other.close()
+
+
+def test_scratch_dirs_from_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    fast, other = tmp_path / "fast", tmp_path / "other"
+    fast.mkdir()
+    other.mkdir()
+    monkeypatch.setenv(SCRATCH_ENV_VAR, os.pathsep.join([str(fast), str(other)]))
+    assert _scratch_dirs_from_env() == [fast, other]
+
+    monkeypatch.setenv(SCRATCH_ENV_VAR, os.pathsep.join([str(fast), "/no/such/dir"]))
+    with pytest.warns(UserWarning, match="not a directory"):
+        assert _scratch_dirs_from_env() == [fast]
+
+    monkeypatch.delenv(SCRATCH_ENV_VAR)
+    assert _scratch_dirs_from_env() == []
+
+
+def test_recovered_storage(tmp_path: Path) -> None:
+    tmp_path = tmp_path / "scratch"
+    tmp_path.mkdir()
+    storage = TempZarrStorage(
+        (3, 2, 4, 5), "u2", (1, 1, 4, 5), n_levels=2, directory=str(tmp_path)
+    )
+    storage.start_journal({"name": "img", "shape": [3, 2]})
+    frames = {(0, 0): 1, (0, 1): 2, (2, 1): 3}
+    for index, value in frames.items():
+        storage.write(index, np.full((4, 5), value, dtype="u2"))
+    storage.journal.close()
+    # a crash: the session is gone, and the last record was half written
+    with open(Path(storage._tmp, JOURNAL_INDEX_FILE), "ab") as f:
+        f.write(b"\x01\x00")
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    crashed = Path(storage._tmp).with_name(f"nmm-{proc.pid}-abc")
+    os.replace(storage._tmp, crashed)
+
+    # kept by the cleanup of orphans, for recovery
+    assert reap_orphans([tmp_path]) == []
+    assert _find_journals([tmp_path]) == [crashed]
+    assert _recoverable([tmp_path]) == [("img", _dir_size(crashed))]
+    recovered = RecoveredStorage(crashed)
+    assert Path(recovered.path).parent.name.startswith(scratch_prefix())
+    assert recovered.header["name"] == "img"
+    assert recovered.written.tolist() == [list(index) for index in frames]
+    assert len(recovered.levels) == 2
+    for index, value in frames.items():
+        assert (recovered.array[index] == value).all()
+    assert not recovered.array[1].any()
+    assert _find_journals([tmp_path]) == []
+    recovered.close()
+    _REAPER.join()
+    assert not list(tmp_path.iterdir())
+
+
+def test_closed_storage_is_not_recoverable(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # as if the session exited before the reaper deleted the directory
+    monkeypatch.setattr("napari_micromanager._mda_storage.reap", lambda path: None)
+    storage = TempZarrStorage((2, 4, 5), "u2", (1, 4, 5), directory=str(tmp_path))
+    storage.start_journal({"name": "img", "shape": [2]})
+    storage.write((0,), np.ones((4, 5), dtype="u2"))
+    storage.close()
+    assert Path(storage._tmp).is_dir()
+    assert not Path(storage._tmp, JOURNAL_FILE).exists()
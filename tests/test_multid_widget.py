@@ -1,18 +1,21 @@
 from __future__ import annotations
 
+from pathlib import Path
 from typing import TYPE_CHECKING
 
+import numpy as np
 import pytest
 import useq
+import zarr
 from pymmcore_plus.mda import MDAEngine
+from qtpy.QtWidgets import QMessageBox
 from useq import MDASequence
 
 from napari_micromanager._gui_objects._mda_widget import MultiDWidget
+from napari_micromanager._mda_storage import _ZARR_V3
 from napari_micromanager._util import NMM_METADATA_KEY
 
 if TYPE_CHECKING:
-    from pathlib import Path
-
     from pytestqt.qtbot import QtBot
 
     from napari_micromanager.main_window import MainWindow
@@ -34,6 +37,8 @@ def test_main_window_mda(main_window: MainWindow, qtbot: QtBot) -> None:
     )
     assert main_window.viewer.layers[-1].data.shape == (4, 2, 4, 512, 512)
     assert main_window.viewer.layers[-1].data.nchunks_initialized == 32
+    assert handler.stats.frames == 32
+    assert handler.stats.max_queue_depth >= 1
 
     layer_meta = main_window.viewer.layers[0].metadata.get(NMM_METADATA_KEY)
     keys = ["useq_sequence", "uid"]
@@ -191,3 +196,165 @@ def test_script_initiated_mda(main_window: MainWindow, qtbot: QtBot) -> None:
     viewer_layer_names = [layer.name for layer in viewer.layers]
     assert layer_name in viewer_layer_names
     assert sequence.shape == viewer.layers[layer_name].data.shape[:-2]
+
+
+def test_mda_to_ome_zarr(main_window: MainWindow, qtbot: QtBot, tmp_path: Path) -> None:
+    handler = main_window._core_link._mda_handler
+    handler.ome_zarr_dir = tmp_path
+    mda = MDASequence(
+        time_plan={"loops": 2, "interval": 0},
+        channels=["DAPI", "FITC"],
+        metadata={NMM_METADATA_KEY: {"split_channels": True}},
+    )
+    with qtbot.waitSignal(main_window._mmc.mda.events.sequenceFinished):
+        main_window._mmc.run_mda(mda)
+    qtbot.waitUntil(lambda: not handler._mda_running, timeout=5000)
+    main_window._core_link.cleanup()
+
+    # the data is kept after cleanup, split channels in a single image group
+    root = zarr.open_group(str(tmp_path / "Exp_000.zarr"))
+    [key] = root.group_keys()
+    assert root[key]["0"].shape == (2, 2, 512, 512)
+    assert root[key]["0"].nchunks_initialized == 4
+
+
+@pytest.mark.parametrize("budget", [0, 2**30])
+def test_mda_memory_budget(main_window: MainWindow, qtbot: QtBot, budget: int) -> None:
+    handler = main_window._core_link._mda_handler
+    handler.memory_budget = budget
+    mda = MDASequence(time_plan={"loops": 3, "interval": 0}, channels=["DAPI"])
+    with qtbot.waitSignal(main_window._mmc.mda.events.sequenceFinished):
+        main_window._mmc.run_mda(mda)
+    qtbot.waitUntil(lambda: not handler._mda_running, timeout=5000)
+
+    data = main_window.viewer.layers[-1].data
+    assert isinstance(data, np.ndarray) == bool(budget)
+    assert all(np.asarray(data[t]).any() for t in range(3))
+
+
+def test_mda_scratch_striping(
+    main_window: MainWindow, qtbot: QtBot, tmp_path: Path
+) -> None:
+    disks = [tmp_path / "nvme0", tmp_path / "nvme1"]
+    for disk in disks:
+        disk.mkdir()
+    with pytest.raises(ValueError, match="does not exist"):
+        main_window.scratch_dirs = [tmp_path / "missing"]
+    main_window.scratch_dirs = disks
+
+    handler = main_window._core_link._mda_handler
+    for _ in range(3):
+        mda = MDASequence(
+            time_plan={"loops": 2, "interval": 0},
+            channels=["DAPI", "FITC", "Cy5"],
+            metadata={NMM_METADATA_KEY: {"split_channels": True}},
+        )
+        with qtbot.waitSignal(main_window._mmc.mda.events.sequenceFinished):
+            main_window._mmc.run_mda(mda)
+        qtbot.waitUntil(lambda: not handler._mda_running, timeout=5000)
+
+    # one array per MDA (shared by the layers of its channels), alternating
+    # between the two disks
+    paths = [Path(storage.path) for storage in handler._tmp_arrays.values()]
+    assert [p.parent.parent for p in paths[::3]] == [disks[0], disks[1], disks[0]]
+    assert len(set(paths)) == 3
+    assert [len(list(d.iterdir())) for d in disks] == [2, 1]
+
+
+def test_mda_pyramid(main_window: MainWindow, qtbot: QtBot) -> None:
+    handler = main_window._core_link._mda_handler
+    handler.pyramid_levels = 3
+    mda = MDASequence(time_plan={"loops": 2, "interval": 0}, channels=["DAPI"])
+    with qtbot.waitSignal(main_window._mmc.mda.events.sequenceFinished):
+        main_window._mmc.run_mda(mda)
+    qtbot.waitUntil(lambda: not handler._mda_running, timeout=5000)
+
+    layer = main_window.viewer.layers[-1]
+    assert layer.multiscale
+    assert len(layer.data) == 4
+    h, w = layer.data[0].shape[-2:]
+    assert layer.data[3].shape[-2:] == (h // 8, w // 8)
+    assert all(np.asarray(layer.data[3][t]).any() for t in range(2))
+
+
+def test_compression_metadata(main_window: MainWindow) -> None:
+    main_window._show_dock_widget("MDA")
+    mda_widget = main_window._dock_widgets["MDA"].widget()
+    assert isinstance(mda_widget, MultiDWidget)
+
+    mda_widget.compression_combo.setCurrentText("zstd")
+    mda_widget.compression_level.setValue(7)
+    meta = mda_widget.value().metadata[NMM_METADATA_KEY]
+    assert meta["compression"] == "zstd"
+    assert meta["compression_level"] == 7
+
+    mda_widget.compression_combo.setCurrentText("none")
+    assert not mda_widget.compression_level.isEnabled()
+    assert "compression_level" not in mda_widget.value().metadata[NMM_METADATA_KEY]
+
+
+@pytest.mark.parametrize("codec", ["none", "zstd"])
+def test_mda_preflight(
+    main_window: MainWindow, monkeypatch: pytest.MonkeyPatch, codec: str
+) -> None:
+    main_window._show_dock_widget("MDA")
+    mda_widget = main_window._dock_widgets["MDA"].widget()
+    assert isinstance(mda_widget, MultiDWidget)
+    assert mda_widget.mda_handler is main_window._core_link._mda_handler
+
+    mda_widget.setValue(MDASequence(time_plan={"loops": 4, "interval": 0}))
+    mda_widget.compression_combo.setCurrentText(codec)
+    [estimate] = mda_widget.mda_handler.preflight(mda_widget.value())
+    assert estimate.n_frames == 4
+    assert estimate.n_bytes == 4 * 512 * 512 * main_window._mmc.getBytesPerPixel()
+    assert estimate.fits and estimate.keeps_up
+    assert mda_widget.prepare_mda() is None
+
+    # pretend the disk is full: uncompressed data is refused, compressed asks
+    monkeypatch.setattr(
+        "shutil.disk_usage", lambda _: type("usage", (), {"free": 1024})
+    )
+    asked: list[str] = []
+    monkeypatch.setattr(
+        "qtpy.QtWidgets.QMessageBox.critical", lambda *a: asked.append("critical")
+    )
+    monkeypatch.setattr(
+        "qtpy.QtWidgets.QMessageBox.warning",
+        lambda *a: asked.append("warning") or QMessageBox.StandardButton.No,
+    )
+    assert mda_widget.prepare_mda() is False
+    assert asked == ["critical" if codec == "none" else "warning"]
+
+
+def test_mda_chunk_depth(main_window: MainWindow, qtbot: QtBot) -> None:
+    handler = main_window._core_link._mda_handler
+    with pytest.raises(ValueError, match="at least 1"):
+        handler.chunk_depth = {"z": 0}
+    handler.chunk_depth = {"z": 4}
+    mda = MDASequence(z_plan={"range": 5, "step": 1}, channels=["DAPI"])
+    with qtbot.waitSignal(main_window._mmc.mda.events.sequenceFinished):
+        main_window._mmc.run_mda(mda)
+    qtbot.waitUntil(lambda: not handler._mda_running, timeout=5000)
+
+    # 6 planes in 2 chunks, the last one (partial) written when the MDA ended
+    storage = handler._tmp_arrays[str(mda.uid)]
+    assert storage.chunks[-3] == 4
+    assert all(np.asarray(storage.array[..., z, :, :]).any() for z in range(6))
+
+
+@pytest.mark.skipif(not _ZARR_V3, reason="sharding requires zarr v3")
+def test_mda_shard_depth(main_window: MainWindow, qtbot: QtBot) -> None:
+    handler = main_window._core_link._mda_handler
+    with pytest.raises(ValueError, match="at least 1"):
+        handler.shard_depth = {"t": 0}
+    handler.shard_depth = {"t": 2}
+    mda = MDASequence(time_plan={"interval": 0, "loops": 3}, channels=["DAPI"])
+    with qtbot.waitSignal(main_window._mmc.mda.events.sequenceFinished):
+        main_window._mmc.run_mda(mda)
+    qtbot.waitUntil(lambda: not handler._mda_running, timeout=5000)
+
+    # one-frame chunks, written 2 timepoints per shard file
+    storage = handler._tmp_arrays[str(mda.uid)]
+    assert storage.array.chunks[0] == 1
+    assert storage.chunks[0] == 2
+    assert all(np.asarray(storage.array[t]).any() for t in range(3))
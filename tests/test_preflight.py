@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import TYPE_CHECKING
+
+from napari_micromanager._preflight import (
+    StorageEstimate,
+    cached_write_rate,
+    probe_in_background,
+    probe_write_rate,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_probe_write_rate(tmp_path: Path) -> None:
+    rate = probe_write_rate(tmp_path, n_bytes=2**20)
+    assert 0 < rate < math.inf
+    assert not list(tmp_path.glob(".nmm-probe-*"))
+    # measured once per directory
+    assert probe_write_rate(tmp_path, n_bytes=2**20) == rate
+
+
+def test_storage_estimate(tmp_path: Path) -> None:
+    gb = 2**30
+    ok = StorageEstimate(10, gb, 10.0, tmp_path, free_bytes=2 * gb, write_rate=gb)
+    assert ok.data_rate == gb / 10
+    assert ok.fits and ok.keeps_up
+    assert not ok.problems()
+
+    full = StorageEstimate(10, gb, 0.5, tmp_path, free_bytes=gb // 2, write_rate=gb)
+    assert not full.fits and not full.keeps_up
+    problems = full.problems()
+    assert len(problems) == 2
+    assert "will not fit" in problems[0]
+    full.compressed = True
+    assert "may not fit" in full.problems()[0]
+
+    # kept in memory: nothing to check
+    assert not StorageEstimate(10, gb, 0.5).problems()
+    # unknown duration: no data rate to keep up with
+    assert StorageEstimate(10, gb, 0.0, tmp_path, gb, write_rate=1).keeps_up
+
+    # write rate not measured yet: reported, rather than assumed to keep up
+    unknown = StorageEstimate(10, gb, 10.0, tmp_path, free_bytes=2 * gb)
+    assert not unknown.keeps_up
+    assert unknown.problems() == [
+        "The data is acquired at 102.4 MB/s but the write speed of "
+        f"{tmp_path} is not measured yet: frames may pile up in memory."
+    ]
+    assert StorageEstimate(10, gb, 0.0, tmp_path, free_bytes=2 * gb).keeps_up
+
+
+def test_probe_in_background(tmp_path: Path) -> None:
+    thread = probe_in_background(tmp_path, n_bytes=2**20)
+    assert thread is not None
+    # already being probed
+    assert probe_in_background(tmp_path) is None
+    thread.join()
+    rate = cached_write_rate(tmp_path)
+    assert rate is not None and 0 < rate < math.inf
+    assert probe_in_background(tmp_path) is None
+
+
+def test_storage_estimate_measure(tmp_path: Path) -> None:
+    # the write rate is not measured yet: it is probed in the background
+    estimate = StorageEstimate.measure(4, 2**20, 1.0, tmp_path, compressed=True)
+    assert estimate.directory == tmp_path
+    assert estimate.free_bytes > 0
+    assert estimate.write_rate is None
+    assert "not measured yet" in estimate.problems()[0]
+    assert estimate.compressed
+
+    deadline = time.monotonic() + 30
+    while cached_write_rate(tmp_path) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    estimate = StorageEstimate.measure(4, 2**20, 1.0, tmp_path)
+    rate = cached_write_rate(tmp_path)
+    assert rate is not None and estimate.write_rate == rate < math.inf
+    assert not estimate.problems()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from typing import TYPE_CHECKING
+
+from napari_micromanager._reaper import (
+    _REAPER,
+    JOURNAL_FILE,
+    JOURNAL_MAX_AGE,
+    make_scratch_dir,
+    reap,
+    reap_orphans,
+    scratch_prefix,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_reap(tmp_path: Path) -> None:
+    tmp_path = tmp_path / "scratch"
+    tmp_path.mkdir()
+    directory = make_scratch_dir(tmp_path)
+    assert os.path.basename(directory).startswith(scratch_prefix())
+    for i in range(20):
+        (tmp_path / directory / f"chunk{i}").write_bytes(b"0" * 1024)
+    file = tmp_path / "spill.raw"
+    file.write_bytes(b"0")
+
+    reap(directory)
+    reap(file)
+    reap(tmp_path / "missing")
+    _REAPER.join()
+    assert not list(tmp_path.iterdir())
+
+
+def test_reap_orphans(tmp_path: Path) -> None:
+    tmp_path = tmp_path / "scratch"
+    tmp_path.mkdir()
+    dead = _dead_pid()
+    orphan_dir = tmp_path / f"nmm-{dead}-abc"
+    orphan_dir.mkdir()
+    (orphan_dir / "0").mkdir()
+    orphan_file = tmp_path / f"nmm-{dead}-spill-xyz.raw"
+    orphan_file.write_bytes(b"0")
+    ours = make_scratch_dir(tmp_path)
+    other = tmp_path / "nmm-notapid"
+    other.mkdir()
+
+    reaped = reap_orphans([tmp_path, tmp_path / "missing"])
+    assert sorted(reaped) == sorted([orphan_dir, orphan_file])
+    _REAPER.join()
+    assert sorted(tmp_path.iterdir()) == sorted([tmp_path / ours, other])
+
+
+def test_reap_orphans_journals(tmp_path: Path) -> None:
+    tmp_path = tmp_path / "scratch"
+    tmp_path.mkdir()
+    dead = _dead_pid()
+    fresh, old = tmp_path / f"nmm-{dead}-fresh", tmp_path / f"nmm-{dead}-old"
+    for path in (fresh, old):
+        path.mkdir()
+        (path / JOURNAL_FILE).write_text("{}")
+    week_ago = time.time() - JOURNAL_MAX_AGE - 60
+    os.utime(old / JOURNAL_FILE, (week_ago, week_ago))
+
+    # journals are kept for recovery until they age out...
+    assert reap_orphans([tmp_path]) == [old]
+    _REAPER.join()
+    assert list(tmp_path.iterdir()) == [fresh]
+    # ...or are discarded
+    assert reap_orphans([tmp_path], keep_journals=False) == [fresh]
+    _REAPER.join()
+    assert not list(tmp_path.iterdir())